@@ -55,6 +55,7 @@ from .child_tb_referral_outcome_admin import ChildTBReferralOutcomeAdmin
 from .child_tb_screening_admin import ChildTBScreeningAdmin
 from .child_visit_admin import ChildVisitAdmin
 from .child_working_status_admin import ChildWorkingStatusAdmin
+from .export_job_admin import ExportJobAdmin
 from .hiv_testing_adol_admin import HivTestingAdmin
 from .infant_arv_exposure_admin import InfantArvExposureAdmin
 from .infant_arv_prophylaxis_admin import InfantArvProphylaxisAdmin
@@ -12,10 +12,10 @@ from edc_model_admin import (
     ModelAdminFormAutoNumberMixin, ModelAdminRedirectOnDeleteMixin,
     ModelAdminAuditFieldsMixin, ModelAdminReadOnlyMixin,
     audit_fieldset_tuple)
-import pytz
 
 from ..admin_site import flourish_child_admin
 from ..forms import AppointmentForm
+from ..helper_classes.business_calendar import business_calendar
 from ..models import Appointment
 from .exportaction_mixin import ExportActionMixin
 
@@ -90,22 +90,13 @@ class AppointmentAdmin(ModelAdminFormInstructionsMixin, ModelAdminNextUrlRedirec
         app_obj = self.model.objects.get(id=object_id)
 
         if app_obj.visit_code_sequence == 0:
-
-            earliest_start = (app_obj.timepoint_datetime -
-                              app_obj.visits.get(app_obj.visit_code).rlower).astimezone(
-                                          pytz.timezone('Africa/Gaborone'))
-
-            latest_start = (app_obj.timepoint_datetime +
-                            app_obj.visits.get(app_obj.visit_code).rupper).astimezone(
-                                          pytz.timezone('Africa/Gaborone'))
-
-            ideal_start = app_obj.timepoint_datetime.astimezone(
-                                          pytz.timezone('Africa/Gaborone'))
-
+            window = business_calendar.appointment_window(app_obj)
             extra_context.update({
-                'earliest_start': earliest_start.strftime("%Y-%m-%d, %H:%M:%S"),
-                'latest_start': latest_start.strftime("%Y-%m-%d, %H:%M:%S"),
-                'ideal_start': ideal_start.strftime("%Y-%m-%d, %H:%M:%S"), })
+                'earliest_start': window.earliest.strftime("%Y-%m-%d, %H:%M:%S"),
+                'latest_start': window.latest.strftime("%Y-%m-%d, %H:%M:%S"),
+                'ideal_start': window.ideal.strftime("%Y-%m-%d, %H:%M:%S"),
+                'first_working_day': window.first_working_day.strftime("%Y-%m-%d"),
+                'last_working_day': window.last_working_day.strftime("%Y-%m-%d"), })
 
         return super().change_view(
             request, object_id, form_url=form_url, extra_context=extra_context)
@@ -119,14 +110,18 @@ class AppointmentAdmin(ModelAdminFormInstructionsMixin, ModelAdminNextUrlRedirec
             earliest_start = extra_context.get('earliest_start')
             latest_start = extra_context.get('latest_start')
             ideal_start = extra_context.get('ideal_start')
+            first_working_day = extra_context.get('first_working_day')
+            last_working_day = extra_context.get('last_working_day')
 
             additional_instructions = mark_safe(
                 '<table style="background-color: #f8f8f8;padding:10px;margin-top:10px;'
                 'width:60%;border:0.5px solid #f0f0f0"><tr>'
                 f'<td colspan="3">Earliest Start: <b>{earliest_start}</b></td>'
                 f'<td colspan="3">Ideal Start: <b>{ideal_start}</b></td>'
-                f'<td colspan="3">Latest Start: <b>{latest_start}</b></td>'
-                '</table></tr> <BR>'
+                f'<td colspan="3">Latest Start: <b>{latest_start}</b></td></tr><tr>'
+                f'<td colspan="9">Working days: <b>{first_working_day}</b> to '
+                f'<b>{last_working_day}</b></td>'
+                '</tr></table> <BR>'
                 'To start or continue to edit FORMS for this subject, change the '
                 'appointment status below to "In Progress" and click SAVE. <BR>'
                 '<i>Note: You may only edit one appointment at a time. '
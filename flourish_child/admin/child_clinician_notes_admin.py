@@ -15,12 +15,12 @@ class ClinicianNotesImageInline(TabularInlineMixin, admin.TabularInline):
     extra = 0
 
     fields = ('clinician_notes_image', 'image', 'user_uploaded', 'datetime_captured',
-              'modified', 'hostname_created',)
+              'stamp_status', 'modified', 'hostname_created',)
 
     def get_readonly_fields(self, request, obj=None):
         fields = super().get_readonly_fields(request, obj)
         fields = ('clinician_notes_image', 'datetime_captured',
-                  'user_uploaded') + fields
+                  'user_uploaded', 'stamp_status') + fields
 
         return fields
 
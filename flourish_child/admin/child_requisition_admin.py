@@ -12,7 +12,7 @@ from edc_senaite_interface.admin import SenaiteRequisitionAdminMixin
 from ..admin_site import flourish_child_admin
 from ..forms import ChildRequisitionForm
 from ..models import ChildRequisition
-from ..helper_classes.utils import child_utils
+from ..helper_classes.prior_instance_finder import PriorInstanceFinder
 from .model_admin_mixins import ChildCrfModelAdminMixin, ExportRequisitionCsvMixin
 
 requisition_identifier_fields = (
@@ -102,20 +102,11 @@ class ChildRequisitionAdmin(ExportRequisitionCsvMixin, ChildCrfModelAdminMixin,
         instance relative to this object's appointment and panel.
         """
         panel_id = request.GET.get('panel', None)
-        obj = None
         appointment = instance or self.get_instance(request)
 
         if appointment:
-            while appointment:
-                options = {
-                    '{}__appointment'.format(
-                        self.model.visit_model_attr()): appointment,
-                    'panel__id': panel_id}
-                try:
-                    obj = self.model.objects.get(**options)
-                except self.model.DoesNotExist:
-                    pass
-                else:
-                    break
-                appointment = child_utils.get_previous_appt_instance(appointment)
-        return obj
+            return PriorInstanceFinder(
+                appointment=appointment,
+                visit_model_attr=self.model.visit_model_attr(),
+                include_current=True).find(self.model, panel__id=panel_id)
+        return None
@@ -0,0 +1,69 @@
+import os
+import tempfile
+import zipfile
+
+from django.contrib import admin
+from django.http import FileResponse, Http404
+from django.urls import path, reverse
+from django.utils.html import format_html
+
+from ..admin_site import flourish_child_admin
+from ..constants import DONE
+from ..models import ExportJob
+
+
+@admin.register(ExportJob, site=flourish_child_admin)
+class ExportJobAdmin(admin.ModelAdmin):
+
+    list_display = ('model_label', 'status', 'rows_done', 'total_rows',
+                    'rows_per_second', 'user_created', 'created', 'download')
+
+    list_filter = ('status', 'model_label')
+
+    readonly_fields = ('model_label', 'status', 'chunk_size', 'total_rows',
+                       'rows_done', 'chunks_done', 'last_pk', 'elapsed_seconds',
+                       'rows_per_second', 'started_datetime', 'finished_datetime',
+                       'error', 'download')
+
+    exclude = ('object_ids', )
+
+    def has_add_permission(self, request):
+        return False
+
+    def download(self, obj):
+        if obj.status != DONE:
+            return '-'
+        url = reverse(
+            f'{self.admin_site.name}:flourish_child_exportjob_download',
+            args=(obj.id, ))
+        return format_html('<a href="{}">Download</a>', url)
+
+    download.short_description = 'Download'
+
+    def get_urls(self):
+        urls = [
+            path('<uuid:job_id>/download/',
+                 self.admin_site.admin_view(self.download_view),
+                 name='flourish_child_exportjob_download'),
+        ]
+        return urls + super().get_urls()
+
+    def download_view(self, request, job_id):
+        """Returns the part files of a finished export job as one zip.
+        """
+        try:
+            export_job = ExportJob.objects.get(id=job_id, status=DONE)
+        except ExportJob.DoesNotExist:
+            raise Http404('Export job not found or not finished.')
+
+        zip_file = tempfile.TemporaryFile()
+        with zipfile.ZipFile(zip_file, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for filename in export_job.output_files:
+                archive.write(filename, arcname=os.path.basename(filename))
+        zip_file.seek(0)
+
+        model_name = export_job.model_label.split('.')[-1]
+        return FileResponse(
+            zip_file, as_attachment=True,
+            filename=f'{model_name}-{export_job.created.strftime("%Y-%m-%d")}.zip',
+            content_type='application/zip')
@@ -4,6 +4,7 @@ from django.apps import apps as django_apps
 from django.conf import settings
 from django.contrib import admin
 from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import DateTimeField
 from django.http import HttpResponse
 from django.urls.base import reverse
 from django.urls.exceptions import NoReverseMatch
@@ -25,7 +26,7 @@ import xlwt
 import uuid
 
 from .exportaction_mixin import ExportActionMixin
-from ..helper_classes.utils import child_utils
+from ..helper_classes.prior_instance_finder import PriorInstanceFinder
 
 
 class ModelAdminMixin(ModelAdminNextUrlRedirectMixin,
@@ -45,22 +46,37 @@ class ModelAdminMixin(ModelAdminNextUrlRedirectMixin,
 
 class ExportRequisitionCsvMixin:
 
-    def fix_date_format(self, obj_dict=None):
-        """Change all dates into a format for the export
-        and split the time into a separate value.
+    def requisition_export_columns(self, model_cls):
+        """Returns the attnames of the exported fields and the positions of
+        the datetime fields among them. Datetimes are exported as a date, with
+        the time in a separate `<field>_time` column.
+        """
+        fields = model_cls._meta.concrete_fields
+        attnames = [field.attname for field in fields]
+        datetime_positions = [
+            position for position, field in enumerate(fields)
+            if isinstance(field, DateTimeField)]
+        return attnames, datetime_positions
+
+    def requisition_row(self, obj, attnames=None, datetime_positions=None):
+        """Returns the export values of a requisition.
 
         Format: m/d/y
         """
-
-        result_dict_obj = {**obj_dict}
-        for key, value in obj_dict.items():
+        row = [getattr(obj, attname) for attname in attnames]
+        time_values = []
+        for position in datetime_positions:
+            value = row[position]
             if isinstance(value, datetime.datetime):
-                value = timezone.make_naive(value)
-                time_value = value.time()
-                time_variable = key + '_time'
-                result_dict_obj[key] = value.date()
-                result_dict_obj[time_variable] = time_value
-        return result_dict_obj
+                if timezone.is_aware(value):
+                    value = timezone.make_naive(value)
+                row[position] = value.date()
+                time_values.append(value.time())
+            else:
+                time_values.append(None)
+        row.extend(time_values)
+        row.append(obj.panel.name)
+        return row
 
     def export_as_csv(self, request, queryset):
 
@@ -77,33 +93,32 @@ class ExportRequisitionCsvMixin:
         font_style.font.bold = True
         font_style.num_format_str = 'YYYY/MM/DD h:mm:ss'
 
-        field_names = self.fix_date_format(queryset[0].__dict__)
-        field_names = [a for a in field_names.keys()]
+        attnames, datetime_positions = self.requisition_export_columns(
+            queryset.model)
+        field_names = attnames + [
+            f'{attnames[position]}_time' for position in datetime_positions]
         field_names += ['panel_name']
-        field_names.remove('_state')
 
         for col_num in range(len(field_names)):
             ws.write(row_num, col_num, field_names[col_num], font_style)
 
-        field_names.remove('panel_name')
-        for obj in queryset:
-            obj_data = self.fix_date_format(obj.__dict__)
-            data = [obj_data[field] for field in field_names]
-            data += [obj.panel.name]
+        date_style = xlwt.easyxf(num_format_str='YYYY/MM/DD')
+        time_style = xlwt.easyxf(num_format_str='h:mm:ss')
+
+        for obj in queryset.select_related('panel'):
+            data = self.requisition_row(
+                obj, attnames=attnames, datetime_positions=datetime_positions)
 
             row_num += 1
-            for col_num in range(len(data)):
-                if isinstance(data[col_num], uuid.UUID):
-                    ws.write(row_num, col_num, str(data[col_num]))
-                elif isinstance(data[col_num], datetime.date):
-                    ws.write(row_num, col_num, data[col_num], xlwt.easyxf(
-                        num_format_str='YYYY/MM/DD'))
-                elif isinstance(data[col_num], datetime.time):
-                    ws.write(row_num, col_num, data[col_num], xlwt.easyxf(
-                        num_format_str='h:mm:ss'))
+            for col_num, value in enumerate(data):
+                if isinstance(value, uuid.UUID):
+                    ws.write(row_num, col_num, str(value))
+                elif isinstance(value, datetime.date):
+                    ws.write(row_num, col_num, value, date_style)
+                elif isinstance(value, datetime.time):
+                    ws.write(row_num, col_num, value, time_style)
                 else:
-                    ws.write(row_num, col_num, data[col_num])
-        ws
+                    ws.write(row_num, col_num, value)
         wb.save(response)
         return response
 
@@ -156,22 +171,13 @@ class ChildCrfModelAdminMixin(
         """Returns a model instance that is the first occurrence of a previous
         instance relative to this object's appointment.
         """
-        obj = None
         appointment = instance or self.get_instance(request)
 
         if appointment:
-            while appointment:
-                options = {
-                    '{}__appointment'.format(self.model.visit_model_attr()):
-                    child_utils.get_previous_appt_instance(appointment)}
-                try:
-                    obj = self.model.objects.get(**options)
-                except ObjectDoesNotExist:
-                    pass
-                else:
-                    break
-                appointment = child_utils.get_previous_appt_instance(appointment)
-        return obj
+            return PriorInstanceFinder(
+                appointment=appointment,
+                visit_model_attr=self.model.visit_model_attr()).find(self.model)
+        return None
 
     def get_instance(self, request):
         try:
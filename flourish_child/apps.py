@@ -15,6 +15,18 @@ class AppConfig(DjangoAppConfig):
 
     def ready(self):
         from .models import child_consent_on_post_save
+        from .helper_classes.onschedule_registry import onschedule_registry
+        onschedule_registry.populate()
+        from .helper_classes.utils import child_utils
+        child_utils.identity_cache.connect()
+        from .helper_classes.consent_version_service import consent_versions
+        consent_versions.connect()
+        from .helper_classes.business_calendar import business_calendar
+        business_calendar.connect()
+        from .helper_classes.notification_dispatcher import notifications
+        notifications.connect()
+        from .helper_classes.outbox import outbox
+        outbox.connect()
 
 
 if settings.APP_NAME == 'flourish_child':
@@ -1,9 +1,73 @@
-from django.forms import model_to_dict
-from django.http import JsonResponse
+import hashlib
 from urllib.parse import urlparse, parse_qs
 
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
 from .models import VaccinesReceived
 
+DOSE_DATE_FIELDS = ['first_dose_dt', 'second_dose_dt', 'third_dose_dt',
+                    'booster_dose_dt', 'booster_2nd_dose_dt', 'booster_3rd_dose_dt']
+
+
+def vaccine_history(subject_identifier, received_vaccine_name=None):
+    """ Query the latest dose dates of every vaccine received by a participant,
+        with one query.
+        @param subject_identifier: child subject identifier
+        @param received_vaccine_name: only query this vaccine if given
+        @return: dictionary of vaccine name to dose dates, the number of vaccine
+                 rows and the newest modified datetime of the rows and their
+                 immunization history forms.
+    """
+    options = {}
+    if received_vaccine_name is not None:
+        options.update(received_vaccine_name=received_vaccine_name)
+    rows = VaccinesReceived.objects.filter(
+        child_immunization_history__child_visit__subject_identifier=subject_identifier,
+        received_vaccine_name__isnull=False, **options).order_by(
+            'received_vaccine_name',
+            '-child_immunization_history__report_datetime').values(
+                'received_vaccine_name', 'modified',
+                'child_immunization_history__modified', *DOSE_DATE_FIELDS)
+    history, last_modified, count = {}, None, 0
+    for row in rows:
+        count += 1
+        last_modified = max(filter(None, [
+            last_modified, row['modified'], row['child_immunization_history__modified']]))
+        # rows are ordered newest first within each vaccine
+        history.setdefault(
+            row['received_vaccine_name'],
+            {field: row[field] for field in DOSE_DATE_FIELDS})
+    return history, count, last_modified
+
+
+@login_required
+def get_vaccine_history(request, subject_identifier):
+    """ Return the latest dose dates of all the vaccines a participant received,
+        answering 304 Not Modified if no vaccine row changed since the ETag or
+        Last-Modified the client sent.
+        @param request: request object
+        @param subject_identifier: child subject identifier
+        @return: JSON response object of vaccine name to dose dates.
+    """
+    history, count, last_modified = vaccine_history(subject_identifier)
+    etag = hashlib.md5(
+        f'{subject_identifier}:{count}:{last_modified}'.encode()).hexdigest()
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+
+    response = get_conditional_response(
+        request, etag=quote_etag(etag), last_modified=timestamp)
+    if response is None:
+        response = JsonResponse(history)
+    response['ETag'] = quote_etag(etag)
+    if timestamp:
+        response['Last-Modified'] = http_date(timestamp)
+    # let the browser keep the response, but revalidate it on every use
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
 
 def get_received_dates(request, vaccine):
     """ Query vaccines received to retrieve vaccination date(s) for a participant's
@@ -18,16 +82,5 @@ def get_received_dates(request, vaccine):
         parsed_referrer = urlparse(referrer)
         referrer_params = parse_qs(parsed_referrer.query)
         subject_identifier = referrer_params.get('subject_identifier', None)[0]
-    data = {}
-    try:
-        data = VaccinesReceived.objects.filter(
-            child_immunization_history__child_visit__subject_identifier=subject_identifier,
-            received_vaccine_name=vaccine).latest('child_immunization_history__report_datetime')
-    except VaccinesReceived.DoesNotExist:
-        pass
-    else:
-        data_dict = model_to_dict(
-            data, fields=['first_dose_dt', 'second_dose_dt', 'third_dose_dt',
-                          'booster_dose_dt', 'booster_2nd_dose_dt', 'booster_3rd_dose_dt'])
-        return JsonResponse(data_dict)
-    return JsonResponse(data)
+    history, _, _ = vaccine_history(subject_identifier, received_vaccine_name=vaccine)
+    return JsonResponse(history.get(vaccine, {}))
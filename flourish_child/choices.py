@@ -7,7 +7,7 @@ from edc_constants.constants import IND, NEG, PENDING, POS
 from edc_visit_tracking.constants import COMPLETED_PROTOCOL_VISIT, MISSED_VISIT
 from edc_visit_tracking.constants import LOST_VISIT, SCHEDULED, UNSCHEDULED
 
-from .constants import BREASTFEED_ONLY, NOT_RECEIVED, PNTA
+from .constants import BREASTFEED_ONLY, DONE, FAILED, NOT_RECEIVED, PNTA, RUNNING
 
 HIV_STATUS = (
     (POS, 'Positive'),
@@ -206,6 +206,13 @@ ETHNICITY = (
     (OTHER, 'Other, specify')
 )
 
+EXPORT_JOB_STATUS = (
+    (PENDING, 'Pending'),
+    (RUNNING, 'Running'),
+    (DONE, 'Done'),
+    (FAILED, 'Failed'),
+)
+
 FACIAL_DEFECT = (
     ('None', 'None'),
     ('Anophthalmia/micro-opthalmia', 'Anophthalmia/micro-opthalmia'),
@@ -540,6 +547,13 @@ OTHER_DEFECT = (
     (OTHER, 'Other defect/syndrome not already reported, specify'),
 )
 
+OUTBOX_STATUS = (
+    (PENDING, 'Pending'),
+    (RUNNING, 'Running'),
+    (DONE, 'Done'),
+    (FAILED, 'Failed'),
+)
+
 OVERALL_MARKS = (
     ('a', 'A'),
     ('b', 'B'),
@@ -666,6 +680,12 @@ SCHOOL_TYPE = (
     (NOT_APPLICABLE, 'Not applicable'),
 )
 
+SCORED_INSTRUMENTS = (
+    ('cbcl', 'CBCL'),
+    ('brief2_parent', 'BRIEF-2 Parent'),
+    ('brief2_self', 'BRIEF-2 Self-Report'),
+)
+
 SKIN_ABNORMALITY = (
     ('None', 'None'),
     ('Icthyosis', 'Icthyosis'),
@@ -673,6 +693,13 @@ SKIN_ABNORMALITY = (
     (OTHER, 'Other skin abnormality, specify'),
 )
 
+STAMP_STATUS = (
+    (PENDING, 'Pending'),
+    (RUNNING, 'Running'),
+    (DONE, 'Done'),
+    (FAILED, 'Failed'),
+)
+
 TANNER_STAGES = (
     ('1', '1'),
     ('2', '2'),
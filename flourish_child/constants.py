@@ -4,3 +4,6 @@ BOTH_BREAST_FEEDING_AND_FORMULA = 'Both breastfeeding and formula feeding'
 FORMULA_ONLY = 'Formula feeding only'
 PNTA = 'PNTA'  # prefer not to answer'
 NOT_RECEIVED = 'not_recieved'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
@@ -5,9 +5,9 @@ from edc_appointment.form_validators import AppointmentFormValidator
 from edc_base.sites.forms import SiteModelFormMixin
 from edc_constants.constants import OPEN
 from edc_form_validators import FormValidatorMixin
-import pytz
 
 from ..models import Appointment
+from ..helper_classes.business_calendar import business_calendar
 from ..helper_classes.utils import child_utils
 
 
@@ -30,14 +30,9 @@ class AppointmentForm(SiteModelFormMixin, FormValidatorMixin, AppointmentFormVal
 
         if cleaned_data.get('appt_datetime'):
 
-            visit_definition = self.instance.visits.get(self.instance.visit_code)
-
-            earlist_appt_date = (self.instance.timepoint_datetime -
-                                 visit_definition.rlower).astimezone(
-                pytz.timezone('Africa/Gaborone'))
-            latest_appt_date = (self.instance.timepoint_datetime +
-                                visit_definition.rupper).astimezone(
-                pytz.timezone('Africa/Gaborone'))
+            window = business_calendar.appointment_window(self.instance)
+            earlist_appt_date = window.earliest
+            latest_appt_date = window.latest
 
             if self.instance.visit_code_sequence == 0:
                 if (cleaned_data.get('appt_datetime') < earlist_appt_date.replace(
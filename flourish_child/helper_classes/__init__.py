@@ -1,2 +1,4 @@
-from .child_fu_booking_helper import ChildFollowUpBookingHelper
+from .child_fu_booking_helper import ChildFollowUpBookingHelper, FollowUpBookingEngine
 from .child_onschedule_helper import ChildOnScheduleHelper
+from .m2m_export_encoder import M2MExportEncoder
+from .participant_context_resolver import ParticipantContextResolver
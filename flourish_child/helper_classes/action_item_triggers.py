@@ -0,0 +1,81 @@
+from django.db import transaction
+from edc_action_item.site_action_items import site_action_items
+from edc_base.utils import get_utcnow
+from edc_constants.constants import NEW, OPEN
+
+from .commit_buffer import CommitBuffer
+
+
+class ActionItemTriggerBuffer(CommitBuffer):
+    """Collects `trigger_action_item` calls made during a transaction and
+    resolves them in one pass once it commits.
+
+    The resolution replays the calls in order against the action items read
+    with one query, so the end state is the one sequential calls would leave,
+    then deletes, creates and reopens the action items in bulk.
+    """
+
+    defer_setting = 'FLOURISH_CHILD_DEFER_ACTION_ITEMS'
+
+    def add(self, model_cls, action_name, subject_identifier, repeat=False):
+        self.add_item((model_cls, action_name, subject_identifier, repeat))
+
+    def resolve(self, intents):
+        """ Resolve trigger intents in one batched pass.
+            @param intents: (model_cls, action_name, subject_identifier, repeat)
+                            in call order, duplicates included.
+        """
+        subject_identifiers = {intent[2] for intent in intents}
+        existing = {}
+        for model_cls in {intent[0] for intent in intents}:
+            existing[model_cls] = set(model_cls.objects.filter(
+                subject_identifier__in=subject_identifiers).values_list(
+                    'subject_identifier', flat=True))
+
+        action_item_model_cls = site_action_items.get(
+            intents[0][0].action_name).action_item_model_cls()
+        action_items = {}
+        for pk, subject_identifier, action_name, status in (
+                action_item_model_cls.objects.filter(
+                    subject_identifier__in=subject_identifiers,
+                    action_type__name__in={intent[1] for intent in intents}).values_list(
+                        'id', 'subject_identifier', 'action_type__name', 'status')):
+            action_items[(subject_identifier, action_name)] = [pk, status]
+
+        created, reopened, deleted = [], set(), set()
+        for model_cls, action_name, subject_identifier, repeat in intents:
+            key = (subject_identifier, action_name)
+            trigger = repeat or subject_identifier not in existing[model_cls]
+            action_item = action_items.get(key)
+            if trigger and action_item:
+                action_item[1] = OPEN
+                reopened.add(key)
+            elif trigger:
+                # created with the action's own status, reopened if triggered again
+                action_items[key] = [None, NEW]
+                created.append(key)
+            elif action_item and action_item[1] in [NEW, OPEN]:
+                del action_items[key]
+                reopened.discard(key)
+                if action_item[0] is None:
+                    created.remove(key)
+                else:
+                    deleted.add(action_item[0])
+
+        with transaction.atomic():
+            if deleted:
+                action_item_model_cls.objects.filter(id__in=deleted).delete()
+            for subject_identifier, action_name in created:
+                site_action_items.get(action_name)(subject_identifier=subject_identifier)
+            self.reopen(action_item_model_cls, reopened)
+
+    def reopen(self, action_item_model_cls, keys):
+        for action_name in {action_name for _, action_name in keys}:
+            action_item_model_cls.objects.filter(
+                action_type__name=action_name,
+                subject_identifier__in=[
+                    idx for idx, name in keys if name == action_name]).exclude(
+                        status=OPEN).update(status=OPEN, modified=get_utcnow())
+
+
+action_item_triggers = ActionItemTriggerBuffer()
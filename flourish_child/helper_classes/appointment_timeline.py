@@ -0,0 +1,35 @@
+from bisect import bisect_left, bisect_right
+
+from django.db.models import Q
+
+
+class AppointmentTimeline:
+    """A subject's first occurrence (visit_code_sequence 0) appointments,
+    excluding tb and facet schedules, sorted by appointment datetime for
+    previous and next lookups by bisection.
+    """
+
+    def __init__(self, appointments=None):
+        self.appointments = list(appointments or [])
+        self.datetimes = [appointment.appt_datetime for appointment in self.appointments]
+
+    @classmethod
+    def for_subject(cls, appointment_model_cls, subject_identifier):
+        appointments = appointment_model_cls.objects.filter(
+            subject_identifier=subject_identifier,
+            visit_code_sequence=0).exclude(
+                Q(schedule_name__icontains='tb') | Q(schedule_name__icontains='facet')).order_by(
+                    'appt_datetime')
+        return cls(appointments=appointments)
+
+    def previous(self, appt_datetime):
+        """Returns the latest appointment before `appt_datetime`, or None.
+        """
+        position = bisect_left(self.datetimes, appt_datetime)
+        return self.appointments[position - 1] if position else None
+
+    def next(self, appt_datetime):
+        """Returns the earliest appointment after `appt_datetime`, or None.
+        """
+        position = bisect_right(self.datetimes, appt_datetime)
+        return self.appointments[position] if position < len(self.appointments) else None
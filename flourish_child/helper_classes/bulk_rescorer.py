@@ -0,0 +1,68 @@
+import numpy as np
+
+from .questionnaire_scoring import sum_score
+
+
+def sum_score_array(items):
+    return items.sum(axis=1)
+
+
+# Vectorised equivalents of the row scoring functions.
+array_score_functions = {sum_score: sum_score_array}
+
+
+class BulkRescorer:
+    """Rescores the saved rows of an instrument in chunks: the item columns are
+    read with `values_list`, scored with NumPy and the changed scores written
+    back with `bulk_update`, without sending any save signals.
+    """
+
+    def __init__(self, instrument=None, chunk_size=5000, stdout=None):
+        self.instrument = instrument
+        self.chunk_size = chunk_size
+        self.stdout = stdout
+        self.score_array = array_score_functions[instrument.score_function]
+
+    def chunks(self):
+        model_cls = self.instrument.model_cls
+        columns = ['id', self.instrument.score_field] + self.instrument.item_fields
+        last_pk = None
+        while True:
+            queryset = model_cls.objects.order_by('id')
+            if last_pk is not None:
+                queryset = queryset.filter(id__gt=last_pk)
+            rows = list(queryset.values_list(*columns)[:self.chunk_size])
+            if not rows:
+                return
+            last_pk = rows[-1][0]
+            yield rows
+
+    def rescore_rows(self, rows):
+        """ Returns the (id, new score) of the rows whose score changed.
+        """
+        items = np.array([row[2:] for row in rows], dtype=np.int64)
+        scores = self.score_array(items)
+        current = np.array(
+            [-1 if row[1] is None else row[1] for row in rows], dtype=np.int64)
+        changed = np.flatnonzero(scores != current)
+        return [(rows[index][0], int(scores[index])) for index in changed]
+
+    def rescore(self):
+        """ Rescore every row of the instrument.
+            @return: number of rows read and number of rows updated.
+        """
+        model_cls = self.instrument.model_cls
+        score_field = self.instrument.score_field
+        total, updated = 0, 0
+        for rows in self.chunks():
+            changed = self.rescore_rows(rows)
+            model_cls.objects.bulk_update(
+                [model_cls(id=pk, **{score_field: score}) for pk, score in changed],
+                [score_field], batch_size=1000)
+            total += len(rows)
+            updated += len(changed)
+            if self.stdout:
+                self.stdout.write(
+                    f'{self.instrument.name}: {total} rows read, {updated} updated',
+                    ending='\r')
+        return total, updated
@@ -0,0 +1,183 @@
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pytz
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+
+
+AppointmentWindow = namedtuple(
+    'AppointmentWindow',
+    ['earliest', 'ideal', 'latest', 'first_working_day', 'last_working_day'])
+
+
+def as_date(day):
+    return day.date() if isinstance(day, datetime) else day
+
+
+class BusinessCalendar:
+    """Working days of the 5-day clinic, Monday to Friday less the holidays
+    of `settings.COUNTRY` in the edc_facility Holiday table (imported from
+    `settings.HOLIDAY_FILE`).
+
+    Holidays are loaded once per process into a set of date ordinals, for
+    O(1) single day checks, and a NumPy business day calendar for the bulk
+    and counting functions. The calendar reloads after a Holiday is saved or
+    deleted in this process, and every `FLOURISH_CHILD_HOLIDAY_RELOAD_SECONDS`
+    to pick up changes made by other processes or bulk imports. Within a
+    `pinned` block, e.g. a booking run, the calendar is not checked for reload.
+    """
+
+    holiday_model = 'edc_facility.holiday'
+    weekmask = '1111100'
+    timezone = 'Africa/Gaborone'
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.loaded = None
+        self.holiday_ordinals = frozenset()
+        self.busdaycal = None
+
+    @property
+    def holiday_model_cls(self):
+        return django_apps.get_model(self.holiday_model)
+
+    @property
+    def reload_seconds(self):
+        return getattr(settings, 'FLOURISH_CHILD_HOLIDAY_RELOAD_SECONDS', 600)
+
+    def load(self):
+        holidays = sorted(set(self.holiday_model_cls.objects.filter(
+            country=settings.COUNTRY).values_list('local_date', flat=True)))
+        self.holiday_ordinals = frozenset(day.toordinal() for day in holidays)
+        self.busdaycal = np.busdaycalendar(
+            weekmask=self.weekmask, holidays=np.array(holidays, dtype='datetime64[D]'))
+        self.loaded = time.monotonic()
+
+    def invalidate(self, *args, **kwargs):
+        self.loaded = None
+
+    def ensure_loaded(self):
+        if self.loaded is not None and getattr(self.local, 'pinned', 0):
+            return
+        if self.loaded is None or time.monotonic() - self.loaded >= self.reload_seconds:
+            with self.lock:
+                if (self.loaded is None
+                        or time.monotonic() - self.loaded >= self.reload_seconds):
+                    self.load()
+
+    @contextmanager
+    def pinned(self):
+        """ Loads the calendar if due, and keeps it for the block instead of
+            checking for a reload on every call.
+        """
+        self.ensure_loaded()
+        depth = getattr(self.local, 'pinned', 0)
+        self.local.pinned = depth + 1
+        try:
+            yield self
+        finally:
+            self.local.pinned = depth
+
+    @property
+    def calendar(self):
+        self.ensure_loaded()
+        return self.busdaycal
+
+    def is_working_day(self, day):
+        """ Returns True if the date or datetime is not on a weekend or holiday.
+        """
+        self.ensure_loaded()
+        day = as_date(day)
+        return day.weekday() < 5 and day.toordinal() not in self.holiday_ordinals
+
+    def roll_forward(self, day):
+        """ Returns the first working day on or after `day`, keeping the time of
+            a datetime.
+        """
+        return self.shift(day, np.busday_offset(
+            as_date(day), 0, roll='forward', busdaycal=self.calendar))
+
+    def roll_backward(self, day):
+        """ Returns the last working day on or before `day`, keeping the time
+            of a datetime.
+        """
+        return self.shift(day, np.busday_offset(
+            as_date(day), 0, roll='backward', busdaycal=self.calendar))
+
+    def next_working_day(self, day):
+        """ Returns the first working day after `day`, keeping the time of a
+            datetime.
+        """
+        return self.next_working_days(day, 1)[0]
+
+    def next_working_days(self, day, n):
+        """ Returns the `n` working days after `day`.
+        """
+        offsets = np.busday_offset(
+            as_date(day), np.arange(1, n + 1), roll='backward', busdaycal=self.calendar)
+        return [self.shift(day, offset) for offset in offsets]
+
+    def working_days_between(self, start, end):
+        """ Returns the number of working days from `start` up to, not
+            including, `end`.
+        """
+        return int(np.busday_count(as_date(start), as_date(end), busdaycal=self.calendar))
+
+    def appointment_window(self, appointment):
+        """ Returns the earliest, ideal and latest datetimes of the
+            appointment's visit window in the clinic's time zone, with the
+            first and last working days within it.
+        """
+        visit = appointment.visits.get(appointment.visit_code)
+        tz = pytz.timezone(self.timezone)
+        earliest = (appointment.timepoint_datetime - visit.rlower).astimezone(tz)
+        latest = (appointment.timepoint_datetime + visit.rupper).astimezone(tz)
+        return AppointmentWindow(
+            earliest=earliest,
+            ideal=appointment.timepoint_datetime.astimezone(tz),
+            latest=latest,
+            first_working_day=as_date(self.roll_forward(earliest)),
+            last_working_day=as_date(self.roll_backward(latest)))
+
+    def shift(self, day, working_day):
+        working_day = working_day.astype(date)
+        return day + timedelta(days=(working_day - as_date(day)).days)
+
+    def to_array(self, days):
+        return np.array([as_date(day) for day in days], dtype='datetime64[D]')
+
+    def are_working_days(self, days):
+        """ Bulk `is_working_day`, returns a boolean array.
+        """
+        return np.is_busday(self.to_array(days), busdaycal=self.calendar)
+
+    def roll_forward_many(self, days):
+        """ Bulk `roll_forward`, returns an array of dates.
+        """
+        return np.busday_offset(
+            self.to_array(days), 0, roll='forward', busdaycal=self.calendar)
+
+    def working_days_between_many(self, starts, ends):
+        """ Bulk `working_days_between`, returns an array of counts.
+        """
+        return np.busday_count(
+            self.to_array(starts), self.to_array(ends), busdaycal=self.calendar)
+
+    def connect(self):
+        """Reloads the calendar when a Holiday changes, called at app ready.
+        """
+        for signal_name, signal in (('post_save', post_save),
+                                    ('post_delete', post_delete)):
+            signal.connect(
+                self.invalidate, sender=self.holiday_model, weak=False,
+                dispatch_uid=f'business_calendar_{signal_name}_holiday')
+
+
+business_calendar = BusinessCalendar()
@@ -0,0 +1,322 @@
+import csv
+import time
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.apps import apps as django_apps
+from django.contrib.sites.models import Site
+from django.db import models, transaction
+from django.utils.dateparse import parse_date
+from django.utils.functional import cached_property
+from edc_base.utils import get_utcnow
+
+DATE_FORMATS = ('%d/%m/%Y', '%d-%m-%Y', '%Y/%m/%d', '%d %b %Y', '%d-%b-%Y')
+
+TRUE_VALUES = {'1', 'true', 't', 'yes', 'y'}
+
+FALSE_VALUES = {'0', 'false', 'f', 'no', 'n'}
+
+AUDIT_FIELDS = ('id', 'created', 'modified', 'user_created', 'user_modified',
+                'hostname_created', 'hostname_modified', 'revision',
+                'device_created', 'device_modified', 'site')
+
+
+class ImportResult:
+
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.errors = 0
+        self.seconds = 0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0
+
+    def __str__(self):
+        return (f'{self.rows} rows, {self.created} created, {self.updated} updated, '
+                f'{self.unchanged} unchanged, {self.errors} errors, in '
+                f'{self.seconds:.1f}s ({self.rows_per_second:.0f} rows/s)')
+
+
+def is_blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def text_converter(field):
+    max_length = field.max_length if isinstance(
+        field, (models.CharField, models.TextField)) else None
+
+    def convert(value):
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        value = str(value).strip()
+        if max_length and len(value) > max_length:
+            raise ValueError(f'longer than {max_length} characters')
+        return value
+    return convert
+
+
+def integer_converter(field):
+    def convert(value):
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+        try:
+            number = Decimal(str(value).strip())
+        except InvalidOperation:
+            raise ValueError(f'{value!r} is not a whole number')
+        if number != number.to_integral_value():
+            raise ValueError(f'{value!r} is not a whole number')
+        return int(number)
+    return convert
+
+
+def decimal_converter(field):
+    exponent = Decimal(1).scaleb(-field.decimal_places)
+    max_value = Decimal(10) ** (field.max_digits - field.decimal_places)
+
+    def convert(value):
+        try:
+            number = Decimal(str(value).strip()).quantize(exponent)
+        except InvalidOperation:
+            raise ValueError(f'{value!r} is not a number')
+        if abs(number) >= max_value:
+            raise ValueError(f'{value!r} has more than {field.max_digits} digits')
+        return number
+    return convert
+
+
+def date_converter(field):
+    def convert(value):
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        # drop a midnight time from dates exported as datetimes
+        value = str(value).strip()
+        if ':' in value:
+            value = value.split(' ')[0]
+        try:
+            parsed = parse_date(value)
+        except ValueError:
+            parsed = None
+        if parsed:
+            return parsed
+        for date_format in DATE_FORMATS:
+            try:
+                return datetime.strptime(value, date_format).date()
+            except ValueError:
+                continue
+        raise ValueError(f'{value!r} is not a date')
+    return convert
+
+
+def boolean_converter(field):
+    def convert(value):
+        if isinstance(value, bool):
+            return value
+        text = str(value).strip().lower()
+        if text in TRUE_VALUES:
+            return True
+        if text in FALSE_VALUES:
+            return False
+        raise ValueError(f'{value!r} is not a yes/no value')
+    return convert
+
+
+def field_converter(field):
+    """ Returns a function converting a raw cell to the field's python value,
+        raising ValueError with a short message if it is not valid.
+    """
+    if isinstance(field, models.BooleanField):
+        convert = boolean_converter(field)
+    elif isinstance(field, models.IntegerField):
+        convert = integer_converter(field)
+    elif isinstance(field, models.DecimalField):
+        convert = decimal_converter(field)
+    elif isinstance(field, models.DateTimeField):
+        convert = field.to_python
+    elif isinstance(field, models.DateField):
+        convert = date_converter(field)
+    else:
+        # char, text and the encrypted name fields
+        convert = text_converter(field)
+
+    choices = {str(choice) for choice, _ in field.flatchoices} or None
+    if field.null:
+        blank = None
+    elif field.has_default():
+        blank = field.get_default()
+    elif field.blank:
+        blank = ''
+    else:
+        blank = ValueError('is required')
+
+    def convert_value(value):
+        if is_blank(value):
+            if isinstance(blank, ValueError):
+                raise blank
+            return blank
+        value = convert(value)
+        if choices and str(value) not in choices:
+            raise ValueError(f'{value!r} is not a valid choice')
+        return value
+    return convert_value
+
+
+class ChildDatasetImporter:
+    """Imports ChildDataset rows from a csv or xlsx file.
+
+    Rows are streamed and written in chunks of `chunk_size`. Each column is
+    converted with a converter built once from the model field it maps to, the
+    study child identifiers already captured are read in one query, new rows
+    are written with `bulk_create` and changed rows with `bulk_update`. Rows
+    that do not convert are skipped and written to `error_file`.
+    """
+
+    dataset_model = 'flourish_child.childdataset'
+    key_field = 'study_child_identifier'
+    # allocated on enrolment, not part of the dataset files
+    optional_fields = ('subject_identifier', )
+
+    def __init__(self, chunk_size=1000, error_file=None, update=True):
+        self.chunk_size = chunk_size
+        self.update = update
+        self.error_writer = None
+        if error_file is not None:
+            self.error_writer = csv.writer(error_file)
+            self.error_writer.writerow(['row', self.key_field, 'errors'])
+
+    @property
+    def dataset_model_cls(self):
+        return django_apps.get_model(self.dataset_model)
+
+    @cached_property
+    def fields(self):
+        return {field.name: field
+                for field in self.dataset_model_cls._meta.concrete_fields
+                if field.name not in AUDIT_FIELDS}
+
+    @cached_property
+    def site(self):
+        return Site.objects.get_current()
+
+    def read_rows(self, path, sheet=None):
+        """ Yields the header and then each row of a csv or xlsx file.
+        """
+        if str(path).lower().endswith(('.xlsx', '.xlsm')):
+            from openpyxl import load_workbook
+            workbook = load_workbook(path, read_only=True, data_only=True)
+            try:
+                worksheet = workbook[sheet] if sheet else workbook.active
+                yield from worksheet.iter_rows(values_only=True)
+            finally:
+                workbook.close()
+        else:
+            with open(path, newline='', encoding='utf-8-sig') as csv_file:
+                yield from csv.reader(csv_file)
+
+    def columns(self, header):
+        """ Returns (index, field name, converter) for each header column that
+            names a dataset field, raising ValueError if a required field or
+            the key field is missing.
+        """
+        names = [str(name or '').strip().lower() for name in header]
+        columns = [(index, name, field_converter(self.fields[name]))
+                   for index, name in enumerate(names) if name in self.fields]
+        missing = [name for name, field in self.fields.items()
+                   if name not in names and name not in self.optional_fields
+                   and (name == self.key_field or not (
+                       field.null or field.blank or field.has_default()))]
+        if missing:
+            raise ValueError(f'Missing required columns: {", ".join(missing)}.')
+        return columns
+
+    def convert_row(self, columns, row):
+        values, errors = {}, []
+        for index, name, convert in columns:
+            try:
+                values[name] = convert(row[index] if index < len(row) else None)
+            except ValueError as e:
+                errors.append(f'{name}: {e}')
+        return values, errors
+
+    def write_error(self, row_number, key, errors):
+        self.result.errors += 1
+        if self.error_writer is not None:
+            self.error_writer.writerow([row_number, key or '', '; '.join(errors)])
+
+    def import_file(self, path, sheet=None, progress=None):
+        """ Imports the file and returns an ImportResult.
+            @param progress: optional callable taking the result after each chunk.
+        """
+        self.result = ImportResult()
+        start = time.perf_counter()
+        rows = self.read_rows(path, sheet=sheet)
+        columns = self.columns(next(rows, None) or [])
+        self.existing = set(self.dataset_model_cls.objects.values_list(
+            self.key_field, flat=True))
+        self.seen = set()
+        numbered_rows = enumerate(rows, start=2)
+        while True:
+            chunk = list(islice(numbered_rows, self.chunk_size))
+            if not chunk:
+                break
+            self.import_chunk(columns, chunk)
+            self.result.seconds = time.perf_counter() - start
+            if progress:
+                progress(self.result)
+        self.result.seconds = time.perf_counter() - start
+        return self.result
+
+    def import_chunk(self, columns, chunk):
+        new, changed = [], {}
+        for row_number, row in chunk:
+            if all(is_blank(value) for value in row):
+                continue
+            self.result.rows += 1
+            values, errors = self.convert_row(columns, row)
+            key = values.get(self.key_field)
+            if key in self.seen:
+                errors.append(f'{self.key_field}: {key} is repeated in the file')
+            if errors:
+                self.write_error(row_number, key, errors)
+                continue
+            self.seen.add(key)
+            if key not in self.existing:
+                new.append(self.dataset_model_cls(site=self.site, **values))
+            elif self.update:
+                changed[key] = values
+            else:
+                self.result.unchanged += 1
+
+        with transaction.atomic():
+            if new:
+                self.dataset_model_cls.objects.bulk_create(new)
+                self.existing.update(getattr(obj, self.key_field) for obj in new)
+                self.result.created += len(new)
+            if changed:
+                self.update_changed(changed)
+
+    def update_changed(self, changed):
+        updated, update_fields = [], set()
+        modified = get_utcnow()
+        for obj in self.dataset_model_cls.objects.filter(
+                **{f'{self.key_field}__in': changed}):
+            fields = [name for name, value in changed[getattr(obj, self.key_field)].items()
+                      if getattr(obj, name) != value]
+            if not fields:
+                self.result.unchanged += 1
+                continue
+            for name in fields:
+                setattr(obj, name, changed[getattr(obj, self.key_field)][name])
+            obj.modified = modified
+            update_fields.update(fields)
+            updated.append(obj)
+        if updated:
+            self.dataset_model_cls.objects.bulk_update(
+                updated, fields=sorted(update_fields) + ['modified'])
+            self.result.updated += len(updated)
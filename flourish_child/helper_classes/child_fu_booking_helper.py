@@ -1,15 +1,23 @@
+from collections import Counter
 from django.apps import apps as django_apps
+from django.db import transaction
+from django.db.models import Q
 from datetime import date
 from dateutil.relativedelta import relativedelta
 from edc_base.utils import age
 
+from .business_calendar import business_calendar
+
 
 class ChildFollowUpBookingHelper(object):
     """Class that creates a follow up booking for participant on the calendar
     """
 
-    def __init__(self, subject_identifier=None, ):
+    cutoff_date = date(2025, 4, 30)
+
+    def __init__(self, subject_identifier=None, cutoff_date=None):
         self.subject_identifier = subject_identifier
+        self.cutoff_date = cutoff_date or self.cutoff_date
         self.participant_note_cls = django_apps.get_model('flourish_calendar.participantnote')
 
     def schedule_fu_booking(self, subject_identifier, booking_dt=None):
@@ -20,17 +28,24 @@ class ChildFollowUpBookingHelper(object):
             @param subject_identifier: Participant identifier
             @param booking_dt: Date to schedule participant against
         """
+        engine = FollowUpBookingEngine(cutoff_date=self.cutoff_date)
+        engine.book([(subject_identifier, booking_dt)])
+
+    def plan_fu_booking(self, subject_identifier, booking_dt):
+        """ Places participant on the first available date from `booking_dt`,
+            bumping a lower priority participant to the following days if the
+            date is full.
+        """
         # Check participant is not already scheduled for FU
         if self.is_scheduled(subject_identifier):
             return
-        cutoff_date = date(2025, 4, 30)
 
-        while booking_dt.date() < cutoff_date:
+        while booking_dt.date() < self.cutoff_date:
             # Check booking date does not fall on holiday or weekend before scheduling.
-            # If falls on weekend push date to next day.
+            # If it does push date to the next working day.
             is_holiday_or_weekend = self.check_date(booking_dt)
             if is_holiday_or_weekend:
-                booking_dt = booking_dt + relativedelta(days=1)
+                booking_dt = business_calendar.roll_forward(booking_dt)
                 continue
 
             slots_available, scheduled_sidx = self.check_availability(booking_dt, max_possible=3)
@@ -60,22 +75,15 @@ class ChildFollowUpBookingHelper(object):
                     # Assign the subject_identifier to participant to be rescheduled
                     # for the next day of week.
                     subject_identifier = reschedule
-                # Update booking date, to next day of week
-                booking_dt = booking_dt + relativedelta(days=1)
+                # Update booking date, to next working day
+                booking_dt = business_calendar.next_working_day(booking_dt)
 
     def check_date(self, booking_date):
         """ Check if booking date falls within a holiday or weekend
             @param booking_date: Date to schedule
             @return: True if holiday or weekend else False
         """
-        facility_app_config = django_apps.get_app_config('edc_facility')
-
-        facility = facility_app_config.get_facility('5-day clinic')
-
-        is_holiday = facility.holidays.holidays.filter(local_date=booking_date.date())
-        is_weekend = booking_date.weekday() >= 5
-
-        return is_holiday or is_weekend
+        return not business_calendar.is_working_day(booking_date)
 
     def check_availability(self, booking_date, max_possible):
         """ Confirm date to be booked does not have the max possible participant booked
@@ -142,8 +150,133 @@ class ChildFollowUpBookingHelper(object):
         child_consent_cls = django_apps.get_model('flourish_caregiver.caregiverchildconsent')
         consents = child_consent_cls.objects.filter(
             subject_identifier=subject_identifier).only(
-                'subject_identifier', 'cohort', 'child_dob')
+                'subject_identifier', 'cohort', 'child_dob', 'preg_enroll')
         return consents[0]
 
     def age_in_years(self, age_rdelta):
         return (age_rdelta.years + age_rdelta.months/12)
+
+
+class FollowUpBookingEngine(ChildFollowUpBookingHelper):
+    """Books participants against an in memory copy of the follow up calendar.
+
+    The booking horizon ('Follow Up Schedule' notes per date and the
+    child consents of everyone booked) and the business calendar are loaded
+    once per run, placements and priority bumps are planned in memory, and
+    the resulting note inserts and deletes are written in one transaction.
+    """
+
+    note_title = 'Follow Up Schedule'
+
+    def __init__(self, subject_identifier=None, cutoff_date=None):
+        super().__init__(subject_identifier=subject_identifier,
+                         cutoff_date=cutoff_date)
+        self.bookings = {}
+        self.note_counts = Counter()
+        self.child_data = {}
+        self.original_bookings = set()
+        self.created_bookings = []
+
+    def book(self, bookings, replan=False):
+        """ Plan and save follow up bookings for many participants in one run.
+            @param bookings: (subject_identifier, booking_dt) pairs, in booking order
+            @param replan: if True, remove participant's existing bookings in the
+                horizon and book them again.
+        """
+        bookings = list(bookings)
+        if not bookings:
+            return
+        subject_identifiers = [subject_identifier for subject_identifier, _ in bookings]
+        with business_calendar.pinned():
+            self.load(horizon_start=min(booking_dt.date() for _, booking_dt in bookings),
+                      subject_identifiers=subject_identifiers)
+            if replan:
+                for booking_date, booked_sidx in self.bookings.items():
+                    for subject_identifier in set(subject_identifiers) & set(booked_sidx):
+                        self.remove_booking(subject_identifier, booking_date)
+            for subject_identifier, booking_dt in bookings:
+                self.plan_fu_booking(subject_identifier, booking_dt)
+            self.save_bookings()
+
+    def load(self, horizon_start, subject_identifiers=None):
+        """ Loads the notes booked from `horizon_start` up to the cutoff date,
+            and all the notes of the participants to book, for `is_scheduled`.
+        """
+        fu_notes = self.participant_note_cls.objects.filter(
+            Q(subject_identifier__in=subject_identifiers or [])
+            | Q(date__gte=horizon_start, date__lt=self.cutoff_date),
+            title=self.note_title).values_list('subject_identifier', 'date')
+        for subject_identifier, note_date in fu_notes:
+            self.note_counts[subject_identifier] += 1
+            if note_date and horizon_start <= note_date < self.cutoff_date:
+                self.bookings.setdefault(note_date, []).append(subject_identifier)
+                self.original_bookings.add((subject_identifier, note_date))
+
+        child_sidx = set(subject_identifiers or [])
+        for booked_sidx in self.bookings.values():
+            child_sidx.update(booked_sidx)
+        child_consent_cls = django_apps.get_model('flourish_caregiver.caregiverchildconsent')
+        for child_consent in child_consent_cls.objects.filter(
+                subject_identifier__in=child_sidx).only(
+                    'subject_identifier', 'cohort', 'child_dob', 'preg_enroll'):
+            self.child_data.setdefault(child_consent.subject_identifier, child_consent)
+
+    def booking_date(self, booking_date):
+        return booking_date.date() if hasattr(booking_date, 'date') else booking_date
+
+    def check_availability(self, booking_date, max_possible):
+        booked_sidx = self.bookings.get(booking_date.date(), [])
+        return max_possible > len(booked_sidx), list(booked_sidx)
+
+    def is_scheduled(self, subject_identifier):
+        return self.note_counts[subject_identifier] > 0
+
+    def create_booking(self, subject_identifier, booking_date):
+        booking_date = self.booking_date(booking_date)
+        self.bookings.setdefault(booking_date, []).append(subject_identifier)
+        self.note_counts[subject_identifier] += 1
+        self.created_bookings.append((subject_identifier, booking_date))
+
+    def remove_booking(self, subject_identifier, booking_date):
+        booked_sidx = self.bookings.get(self.booking_date(booking_date), [])
+        if subject_identifier in booked_sidx:
+            booked_sidx.remove(subject_identifier)
+            self.note_counts[subject_identifier] -= 1
+
+    def get_child_data(self, subject_identifier):
+        try:
+            return self.child_data[subject_identifier]
+        except KeyError:
+            child_consent = super().get_child_data(subject_identifier)
+            self.child_data[subject_identifier] = child_consent
+            return child_consent
+
+    def save_bookings(self):
+        """ Write the difference between the loaded and planned calendar in one
+            transaction.
+        """
+        planned = {(subject_identifier, booking_date)
+                   for booking_date, booked_sidx in self.bookings.items()
+                   for subject_identifier in booked_sidx}
+        removed = self.original_bookings - planned
+        created = []
+        for booking in self.created_bookings:
+            if (booking in planned and booking not in self.original_bookings
+                    and booking not in created):
+                created.append(booking)
+
+        with transaction.atomic():
+            if removed:
+                removed_q = Q()
+                for subject_identifier, booking_date in removed:
+                    removed_q |= Q(subject_identifier=subject_identifier,
+                                   date=booking_date)
+                self.participant_note_cls.objects.filter(
+                    removed_q, title=self.note_title).delete()
+            for subject_identifier, booking_date in created:
+                self.participant_note_cls.objects.create(
+                    subject_identifier=subject_identifier,
+                    title=self.note_title,
+                    date=booking_date)
+        self.original_bookings = planned
+        self.created_bookings = []
@@ -1,5 +1,6 @@
 from dateutil.relativedelta import relativedelta
 from django.apps import apps as django_apps
+from django.db import transaction
 from edc_base.utils import get_utcnow, age
 from edc_visit_schedule.site_visit_schedules import site_visit_schedules
 
@@ -110,6 +111,16 @@ class ChildOnScheduleHelper(object):
         else:
             offschedule_obj.save()
 
+    def put_children_offschedule(self, subject_identifiers, schedule_name):
+        """ Take many children off `schedule_name` in one transaction, each
+            off schedule save is a single indexed schedule lookup.
+        """
+        with transaction.atomic():
+            for subject_identifier in subject_identifiers:
+                ChildOnScheduleHelper(
+                    subject_identifier=subject_identifier).put_child_offschedule(
+                        schedule_name)
+
     def aging_out(self, subject_identifier):
         """ Check if child is aging out before the year mark for follow-up
             booking arrives.
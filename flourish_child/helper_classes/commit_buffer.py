@@ -0,0 +1,94 @@
+import threading
+import weakref
+from abc import ABC, abstractmethod
+
+from django.conf import settings
+from django.db import connection, transaction
+
+
+class CommitBatch:
+    """The items queued in one savepoint, registered as its commit hook.
+    """
+
+    def __init__(self, buffer, savepoint_ids):
+        self.buffer = buffer
+        self.savepoint_ids = savepoint_ids
+        self.items = []
+
+    def __call__(self):
+        self.buffer.flush(self)
+
+
+class CommitBuffer(ABC):
+    """Collects items added during a transaction and resolves them in one
+    `resolve` call once it commits. Items are dropped with the transaction if
+    it rolls back.
+
+    Items are queued per savepoint, each batch registered as its own commit
+    hook, so the items added in a savepoint that rolls back are dropped with
+    it. The batches of the current thread are held by savepoint ids in a weak
+    mapping, a batch only lives as long as its commit hook.
+
+    Items added outside a transaction, or with the `defer_setting` setting off
+    (e.g. in tests), are resolved immediately. Without a `defer_setting` items
+    are always deferred.
+    """
+
+    defer_setting = None
+
+    def __init__(self):
+        self.local = threading.local()
+
+    @property
+    def deferred(self):
+        if self.defer_setting is None:
+            return True
+        return getattr(settings, self.defer_setting, True)
+
+    @property
+    def batches(self):
+        """ Returns the batches of this thread queued and not rolled back,
+            by savepoint ids.
+        """
+        try:
+            return self.local.batches
+        except AttributeError:
+            self.local.batches = weakref.WeakValueDictionary()
+            return self.local.batches
+
+    def add_item(self, item):
+        if not self.deferred or not connection.in_atomic_block:
+            self.resolve([item])
+            return
+        savepoint_ids = tuple(connection.savepoint_ids)
+        batch = self.batches.get(savepoint_ids)
+        if batch is None:
+            batch = self.batches[savepoint_ids] = CommitBatch(self, savepoint_ids)
+            transaction.on_commit(batch)
+        batch.items.append(item)
+
+    def pending_items(self):
+        """ Returns the items queued in the current savepoint, or None if
+            there are none.
+        """
+        batch = self.batches.get(tuple(connection.savepoint_ids))
+        return batch.items if batch is not None else None
+
+    def flush(self, batch=None):
+        """ Resolves a batch, called on commit, or every pending batch if
+            `batch` is None.
+        """
+        batches = [batch] if batch is not None else list(self.batches.values())
+        for batch in batches:
+            # items added while resolving go to a new batch
+            if self.batches.get(batch.savepoint_ids) is batch:
+                del self.batches[batch.savepoint_ids]
+            items = list(batch.items)
+            batch.items.clear()
+            if items:
+                self.resolve(items)
+
+    @abstractmethod
+    def resolve(self, items):
+        """ Resolves the items queued in a batch, in the order they were added.
+        """
@@ -0,0 +1,207 @@
+from bisect import bisect_right
+
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.models.signals import post_delete, post_save
+
+from .commit_buffer import CommitBuffer
+from .utils import child_utils
+
+
+class ConsentChanges(CommitBuffer):
+    """The subjects whose child consents changed in the current transaction,
+    their cached versions dropped again once it commits.
+    """
+
+    def __init__(self, service):
+        super().__init__()
+        self.service = service
+
+    def subject_identifiers(self):
+        return {subject_identifier for batch in self.batches.values()
+                for subject_identifier in batch.items}
+
+    def resolve(self, subject_identifiers):
+        self.service.invalidate(set(subject_identifiers))
+
+
+class ConsentVersionService:
+    """Resolves the consent version of a child as of a datetime, from a per
+    subject timeline of (consent_datetime, version) sorted by consent datetime.
+
+    Timelines are held in the `FLOURISH_CHILD_CONSENT_VERSION_CACHE` cache,
+    shared across requests, and dropped whenever a child consent is saved or
+    deleted and again once that transaction commits. Timelines of subjects
+    with uncommitted consent changes are not cached. Versions resolved through
+    the caregiver screening are cached under a generation number bumped when a
+    screening or consent version row changes.
+    """
+
+    child_consent_model = 'flourish_child.childdummysubjectconsent'
+    consent_version_model = 'flourish_caregiver.flourishconsentversion'
+    screening_models = ['flourish_caregiver.screeningpregwomen',
+                        'flourish_caregiver.screeningpriorbhpparticipants']
+
+    key_prefix = 'flourish_child_consent_version'
+    bulk_batch_size = 500
+
+    def __init__(self):
+        self.changes = ConsentChanges(self)
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'FLOURISH_CHILD_CONSENT_VERSION_CACHE', 'default')]
+
+    @property
+    def child_consent_cls(self):
+        return django_apps.get_model(self.child_consent_model)
+
+    @property
+    def consent_version_cls(self):
+        return django_apps.get_model(self.consent_version_model)
+
+    def timeline_key(self, subject_identifier):
+        return f'{self.key_prefix}:timeline:{subject_identifier}'
+
+    @property
+    def screening_generation(self):
+        return self.cache.get_or_set(f'{self.key_prefix}:screening_generation', 1, None)
+
+    def screening_key(self, subject_identifier):
+        return (f'{self.key_prefix}:screening:{self.screening_generation}:'
+                f'{subject_identifier}')
+
+    def load_timelines(self, subject_identifiers):
+        timelines = {subject_identifier: [] for subject_identifier in subject_identifiers}
+        consents = self.child_consent_cls.objects.filter(
+            subject_identifier__in=subject_identifiers).order_by(
+                'consent_datetime').values_list(
+                    'subject_identifier', 'consent_datetime', 'version')
+        for subject_identifier, consent_datetime, version in consents:
+            timelines[subject_identifier].append((consent_datetime, version))
+        return timelines
+
+    def timeline(self, subject_identifier):
+        return self.timelines([subject_identifier])[subject_identifier]
+
+    def timelines(self, subject_identifiers):
+        """ Returns the consent timelines of many subjects, reading the cache in
+            one call and loading the missing ones in batches.
+        """
+        subject_identifiers = list(dict.fromkeys(subject_identifiers))
+        keys = {self.timeline_key(idx): idx for idx in subject_identifiers}
+        cached = self.cache.get_many(list(keys))
+        timelines = {keys[key]: timeline for key, timeline in cached.items()}
+
+        missing = [idx for idx in subject_identifiers if idx not in timelines]
+        uncommitted = self.uncommitted()
+        for start in range(0, len(missing), self.bulk_batch_size):
+            loaded = self.load_timelines(missing[start:start + self.bulk_batch_size])
+            self.cache.set_many(
+                {self.timeline_key(idx): timeline for idx, timeline in loaded.items()
+                 if idx not in uncommitted},
+                None)
+            timelines.update(loaded)
+        return timelines
+
+    def resolve(self, timeline, as_of=None):
+        if not timeline:
+            return None
+        if as_of is None:
+            return timeline[-1][1]
+        position = bisect_right([consent_datetime for consent_datetime, _ in timeline],
+                                as_of)
+        return timeline[position - 1][1] if position else None
+
+    def version(self, subject_identifier, as_of=None):
+        """ Returns the child consent version of a subject as of a datetime,
+            or of the latest consent if `as_of` is None.
+            @param subject_identifier: child subject identifier
+            @param as_of: datetime to resolve the version at
+            @return: consent version or None if there is no consent.
+        """
+        return self.resolve(self.timeline(subject_identifier), as_of=as_of)
+
+    def versions(self, subject_identifiers, as_of=None):
+        """ Bulk version of `version`, e.g. for imports and backfills.
+        """
+        return {subject_identifier: self.resolve(timeline, as_of=as_of)
+                for subject_identifier, timeline in self.timelines(
+                    subject_identifiers).items()}
+
+    def screening_version(self, subject_identifier):
+        """ Returns the child version (or version) on the caregiver's consent
+            version form, found through the caregiver's screening.
+        """
+        key = self.screening_key(subject_identifier)
+        version = self.cache.get(key)
+        if version is None:
+            version = self.load_screening_version(subject_identifier)
+            if version is not None:
+                self.cache.set(key, version, None)
+        return version
+
+    def load_screening_version(self, subject_identifier):
+        screening_identifiers = []
+        preg_screening_obj = child_utils.preg_screening_model_obj(
+            subject_identifier=subject_identifier)
+        screening_identifiers.append(
+            getattr(preg_screening_obj, 'screening_identifier', None))
+        prior_screening_obj = child_utils.prior_screening_model_obj(
+            subject_identifier=subject_identifier)
+        screening_identifiers.append(
+            getattr(prior_screening_obj, 'screening_identifier', None))
+
+        if not all(idx is None for idx in screening_identifiers):
+            try:
+                consent_version_obj = self.consent_version_cls.objects.get(
+                    screening_identifier__in=screening_identifiers)
+            except self.consent_version_cls.DoesNotExist:
+                raise ValidationError(
+                    'Missing Consent Version form. Please complete '
+                    'it before proceeding.')
+
+            return consent_version_obj.child_version or consent_version_obj.version
+
+    def uncommitted(self):
+        """ Returns the subjects whose consents changed in the current
+            transaction, none once it commits or rolls back.
+        """
+        return self.changes.subject_identifiers()
+
+    def invalidate(self, subject_identifiers):
+        self.cache.delete_many(
+            [self.timeline_key(idx) for idx in subject_identifiers]
+            + [self.screening_key(idx) for idx in subject_identifiers])
+
+    def child_consent_changed(self, sender, instance, **kwargs):
+        subject_identifier = instance.subject_identifier
+        self.invalidate([subject_identifier])
+        if connection.in_atomic_block:
+            self.changes.add_item(subject_identifier)
+
+    def screening_changed(self, sender, instance, **kwargs):
+        key = f'{self.key_prefix}:screening_generation'
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            self.cache.set(key, 2, None)
+
+    def connect(self):
+        """Connects the cache write-through, called at app ready.
+        """
+        for signal_name, signal in (('post_save', post_save),
+                                    ('post_delete', post_delete)):
+            signal.connect(
+                self.child_consent_changed, sender=self.child_consent_model,
+                weak=False, dispatch_uid=f'consent_version_{signal_name}_child_consent')
+            for model in [self.consent_version_model] + self.screening_models:
+                signal.connect(
+                    self.screening_changed, sender=model, weak=False,
+                    dispatch_uid=f'consent_version_{signal_name}_{model}')
+
+
+consent_versions = ConsentVersionService()
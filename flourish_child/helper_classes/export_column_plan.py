@@ -0,0 +1,187 @@
+from django.db.models import (FileField, ForeignKey, ImageField, ManyToManyField,
+                              ManyToOneRel, OneToOneField, Prefetch)
+from django.db.models.fields.reverse_related import OneToOneRel
+
+
+def file_extractor(field):
+    name = field.name
+
+    def extract(obj, data, m2m_encoder):
+        data.append(getattr(getattr(obj, name, ''), 'name', ''))
+    return extract
+
+
+def m2m_extractor(field):
+
+    def extract(obj, data, m2m_encoder):
+        data.extend(m2m_encoder.encode(obj, m2m_field=field))
+    return extract
+
+
+def fk_extractor(field):
+    attname = field.attname
+
+    def extract(obj, data, m2m_encoder):
+        data.append(getattr(obj, attname))
+    return extract
+
+
+def inline_extractor(field):
+
+    def extract(obj, data, m2m_encoder):
+        # Inline values are expanded into rows of their own.
+        data.append('')
+    return extract
+
+
+def scalar_extractor(field):
+    name = field.name
+
+    def extract(obj, data, m2m_encoder):
+        data.append(getattr(obj, name, ''))
+    return extract
+
+
+class InlineColumnPlan:
+    """Column extractors of an inline model, in `_meta.get_fields()` order,
+    limited to the inline columns of the export header.
+    """
+
+    def __init__(self, model_cls=None, inline_field_names=None):
+        self.model_cls = model_cls
+        self.extractors = []
+        for field in model_cls._meta.get_fields():
+            if isinstance(field, (FileField, ImageField,)):
+                if field.name in inline_field_names:
+                    self.extractors.append(file_extractor(field))
+            elif field.name in inline_field_names:
+                self.extractors.append(scalar_extractor(field))
+            elif isinstance(field, ManyToManyField):
+                self.extractors.append(m2m_extractor(field))
+
+    def values(self, inline_obj, m2m_encoder):
+        data = []
+        for extract in self.extractors:
+            extract(inline_obj, data, m2m_encoder)
+        return data
+
+
+class ExportColumnPlan:
+    """The compiled export columns of a model: the ordered fields, the header
+    names after renames, and one extractor per column, so the row loop does no
+    field type checks.
+
+    Plans are built once per model class and process through `for_model`.
+    """
+
+    replace_idx = {'subject_identifier': 'childpid',
+                   'study_maternal_identifier': 'old_matpid',
+                   'study_child_identifier': 'old_childpid'}
+
+    plans = {}
+
+    def __init__(self, model_cls=None, exclude_fields=None):
+        self.model_cls = model_cls
+        self.exclude_fields = frozenset(exclude_fields or [])
+
+        self.fields = [
+            field for field in model_cls._meta.get_fields()
+            if field.name not in self.exclude_fields
+            and not isinstance(field, OneToOneRel)]
+        self.extractors = [self.extractor(field) for field in self.fields]
+        self.inline_relations = [
+            field for field in self.fields if isinstance(field, ManyToOneRel)]
+
+        self.header_columns = [
+            field if isinstance(field, ManyToManyField) else field.name
+            for field in self.fields]
+        self.column_positions = {}
+        for position, column in enumerate(self.header_columns):
+            if isinstance(column, str):
+                self.column_positions.setdefault(column, position)
+        for old_idx, new_idx in self.replace_idx.items():
+            position = self.column_positions.pop(old_idx, None)
+            if position is not None:
+                self.header_columns[position] = new_idx
+                self.column_positions.setdefault(new_idx, position)
+
+        self.inline_header_columns = []
+        for relation in self.inline_relations:
+            for field in relation.related_model._meta.get_fields():
+                if isinstance(field, ManyToManyField):
+                    self.inline_header_columns.append(field)
+                elif (not isinstance(field, (ForeignKey, OneToOneField,))
+                        and field.name not in self.exclude_fields):
+                    self.inline_header_columns.append(field.name)
+        inline_field_names = frozenset(
+            column for column in self.inline_header_columns
+            if isinstance(column, str))
+        self.inline_plans = {
+            relation: InlineColumnPlan(
+                model_cls=relation.related_model,
+                inline_field_names=inline_field_names)
+            for relation in self.inline_relations}
+
+    @classmethod
+    def for_model(cls, model_cls, exclude_fields=None):
+        key = (model_cls, frozenset(exclude_fields or []))
+        try:
+            return cls.plans[key]
+        except KeyError:
+            plan = cls.plans[key] = cls(
+                model_cls=model_cls, exclude_fields=exclude_fields)
+            return plan
+
+    def extractor(self, field):
+        if isinstance(field, (FileField, ImageField,)):
+            return file_extractor(field)
+        if isinstance(field, ManyToManyField):
+            return m2m_extractor(field)
+        if isinstance(field, (ForeignKey, OneToOneField)):
+            return fk_extractor(field)
+        if isinstance(field, ManyToOneRel):
+            return inline_extractor(field)
+        return scalar_extractor(field)
+
+    def expand(self, columns, m2m_list_data):
+        """Returns the column names with each m2m field expanded into its list
+        model choices.
+        """
+        names = []
+        for column in columns:
+            if isinstance(column, ManyToManyField):
+                names.extend(m2m_list_data(column.related_model))
+            else:
+                names.append(column)
+        return names
+
+    def header(self, m2m_list_data):
+        return self.expand(self.header_columns, m2m_list_data)
+
+    def inline_header(self, m2m_list_data):
+        return self.expand(self.inline_header_columns, m2m_list_data)
+
+    def values(self, obj, data, m2m_encoder):
+        """Appends the model columns of `obj` to `data`.
+        """
+        for extract in self.extractors:
+            extract(obj, data, m2m_encoder)
+        return data
+
+    @property
+    def inline_prefetches(self):
+        """Returns the prefetch lookups loading every inline relation of a
+        batch of objects with one query per relation.
+        """
+        return [
+            Prefetch(relation.get_accessor_name(),
+                     queryset=relation.related_model.objects.all())
+            for relation in self.inline_relations]
+
+    def inline_rows(self, obj, m2m_encoder):
+        """Yields the inline columns of each inline object of `obj`.
+        """
+        for relation, inline_plan in self.inline_plans.items():
+            inline_manager = getattr(obj, relation.get_accessor_name())
+            for inline_obj in inline_manager.all():
+                yield inline_plan.values(inline_obj, m2m_encoder)
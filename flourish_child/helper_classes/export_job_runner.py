@@ -0,0 +1,143 @@
+import csv
+import os
+import time
+
+from django.apps import apps as django_apps
+from django.utils.functional import cached_property
+from edc_base.utils import get_utcnow
+
+from ..constants import DONE, FAILED, RUNNING
+from .model_exporter import ModelExporter
+from .utils import child_utils
+
+
+class ExportJobRunner:
+    """Runs an export job in chunks of `job.chunk_size` objects, each chunk
+    written to its own CSV part file. Progress is saved after every chunk so
+    a job interrupted by a crash resumes after the last finished chunk.
+    """
+
+    def __init__(self, job=None, stdout=None):
+        self.job = job
+        self.stdout = stdout
+
+    @property
+    def model_cls(self):
+        return django_apps.get_model(self.job.model_label)
+
+    @property
+    def exporter(self):
+        return ModelExporter(model=self.model_cls)
+
+    @cached_property
+    def selected_ids(self):
+        return self.job.selected_ids
+
+    def chunks(self):
+        """Yields (pks, last pk) for each chunk after the job's last pk.
+
+        All rows are paged by keyset on the pk. Selected ids are staged on
+        the job in pk order and paged by position in that list, so each chunk
+        query only filters on the chunk's own ids.
+        """
+        job = self.job
+        if self.selected_ids is None:
+            last_pk = job.last_pk
+            while True:
+                remaining = self.model_cls.objects.order_by('pk')
+                if last_pk:
+                    remaining = remaining.filter(pk__gt=last_pk)
+                pks = list(remaining.values_list('pk', flat=True)[:job.chunk_size])
+                if not pks:
+                    return
+                last_pk = str(pks[-1])
+                yield pks, last_pk
+        else:
+            position = 0
+            if job.last_pk:
+                position = self.selected_ids.index(job.last_pk) + 1
+            while position < len(self.selected_ids):
+                chunk_ids = self.selected_ids[position:position + job.chunk_size]
+                position += len(chunk_ids)
+                yield (list(self.model_cls.objects.filter(
+                    pk__in=chunk_ids).order_by('pk').values_list('pk', flat=True)),
+                    chunk_ids[-1])
+
+    def count(self):
+        if self.selected_ids is None:
+            return self.model_cls.objects.count()
+        return len(self.selected_ids)
+
+    def run(self):
+        job = self.job
+        job.status = RUNNING
+        job.error = None
+        job.started_datetime = job.started_datetime or get_utcnow()
+        if not job.total_rows:
+            job.total_rows = self.count()
+        job.save(update_fields=['status', 'error', 'started_datetime', 'total_rows'])
+
+        os.makedirs(job.output_dir, exist_ok=True)
+        exporter = self.exporter
+
+        try:
+            for pks, last_pk in self.chunks():
+                start = time.monotonic()
+                if pks:
+                    self.write_chunk(exporter, pks)
+                    job.chunks_done += 1
+                job.rows_done += len(pks)
+                job.last_pk = last_pk
+                job.elapsed_seconds += time.monotonic() - start
+                job.save(update_fields=['rows_done', 'chunks_done', 'last_pk',
+                                        'elapsed_seconds'])
+                self.report_progress()
+        except Exception as e:
+            job.status = FAILED
+            job.error = str(e)
+            job.save(update_fields=['status', 'error'])
+            raise
+
+        job.status = DONE
+        job.finished_datetime = get_utcnow()
+        job.save(update_fields=['status', 'finished_datetime'])
+        return job
+
+    def chunk_filename(self, chunk_number):
+        return os.path.join(
+            self.job.output_dir,
+            f'{self.model_cls._meta.model_name}-part-{chunk_number:05d}.csv')
+
+    def write_chunk(self, exporter, pks):
+        """Writes the chunk to a temporary file first, so a part file on disk
+        is always complete.
+        """
+        chunk_queryset = self.model_cls.objects.filter(pk__in=pks).order_by('pk')
+        filename = self.chunk_filename(self.job.chunks_done + 1)
+
+        field_names = exporter.export_field_names(chunk_queryset)
+        field_names.extend(exporter.export_inline_field_names())
+
+        with open(f'{filename}.tmp', 'w', newline='') as export_file:
+            writer = csv.writer(export_file)
+            writer.writerow(field_names)
+            for row in exporter.export_rows(chunk_queryset, iterator=True):
+                writer.writerow(exporter.format_row(row[0]))
+        os.replace(f'{filename}.tmp', filename)
+
+    def report_progress(self):
+        if self.stdout:
+            job = self.job
+            self.stdout.write(
+                f'{job.model_label}: {job.rows_done}/{job.total_rows} rows, '
+                f'{job.chunks_done} chunks, {job.rows_per_second} rows/s')
+
+
+def run_export_job(job_id):
+    """Entry point of the django-q export task.
+    """
+    export_job_cls = django_apps.get_model('flourish_child.exportjob')
+    job = export_job_cls.objects.get(id=job_id)
+    if job.status != DONE:
+        with child_utils.identity_cache.scope():
+            ExportJobRunner(job=job).run()
@@ -0,0 +1,150 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from functools import lru_cache, partial
+
+import pyminizip
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.db import transaction
+from django_q.tasks import async_task
+from edc_base.utils import get_utcnow
+
+# model label: (file field name, subject identifier lookup)
+ENCRYPTED_FILE_FIELDS = {
+    'flourish_child.cliniciannotesimage': (
+        'image', 'clinician_notes__child_visit__subject_identifier'),
+    'flourish_child.tbadolinterview': (
+        'interview_file', 'child_visit__subject_identifier'),
+    'flourish_child.tbadolinterviewtranscription': (
+        'interview_transcription', 'child_visit__subject_identifier'),
+    'flourish_child.tbadolinterviewtranslation': (
+        'interview_translation', 'child_visit__subject_identifier'),
+}
+
+
+@lru_cache(maxsize=None)
+def encryption_key(key_path=None):
+    """Returns the file key, read once per worker process.
+    """
+    key_path = key_path or getattr(settings, 'FLOURISH_CHILD_FILE_KEY', 'filekey.key')
+    with open(key_path, 'r') as filekey:
+        return filekey.read().rstrip()
+
+
+def encrypt_path(path, zip_path, compress_level=8):
+    """Compresses `path` into a password protected zip, the plaintext file
+    is kept.
+    """
+    try:
+        pyminizip.compress(path, None, zip_path, encryption_key(), compress_level)
+    except Exception:
+        remove_file(zip_path)
+        raise
+
+
+def remove_file(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+class FileEncryptor:
+    """Encrypts the uploaded files of a model with a bounded pool of threads,
+    and points the file fields at the zips with `queryset.update` so no post
+    save handlers run again.
+
+    A plaintext file is removed only once the update pointing its row at the
+    zip commits. If the update fails the zip is removed instead, and the row
+    stays in the backlog with its plaintext file.
+    """
+
+    def __init__(self, model_label=None, max_workers=4, stdout=None):
+        self.model_label = model_label
+        self.file_field, self.subject_lookup = ENCRYPTED_FILE_FIELDS[model_label]
+        self.max_workers = max_workers
+        self.stdout = stdout
+
+    @property
+    def model_cls(self):
+        return django_apps.get_model(self.model_label)
+
+    def backlog(self):
+        """Returns the objects with an uploaded file that is not encrypted yet.
+        """
+        return self.model_cls.objects.exclude(
+            **{f'{self.file_field}__endswith': '.zip'}).exclude(
+                **{self.file_field: ''}).exclude(
+                    **{f'{self.file_field}__isnull': True}).values_list(
+                        'id', self.file_field, self.subject_lookup)
+
+    def zip_name(self, name, subject_identifier):
+        upload_to = self.model_cls._meta.get_field(self.file_field).upload_to
+        timestamp = datetime.timestamp(get_utcnow())
+        filename = os.path.splitext(os.path.basename(name))[0]
+        return f'{upload_to}{subject_identifier}_{filename}_{timestamp}.zip'
+
+    def encrypt(self, object_id, name, subject_identifier):
+        zip_name = self.zip_name(name, subject_identifier)
+        storage = self.model_cls._meta.get_field(self.file_field).storage
+        path, zip_path = storage.path(name), storage.path(zip_name)
+        encrypt_path(path, zip_path)
+        return object_id, zip_name, path, zip_path
+
+    def repoint(self, object_id, zip_name, path, zip_path):
+        """Points the row at the zip, and removes the plaintext file once
+        that commits.
+        """
+        try:
+            with transaction.atomic():
+                self.model_cls.objects.filter(id=object_id).update(
+                    **{self.file_field: zip_name})
+                transaction.on_commit(partial(remove_file, path))
+        except Exception:
+            remove_file(zip_path)
+            raise
+
+    def encrypt_files(self, files):
+        """ Encrypt (id, file name, subject identifier) rows in parallel.
+            @return: number of files encrypted, and the failures.
+        """
+        files = list(files)
+        encrypted, failures = 0, []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self.encrypt, *row): row for row in files}
+            for future in as_completed(futures):
+                try:
+                    self.repoint(*future.result())
+                except Exception as e:
+                    failures.append((futures[future][0], str(e)))
+                else:
+                    encrypted += 1
+                self.report_progress(encrypted + len(failures), len(files))
+        return encrypted, failures
+
+    def encrypt_objects(self, object_ids):
+        return self.encrypt_files(self.backlog().filter(id__in=object_ids))
+
+    def report_progress(self, done, total):
+        if self.stdout:
+            self.stdout.write(f'{self.model_label}: {done}/{total}', ending='\r')
+
+
+def encrypt_model_files(model_label, object_ids):
+    """django-q task encrypting the uploaded files of the given objects.
+    """
+    FileEncryptor(
+        model_label=model_label,
+        max_workers=getattr(settings, 'FLOURISH_CHILD_ENCRYPTION_WORKERS', 4)
+    ).encrypt_objects(object_ids)
+
+
+def queue_encryption(model_label, object_ids):
+    """Queues encryption of the objects' files once the transaction commits,
+    if `settings.FLOURISH_CHILD_ENCRYPT_UPLOADS` is on.
+    """
+    if not getattr(settings, 'FLOURISH_CHILD_ENCRYPT_UPLOADS', False):
+        return
+    object_ids = [str(object_id) for object_id in object_ids]
+    transaction.on_commit(lambda: async_task(
+        'flourish_child.helper_classes.file_encryptor.encrypt_model_files',
+        model_label, object_ids))
@@ -0,0 +1,95 @@
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+from django.core.signals import request_finished, request_started
+from django.db.models.signals import post_delete, post_save
+
+
+class IdentityCache:
+    """Memoizes identity lookups (child to caregiver, caregiver to screening,
+    screening to consent version) for the duration of a request or task.
+
+    Lookups outside a `scope()` are not cached. Saving or deleting a source
+    model drops its mapping in every thread, through a generation number per
+    mapping.
+    """
+
+    def __init__(self, sources=None):
+        self.sources = sources or {}
+        self.local = threading.local()
+        self.generations = Counter()
+        self.hits = Counter()
+        self.misses = Counter()
+
+    @property
+    def active(self):
+        return getattr(self.local, 'mappings', None) is not None
+
+    def activate(self, **kwargs):
+        self.local.mappings = {}
+
+    def deactivate(self, **kwargs):
+        self.local.mappings = None
+
+    @contextmanager
+    def scope(self):
+        """Caches lookups within the block, e.g. a django-q task. Nested scopes
+        share the outer cache.
+        """
+        if self.active:
+            yield self
+            return
+        self.activate()
+        try:
+            yield self
+        finally:
+            self.deactivate()
+
+    def get_or_set(self, mapping, key, loader):
+        mappings = getattr(self.local, 'mappings', None)
+        if mappings is None:
+            return loader()
+        generation, values = mappings.get(mapping, (None, None))
+        if generation != self.generations[mapping]:
+            values = {}
+            mappings[mapping] = (self.generations[mapping], values)
+        try:
+            value = values[key]
+        except KeyError:
+            self.misses[mapping] += 1
+            value = values[key] = loader()
+        else:
+            self.hits[mapping] += 1
+        return value
+
+    def invalidate(self, mapping):
+        self.generations[mapping] += 1
+
+    def stats(self):
+        return {mapping: {'hits': self.hits[mapping], 'misses': self.misses[mapping]}
+                for mapping in self.sources}
+
+    def reset_stats(self):
+        self.hits.clear()
+        self.misses.clear()
+
+    def connect(self):
+        """Scopes the cache to each request and connects the source model
+        invalidation, called at app ready.
+        """
+        request_started.connect(
+            self.activate, weak=False, dispatch_uid='identity_cache_request_started')
+        request_finished.connect(
+            self.deactivate, weak=False, dispatch_uid='identity_cache_request_finished')
+        for mapping, model in self.sources.items():
+            for signal_name, signal in (('post_save', post_save),
+                                        ('post_delete', post_delete)):
+                signal.connect(
+                    self.invalidate_receiver(mapping), sender=model, weak=False,
+                    dispatch_uid=f'identity_cache_{signal_name}_{mapping}')
+
+    def invalidate_receiver(self, mapping):
+        def receiver(sender, instance, **kwargs):
+            self.invalidate(mapping)
+        return receiver
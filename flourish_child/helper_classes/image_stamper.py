@@ -0,0 +1,127 @@
+import os
+import time
+from functools import lru_cache
+
+import PIL
+import pypdfium2 as pdfium
+from PIL import Image
+from django.apps import apps as django_apps
+from edc_base.utils import get_utcnow
+
+from ..constants import DONE, FAILED, RUNNING
+from .file_encryptor import queue_encryption
+
+STAMP_PATH = 'media/stamp/true-copy.png'
+
+
+@lru_cache(maxsize=None)
+def stamp_variants(stamp_path=STAMP_PATH, resize=(500, 500)):
+    """Returns the (portrait, landscape) stamp images, decoded and resized
+    once per worker process.
+    """
+    stamp = Image.open(stamp_path)
+    if resize:
+        stamp = stamp.resize(resize, PIL.Image.ANTIALIAS)
+    else:
+        stamp.load()
+    return stamp, stamp.rotate(90)
+
+
+def add_stamp(base_image, position=(25, 25), resize=(500, 500)):
+    """Superimposes the stamp at the bottom centre of a portrait image, or the
+    right centre of a landscape image.
+    """
+    portrait_stamp, landscape_stamp = stamp_variants(resize=resize)
+    stamp = portrait_stamp
+
+    width, height = base_image.size
+    stamp_width, stamp_height = stamp.size
+
+    # Determine orientation of the base image before pasting stamp
+    if width < height:
+        pos_width = round(width / 2) - round(stamp_width / 2)
+        pos_height = height - stamp_height
+        position = (pos_width, pos_height)
+    elif width > height:
+        stamp = landscape_stamp
+        pos_width = width - stamp_width
+        pos_height = round(height / 2) - round(stamp_height / 2)
+        position = (pos_width, pos_height)
+
+    base_image.paste(stamp, position, mask=stamp)
+    return base_image
+
+
+def stamp_pdf(filepath, scale=300 / 72):
+    """Renders and stamps a PDF one page at a time, appending each page to a
+    temporary PDF that then replaces the original, so memory stays flat.
+    @return: number of pages stamped.
+    """
+    tmp_path = f'{filepath}.stamping'
+    pages = 0
+    replaced = False
+    try:
+        pdf = pdfium.PdfDocument(filepath)
+        try:
+            for page_index in range(len(pdf)):
+                page = pdf.get_page(page_index)
+                try:
+                    image = add_stamp(base_image=page.render_topil(scale=scale))
+                finally:
+                    page.close()
+                image.save(tmp_path, format='PDF', append=bool(pages))
+                image.close()
+                pages += 1
+        finally:
+            pdf.close()
+        if pages:
+            os.replace(tmp_path, filepath)
+            replaced = True
+    finally:
+        # a partly written file is not left next to the upload
+        if not replaced and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return pages
+
+
+def stamp_file(path):
+    """Stamps an image or PDF in place.
+    @return: number of pages stamped.
+    """
+    if '.pdf' not in path:
+        with Image.open(path) as base_image:
+            stamped_img = add_stamp(base_image=base_image)
+            stamped_img.save(path)
+        return 1
+    return stamp_pdf(path)
+
+
+def stamp_clinician_notes_image(image_id):
+    """django-q task stamping an uploaded clinician notes image, recording
+    the stamping status and timing on the image row.
+    """
+    image_model_cls = django_apps.get_model('flourish_child.cliniciannotesimage')
+    image_qs = image_model_cls.objects.filter(id=image_id)
+    image_obj = image_qs.first()
+    if not image_obj or image_obj.stamp_status == DONE:
+        return
+    image_qs.update(stamp_status=RUNNING, stamp_error=None)
+
+    start = time.perf_counter()
+    try:
+        filefield = image_obj.image
+        pages = stamp_file(filefield.storage.path(filefield.name))
+    except Exception as e:
+        image_qs.update(
+            stamp_status=FAILED,
+            stamp_error=str(e),
+            stamp_seconds=time.perf_counter() - start)
+        raise
+    else:
+        image_qs.update(
+            stamp_status=DONE,
+            stamp_pages=pages,
+            stamp_seconds=time.perf_counter() - start,
+            stamped_datetime=get_utcnow())
+        # encrypt only once the stamped file is written
+        queue_encryption('flourish_child.cliniciannotesimage', [image_id])
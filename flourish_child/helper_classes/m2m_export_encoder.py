@@ -0,0 +1,72 @@
+from django.db.models import ManyToManyField
+
+
+class M2MExportEncoder:
+    """One-hot encodes the many to many fields of exported objects.
+
+    The choice ordering of each list model is read once per export and the
+    through table rows of every m2m field are fetched with one query for the
+    whole queryset, so encoding a row does not touch the database.
+    """
+
+    def __init__(self):
+        self.choices = {}
+        self.column_index = {}
+        self.selections = {}
+
+    def m2m_list_data(self, model_cls=None):
+        """Returns the list model short names in export column order.
+        """
+        if model_cls not in self.choices:
+            choices = list(model_cls.objects.order_by(
+                'created').values_list('short_name', flat=True))
+            column_index = {}
+            for idx, choice in enumerate(choices):
+                column_index.setdefault(choice, []).append(idx)
+            self.choices[model_cls] = choices
+            self.column_index[model_cls] = column_index
+        return self.choices[model_cls]
+
+    def prefetch(self, queryset):
+        """Loads the selected choices of every m2m field on the queryset's
+        model, one through table query per field.
+        """
+        for field in queryset.model._meta.get_fields():
+            if isinstance(field, ManyToManyField):
+                self.prefetch_field(field, queryset)
+
+    def prefetch_field(self, m2m_field, queryset):
+        self.selections[m2m_field] = self.selected_choices(m2m_field, queryset)
+
+    def selected_choices(self, m2m_field, queryset):
+        """Returns a dict of object pk to the set of selected short names.
+        """
+        through_cls = m2m_field.remote_field.through
+        source_name = m2m_field.m2m_field_name()
+        target_name = m2m_field.m2m_reverse_field_name()
+
+        selections = {}
+        through_rows = through_cls.objects.filter(
+            **{f'{source_name}__in': queryset.order_by().values('pk')}).values_list(
+                f'{source_name}_id', f'{target_name}__short_name')
+        for obj_pk, short_name in through_rows:
+            selections.setdefault(obj_pk, set()).add(short_name)
+        return selections
+
+    def encode(self, model_obj, m2m_field=None):
+        """Returns the 0/1 indicator columns of `m2m_field` for `model_obj`.
+        """
+        model_cls = m2m_field.related_model
+        choices = self.m2m_list_data(model_cls)
+        try:
+            selections = self.selections[m2m_field]
+        except KeyError:
+            # Field was not prefetched, look up this object only.
+            selections = self.selected_choices(
+                m2m_field, model_obj.__class__.objects.filter(pk=model_obj.pk))
+        m2m_values = [0] * len(choices)
+        column_index = self.column_index[model_cls]
+        for short_name in selections.get(model_obj.pk, ()):
+            for idx in column_index.get(short_name, ()):
+                m2m_values[idx] = 1
+        return m2m_values
@@ -0,0 +1,218 @@
+import datetime
+import uuid
+
+from decimal import Decimal
+from itertools import islice
+
+from django.db.models import prefetch_related_objects
+from django.utils import timezone
+
+from .export_column_plan import ExportColumnPlan
+from .m2m_export_encoder import M2MExportEncoder
+from .participant_context_resolver import ParticipantContextResolver
+
+
+class ModelExportMixin:
+    """Export columns and rows of `self.model`, shared by the admin export
+    actions and the background export jobs.
+    """
+
+    export_chunk_size = 2000
+
+    exclude_fields = frozenset([
+        'created', '_state', 'hostname_created', 'hostname_modified', 'revision',
+        'device_created', 'device_modified', 'id', 'site_id', 'created_time',
+        'modified_time', 'report_datetime_time', 'registration_datetime_time',
+        'screening_datetime_time', 'modified', 'form_as_json', 'consent_model',
+        'randomization_datetime', 'registration_datetime', 'is_verified_datetime',
+        'first_name', 'last_name', 'initials', 'guardian_name', 'identity',
+        'infant_visit_id', 'maternal_visit_id', 'processed', 'processed_datetime',
+        'packed', 'packed_datetime', 'shipped', 'shipped_datetime',
+        'received_datetime', 'identifier_prefix', 'primary_aliquot_identifier',
+        'clinic_verified', 'clinic_verified_datetime', 'drawn_datetime',
+        'related_tracking_identifier', 'parent_tracking_identifier', 'interview_file',
+        'interview_transcription', 'slug', 'confirm_identity', 'site',
+        'subject_consent_id', '_django_version'])
+
+    def is_tb_adol_export(self, queryset):
+        obj = queryset[0]
+        return ('tb' in obj.child_visit.schedule_name if hasattr(
+            obj, 'child_visit') else False) or ('TB Adol' in obj.verbose_name)
+
+    @property
+    def export_plan(self):
+        return ExportColumnPlan.for_model(self.model, self.exclude_fields)
+
+    def export_field_names(self, queryset):
+        """Returns the export header, excluding the inline model columns.
+        """
+        field_names = self.export_prefix_columns(queryset)
+        field_names.extend(self.export_plan.header(self.m2m_list_data))
+        field_names.extend(['enrollment_cohort', 'current_cohort', ])
+        return field_names
+
+    def export_prefix_columns(self, queryset):
+        """Returns the participant context columns written before the model
+        columns, each a key of the resolver's participant context.
+        """
+        obj = queryset[0]
+        is_tb_adol_model = self.is_tb_adol_export(queryset)
+        is_birth_data = obj._meta.label_lower == 'flourish_child.birthdata'
+        columns = []
+
+        if getattr(obj, 'child_visit', None):
+            columns.extend(['childpid', 'matpid', 'old_matpid'])
+
+        if self.is_non_crf(obj):
+            columns.append('previous_study')
+            if is_birth_data and not is_tb_adol_model:
+                columns.append('infant_sex')
+            columns.append('child_exposure_status')
+            if is_tb_adol_model:
+                columns.append('tb_enrollment')
+                if is_birth_data:
+                    columns.append('infant_sex')
+
+        if getattr(obj, 'child_visit', None):
+            columns.append('visit_code')
+        return columns
+
+    def export_inline_field_names(self):
+        """Returns the inline model columns appended to the header of models
+        with inlines.
+        """
+        return self.export_plan.inline_header(self.m2m_list_data)
+
+    def export_rows(self, queryset, iterator=False):
+        """Yields a `(row, inline_field_names)` tuple per exported row. Models
+        with inlines yield one row per inline object, with the inline columns
+        appended to the parent values.
+        @param iterator: read the queryset in chunks of `export_chunk_size`
+            through a server side cursor instead of caching it.
+        """
+        export_plan = self.export_plan
+        context_resolver = self.participant_context_resolver(queryset)
+        m2m_encoder = self.m2m_export_encoder(queryset)
+        inline_field_names = export_plan.inline_header(m2m_encoder.m2m_list_data)
+
+        objs = self.export_objects(queryset, iterator=iterator)
+
+        prefix_columns = self.export_prefix_columns(queryset)
+        has_child_visit = 'visit_code' in prefix_columns
+
+        for obj in objs:
+            if has_child_visit:
+                subject_identifier = obj.child_visit.subject_identifier
+            else:
+                subject_identifier = getattr(obj, 'subject_identifier', None)
+            context = context_resolver.participant_context(subject_identifier)
+
+            data = [obj.child_visit.visit_code if column == 'visit_code'
+                    else context[column] for column in prefix_columns]
+
+            export_plan.values(obj, data, m2m_encoder)
+
+            # Add current and enrollment cohort
+            data.append(context['enrollment_cohort'])
+            data.append(context['current_cohort'])
+
+            inline_rows = list(export_plan.inline_rows(obj, m2m_encoder))
+            if inline_rows:
+                for inline_values in inline_rows:
+                    yield data + inline_values, inline_field_names
+            else:
+                yield data, None
+
+    def export_objects(self, queryset, iterator=False):
+        """Returns the objects to export with their inline relations
+        prefetched, one query per relation rather than one per object.
+
+        `iterator()` ignores `prefetch_related`, so in iterator mode the inline
+        relations are prefetched per batch of `export_chunk_size` objects.
+        """
+        prefetches = self.export_plan.inline_prefetches
+        if not iterator:
+            return queryset.prefetch_related(*prefetches)
+        return self.iterate_prefetched(queryset, prefetches)
+
+    def iterate_prefetched(self, queryset, prefetches):
+        objs = queryset.iterator(chunk_size=self.export_chunk_size)
+        while True:
+            batch = list(islice(objs, self.export_chunk_size))
+            if not batch:
+                break
+            if prefetches:
+                prefetch_related_objects(batch, *prefetches)
+            yield from batch
+
+    def participant_context_resolver(self, queryset):
+        """Returns a resolver pre-loaded with the participant context of every
+        distinct subject in the queryset.
+        """
+        return ParticipantContextResolver(
+            subject_identifiers=self.export_subject_identifiers(queryset))
+
+    def m2m_export_encoder(self, queryset):
+        """Returns an m2m encoder with the selections of the queryset and of
+        its inline models already loaded.
+        """
+        m2m_encoder = M2MExportEncoder()
+        m2m_encoder.prefetch(queryset)
+        for relation in self.export_plan.inline_relations:
+            inline_queryset = relation.related_model.objects.filter(
+                **{f'{relation.field.name}__in': queryset.order_by().values('pk')})
+            m2m_encoder.prefetch(inline_queryset)
+        return m2m_encoder
+
+    def export_subject_identifiers(self, queryset):
+        model_fields = [field.name for field in queryset.model._meta.get_fields()]
+        if 'child_visit' in model_fields:
+            lookup = 'child_visit__subject_identifier'
+        elif 'subject_identifier' in model_fields:
+            lookup = 'subject_identifier'
+        else:
+            return []
+        return queryset.order_by().values_list(lookup, flat=True).distinct()
+
+    def format_row(self, data=None):
+        """Returns the row values converted to plain values for the CSV and
+        xlsx writers.
+        """
+        row = []
+        for value in data:
+            if isinstance(value, uuid.UUID):
+                value = str(value)
+            elif isinstance(value, datetime.datetime):
+                if value.tzinfo is not None and value.tzinfo.utcoffset(value) is not None:
+                    value = timezone.make_naive(value)
+                value = value.strftime('%Y/%m/%d')
+            elif isinstance(value, datetime.date):
+                value = value.strftime('%Y/%m/%d')
+            elif value is not None and not isinstance(value, (str, int, float, Decimal)):
+                value = str(value)
+            row.append(value)
+        return row
+
+    def is_non_crf(self, obj):
+
+        if getattr(obj, 'subject_identifier'):
+            return True
+        else:
+            return False
+
+    @property
+    def get_model_fields(self):
+        return self.export_plan.fields
+
+    def m2m_list_data(self, model_cls=None):
+        qs = model_cls.objects.order_by(
+            'created').values_list('short_name', flat=True)
+        return list(qs)
+
+
+class ModelExporter(ModelExportMixin):
+    """Export columns and rows of a model outside of a model admin.
+    """
+
+    def __init__(self, model=None):
+        self.model = model
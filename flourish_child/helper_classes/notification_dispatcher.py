@@ -0,0 +1,132 @@
+from django.contrib.auth.models import Group, User
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from edc_constants.constants import OPEN
+from edc_data_manager.models import DataActionItem
+
+from .commit_buffer import CommitBuffer
+
+
+class NotificationDispatcher(CommitBuffer):
+    """Creates DataActionItem notifications in one batch once the transaction
+    commits.
+
+    The user a notification is assigned to is resolved once per process (and
+    added to the assignable groups if needed), notifications already raised
+    for the same subject identifier and subject are skipped with one query,
+    and the new items are saved in one transaction. Each item is saved on its
+    own so its save, post_save receivers and history run as before.
+    """
+
+    defer_setting = 'FLOURISH_CHILD_DEFER_NOTIFICATIONS'
+
+    def __init__(self):
+        super().__init__()
+        self.assignees = {}
+
+    def notification(self, subject_identifier, subject, user_created=None,
+                     group_names=('assignable users',), comment='', **fields):
+        """ Returns a notification.
+            @param user_created: username the item is created by and assigned
+                   to, the notification is dropped if the user does not exist.
+            @param fields: DataActionItem field values, if given the item is
+                   created with these instead of assigned to `user_created`,
+                   e.g. assigned='clinic'.
+        """
+        return dict(subject_identifier=subject_identifier, subject=subject,
+                    user_created=user_created, group_names=tuple(group_names),
+                    comment=comment, fields=fields)
+
+    def add(self, *args, **kwargs):
+        """ Queues a notification, takes the `notification` arguments.
+        """
+        self.add_item(self.notification(*args, **kwargs))
+
+    def assignee(self, username, group_names):
+        """ Returns the username to assign notifications to, adding the user to
+            the groups if not in any of them yet, or None if there is no user.
+        """
+        key = (username, group_names)
+        if key not in self.assignees:
+            try:
+                user = User.objects.get(username=username)
+            except User.DoesNotExist:
+                self.assignees[key] = None
+            else:
+                if not user.groups.filter(name__in=group_names).exists():
+                    user.groups.add(*Group.objects.filter(name__in=group_names))
+                    user.save()
+                self.assignees[key] = user.username
+        return self.assignees[key]
+
+    def data_action_item(self, notification):
+        if notification['fields']:
+            return DataActionItem(
+                subject_identifier=notification['subject_identifier'],
+                subject=notification['subject'],
+                comment=notification['comment'],
+                **notification['fields'])
+        if not notification['user_created']:
+            return None
+        assigned = self.assignee(notification['user_created'], notification['group_names'])
+        if assigned is None:
+            return None
+        return DataActionItem(
+            subject_identifier=notification['subject_identifier'],
+            user_created=notification['user_created'],
+            status=OPEN,
+            action_priority='high',
+            assigned=assigned,
+            subject=notification['subject'],
+            comment=notification['comment'])
+
+    def resolve(self, notifications):
+        """ Creates the notifications not raised yet.
+            @return: the created DataActionItems.
+        """
+        seen = set(DataActionItem.objects.filter(
+            subject_identifier__in={n['subject_identifier'] for n in notifications},
+            subject__in={n['subject'] for n in notifications}).values_list(
+                'subject_identifier', 'subject'))
+        data_action_items = []
+        for notification in notifications:
+            key = (notification['subject_identifier'], notification['subject'])
+            if key in seen:
+                continue
+            data_action_item = self.data_action_item(notification)
+            if data_action_item is not None:
+                seen.add(key)
+                data_action_items.append(data_action_item)
+        with transaction.atomic():
+            for data_action_item in data_action_items:
+                data_action_item.save()
+        return data_action_items
+
+    def dispatch(self, notifications):
+        """ Creates many notifications now in one batch, e.g. in a data fix
+            script.
+            @param notifications: dictionaries of `notification` keyword arguments.
+            @return: the created DataActionItems.
+        """
+        return self.resolve([self.notification(**notification)
+                             for notification in notifications])
+
+    def clear_assignees(self, *args, **kwargs):
+        self.assignees.clear()
+
+    def connect(self):
+        """Drops the resolved assignees when users or groups change, called at
+        app ready.
+        """
+        for signal_name, signal in (('post_save', post_save),
+                                    ('post_delete', post_delete)):
+            for model in (User, Group):
+                signal.connect(
+                    self.clear_assignees, sender=model, weak=False,
+                    dispatch_uid=f'notification_assignees_{signal_name}_{model.__name__}')
+        m2m_changed.connect(
+            self.clear_assignees, sender=User.groups.through, weak=False,
+            dispatch_uid='notification_assignees_user_groups')
+
+
+notifications = NotificationDispatcher()
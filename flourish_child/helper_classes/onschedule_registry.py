@@ -0,0 +1,66 @@
+from django.db import transaction
+from edc_visit_schedule.site_visit_schedules import site_visit_schedules
+
+
+class OnScheduleRegistry:
+    """Maps each schedule name to its (onschedule model, schedule) pairs, so
+    taking a participant off a schedule does not query every onschedule model.
+
+    Built once per process from `site_visit_schedules` at app ready, or on
+    first use if the visit schedules were not loaded yet.
+    """
+
+    def __init__(self):
+        self.schedules = {}
+
+    def populate(self):
+        schedules = {}
+        for visit_schedule in site_visit_schedules.visit_schedules.values():
+            for schedule in visit_schedule.schedules.values():
+                schedules.setdefault(schedule.name, []).append(
+                    (schedule.onschedule_model_cls, schedule))
+        self.schedules = schedules
+
+    def get(self, schedule_name):
+        """Returns the (onschedule model, schedule) pairs of `schedule_name`.
+        """
+        if not self.schedules:
+            self.populate()
+        return self.schedules.get(schedule_name, [])
+
+    def onschedule_subjects(self, onschedule_model_cls, schedule_name,
+                            subject_identifiers):
+        return set(onschedule_model_cls.objects.filter(
+            subject_identifier__in=subject_identifiers,
+            schedule_name=schedule_name).values_list('subject_identifier', flat=True))
+
+    def take_off_schedule(self, subject_identifier, schedule_name,
+                          offschedule_datetime):
+        self.bulk_take_off_schedule(
+            [subject_identifier], schedule_name, offschedule_datetime)
+
+    def bulk_take_off_schedule(self, subject_identifiers, schedule_name,
+                               offschedule_datetime):
+        """Takes the participants that are on `schedule_name` off it in one
+        transaction, with one onschedule query per onschedule model.
+        @param subject_identifiers: child subject identifiers
+        @param schedule_name: schedule to take the participants off
+        @param offschedule_datetime: off schedule datetime
+        @return: subject identifiers taken off schedule.
+        """
+        taken_off = []
+        with transaction.atomic():
+            for onschedule_model_cls, schedule in self.get(schedule_name):
+                onschedule_subjects = self.onschedule_subjects(
+                    onschedule_model_cls, schedule_name, subject_identifiers)
+                for subject_identifier in subject_identifiers:
+                    if subject_identifier in onschedule_subjects:
+                        schedule.take_off_schedule(
+                            subject_identifier=subject_identifier,
+                            offschedule_datetime=offschedule_datetime,
+                            schedule_name=schedule_name)
+                        taken_off.append(subject_identifier)
+        return taken_off
+
+
+onschedule_registry = OnScheduleRegistry()
@@ -0,0 +1,200 @@
+import json
+import time
+from datetime import timedelta
+
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.db.models.signals import post_migrate
+from django_q.models import Schedule
+from django_q.tasks import async_task, schedule
+from edc_base.utils import get_utcnow
+from edc_constants.constants import PENDING
+
+from ..constants import DONE, FAILED, RUNNING
+
+
+class Outbox:
+    """Runs the heavy side effects of form saves out of the request.
+
+    A post save handler records an OutboxJob in the form's transaction, keyed
+    by an idempotency key so a job is recorded once, and a django-q worker runs
+    it once the transaction commits. A job is claimed with a conditional
+    update, run in its own transaction and retried with backoff on failure.
+    `requeue` picks up jobs left behind by a crashed worker or a lost enqueue,
+    run by a django-q schedule registered after migrate.
+
+    With `settings.FLOURISH_CHILD_OUTBOX_SYNC` on (e.g. in tests) jobs run
+    inline when recorded and their errors are raised.
+    """
+
+    job_model = 'flourish_child.outboxjob'
+    task = 'flourish_child.helper_classes.outbox.run_outbox_job'
+    requeue_task = 'flourish_child.helper_classes.outbox.requeue_outbox_jobs'
+    requeue_schedule_name = 'flourish_child_process_outbox'
+
+    def __init__(self):
+        self.handlers = {}
+
+    @property
+    def job_model_cls(self):
+        return django_apps.get_model(self.job_model)
+
+    @property
+    def sync(self):
+        return getattr(settings, 'FLOURISH_CHILD_OUTBOX_SYNC', False)
+
+    @property
+    def max_attempts(self):
+        return getattr(settings, 'FLOURISH_CHILD_OUTBOX_MAX_ATTEMPTS', 5)
+
+    @property
+    def retry_seconds(self):
+        return getattr(settings, 'FLOURISH_CHILD_OUTBOX_RETRY_SECONDS', 60)
+
+    @property
+    def stale_seconds(self):
+        return getattr(settings, 'Q_CLUSTER', {}).get('retry', 60 * 60 + 60)
+
+    @property
+    def requeue_minutes(self):
+        return getattr(settings, 'FLOURISH_CHILD_OUTBOX_REQUEUE_MINUTES', 15)
+
+    def handler(self, job_name):
+        """Registers a function as the handler of a job, called with the
+        job's payload as keyword arguments.
+        """
+        def register(func):
+            self.handlers[job_name] = func
+            return func
+        return register
+
+    def enqueue(self, job_name, idempotency_key, **payload):
+        """ Records a job in the current transaction.
+            @param job_name: registered handler name
+            @param idempotency_key: key recorded once, later jobs with the same
+                   key are ignored
+            @param payload: JSON serializable handler keyword arguments
+            @return: the job or None if the key was already recorded.
+        """
+        try:
+            with transaction.atomic():
+                job = self.job_model_cls.objects.create(
+                    job_name=job_name,
+                    idempotency_key=idempotency_key,
+                    payload=json.dumps(payload, cls=DjangoJSONEncoder))
+        except IntegrityError:
+            return None
+        if self.sync:
+            self.run(job.id, raise_errors=True)
+        else:
+            job_id = str(job.id)
+            transaction.on_commit(lambda: async_task(self.task, job_id))
+        return job
+
+    def claim(self, job_id):
+        return self.job_model_cls.objects.filter(
+            id=job_id, status__in=[PENDING, FAILED],
+            attempts__lt=self.max_attempts).update(
+                status=RUNNING, attempts=F('attempts') + 1,
+                started_datetime=get_utcnow())
+
+    def run(self, job_id, raise_errors=False):
+        """ Claims and runs a job, does nothing if the job is done, running
+            elsewhere or out of attempts.
+        """
+        if not self.claim(job_id):
+            return
+        job_qs = self.job_model_cls.objects.filter(id=job_id)
+        job = job_qs.get()
+        start = time.perf_counter()
+        try:
+            with transaction.atomic():
+                self.handlers[job.job_name](**json.loads(job.payload))
+        except Exception as e:
+            next_attempt = None
+            if job.attempts < self.max_attempts:
+                next_attempt = get_utcnow() + timedelta(
+                    seconds=self.retry_seconds * 2 ** (job.attempts - 1))
+            job_qs.update(
+                status=FAILED,
+                error=str(e),
+                duration=time.perf_counter() - start,
+                next_attempt_datetime=next_attempt)
+            if raise_errors:
+                raise
+            if next_attempt:
+                schedule(self.task, str(job_id), schedule_type=Schedule.ONCE,
+                         next_run=next_attempt)
+        else:
+            job_qs.update(
+                status=DONE,
+                error=None,
+                duration=time.perf_counter() - start,
+                completed_datetime=get_utcnow(),
+                next_attempt_datetime=None)
+
+    def due_jobs(self):
+        """ Jobs never picked up, left running by a crashed worker, or due for
+            a retry.
+        """
+        stale = get_utcnow() - timedelta(seconds=self.stale_seconds)
+        return self.job_model_cls.objects.filter(
+            Q(status=PENDING, created__lt=stale)
+            | Q(status=RUNNING, started_datetime__lt=stale)
+            | Q(status=FAILED, next_attempt_datetime__lte=get_utcnow()),
+            attempts__lt=self.max_attempts)
+
+    def requeue(self, sync=False):
+        """ Queues the due jobs again, or runs them in this process if `sync`.
+            @return: number of jobs requeued.
+        """
+        job_ids = [str(job_id) for job_id in self.due_jobs().values_list('id', flat=True)]
+        self.job_model_cls.objects.filter(
+            id__in=job_ids, status=RUNNING).update(status=PENDING)
+        for job_id in job_ids:
+            if sync:
+                self.run(job_id)
+            else:
+                async_task(self.task, job_id)
+        return len(job_ids)
+
+    def schedule_requeue(self, **kwargs):
+        """ Registers the periodic django-q schedule running `requeue`, kept
+            as is if it already exists.
+            @return: the schedule.
+        """
+        obj, _ = Schedule.objects.get_or_create(
+            name=self.requeue_schedule_name,
+            defaults=dict(
+                func=self.requeue_task,
+                schedule_type=Schedule.MINUTES,
+                minutes=self.requeue_minutes,
+                repeats=-1))
+        return obj
+
+    def connect(self):
+        """Registers the requeue schedule after migrate, called at app ready.
+        """
+        post_migrate.connect(
+            self.schedule_requeue,
+            sender=django_apps.get_app_config('flourish_child'), weak=False,
+            dispatch_uid='outbox_post_migrate_schedule_requeue')
+
+
+outbox = Outbox()
+
+
+def run_outbox_job(job_id):
+    """django-q task running an outbox job.
+    """
+    outbox.run(job_id)
+
+
+def requeue_outbox_jobs():
+    """django-q task queueing the due outbox jobs again, scheduled every
+    `settings.FLOURISH_CHILD_OUTBOX_REQUEUE_MINUTES`.
+    """
+    return outbox.requeue()
@@ -0,0 +1,207 @@
+from django.apps import apps as django_apps
+from edc_base.utils import age
+from edc_constants.constants import NEG, POS, YES
+
+
+class ParticipantContextResolver:
+    """Resolves the participant context columns of an export (caregiver pid,
+    previous study, exposure status, cohorts, ...) for a set of child subject
+    identifiers up front, with one `__in` query per related table, and serves
+    the per-row values from in-memory dicts.
+    """
+
+    child_dummy_consent_model = 'flourish_child.childdummysubjectconsent'
+    subject_consent_model = 'flourish_caregiver.subjectconsent'
+    maternal_dataset_model = 'flourish_caregiver.maternaldataset'
+    child_dataset_model = 'flourish_child.childdataset'
+    caregiver_child_consent_model = 'flourish_caregiver.caregiverchildconsent'
+    cohort_model = 'flourish_caregiver.cohort'
+    tb_adol_assent_model = 'flourish_child.tbadolassent'
+    rapid_test_model = 'flourish_caregiver.hivrapidtestcounseling'
+    antenatal_enrollment_model = 'flourish_caregiver.antenatalenrollment'
+
+    def __init__(self, subject_identifiers=None):
+        self.subject_identifiers = set(filter(None, subject_identifiers or []))
+        self.caregiver_sids = {}
+        self.screening_identifiers = {}
+        self.study_maternal_identifiers = {}
+        self.child_datasets = {}
+        self.child_consents = {}
+        self.enrol_cohorts = {}
+        self.current_cohorts = {}
+        self.tb_assents = {}
+        self.rapid_test_results = {}
+        self.antenatal_hiv_status = {}
+        self.contexts = {}
+        self.load()
+
+    def get_model_cls(self, label_lower):
+        return django_apps.get_model(label_lower)
+
+    def ordered_like_last(self, queryset):
+        """Returns the queryset ordered so that the last row per key is the
+        row `queryset.last()` would have returned.
+        """
+        return queryset if queryset.ordered else queryset.order_by('pk')
+
+    def load(self):
+        if not self.subject_identifiers:
+            return
+
+        child_consent_cls = self.get_model_cls(self.child_dummy_consent_model)
+        dummy_consents = self.ordered_like_last(
+            child_consent_cls.objects.filter(
+                subject_identifier__in=self.subject_identifiers)).values_list(
+                    'subject_identifier', 'relative_identifier')
+        self.caregiver_sids = dict(dummy_consents)
+
+        subject_consent_cls = self.get_model_cls(self.subject_consent_model)
+        subject_consents = self.ordered_like_last(
+            subject_consent_cls.objects.filter(
+                subject_identifier__in=set(
+                    filter(None, self.caregiver_sids.values())))).values_list(
+                    'subject_identifier', 'screening_identifier')
+        self.screening_identifiers = dict(subject_consents)
+
+        maternal_dataset_cls = self.get_model_cls(self.maternal_dataset_model)
+        maternal_datasets = maternal_dataset_cls.objects.filter(
+            screening_identifier__in=set(
+                filter(None, self.screening_identifiers.values()))).values_list(
+                    'screening_identifier', 'study_maternal_identifier')
+        self.study_maternal_identifiers = dict(maternal_datasets)
+
+        child_dataset_cls = self.get_model_cls(self.child_dataset_model)
+        child_datasets = child_dataset_cls.objects.filter(
+            study_maternal_identifier__in=set(
+                filter(None, self.study_maternal_identifiers.values()))).values_list(
+                    'study_maternal_identifier', 'infant_hiv_exposed')
+        for study_maternal_identifier, infant_hiv_exposed in child_datasets:
+            # Keep the first dataset row, as `child_dataset_objs[0]` did.
+            self.child_datasets.setdefault(
+                study_maternal_identifier, infant_hiv_exposed)
+
+        caregiver_child_consent_cls = self.get_model_cls(
+            self.caregiver_child_consent_model)
+        child_consents = caregiver_child_consent_cls.objects.filter(
+            subject_identifier__in=self.subject_identifiers).order_by(
+                'consent_datetime')
+        for child_consent in child_consents:
+            self.child_consents[child_consent.subject_identifier] = child_consent
+
+        cohort_cls = self.get_model_cls(self.cohort_model)
+        cohorts = cohort_cls.objects.filter(
+            subject_identifier__in=self.subject_identifiers).order_by(
+                '-assign_datetime').values_list(
+                    'subject_identifier', 'name', 'enrollment_cohort',
+                    'current_cohort')
+        for subject_identifier, name, enrollment_cohort, current_cohort in cohorts:
+            if enrollment_cohort:
+                self.enrol_cohorts.setdefault(subject_identifier, name)
+            if current_cohort:
+                self.current_cohorts.setdefault(subject_identifier, name)
+
+        tb_adol_assent_cls = self.get_model_cls(self.tb_adol_assent_model)
+        tb_assents = tb_adol_assent_cls.objects.filter(
+            subject_identifier__in=self.subject_identifiers).values_list(
+                'subject_identifier', 'dob', 'consent_datetime')
+        self.tb_assents = {
+            subject_identifier: (dob, consent_datetime)
+            for subject_identifier, dob, consent_datetime in tb_assents}
+
+        caregiver_sids = set(filter(None, self.caregiver_sids.values()))
+
+        rapid_test_cls = self.get_model_cls(self.rapid_test_model)
+        rapid_tests = rapid_test_cls.objects.filter(
+            maternal_visit__visit_code='1000M',
+            maternal_visit__visit_code_sequence=0,
+            maternal_visit__subject_identifier__in=caregiver_sids,
+            rapid_test_done=YES).values_list(
+                'maternal_visit__subject_identifier', 'result')
+        self.rapid_test_results = dict(rapid_tests)
+
+        antenatal_enrollment_cls = self.get_model_cls(
+            self.antenatal_enrollment_model)
+        antenatal_enrollments = antenatal_enrollment_cls.objects.filter(
+            subject_identifier__in=caregiver_sids,
+            child_subject_identifier__in=self.subject_identifiers).values_list(
+                'subject_identifier', 'child_subject_identifier',
+                'enrollment_hiv_status')
+        self.antenatal_hiv_status = {
+            (caregiver_sid, child_sid): hiv_status
+            for caregiver_sid, child_sid, hiv_status in antenatal_enrollments}
+
+    def caregiver_subject_identifier(self, subject_identifier=None):
+        return self.caregiver_sids.get(subject_identifier)
+
+    def screening_identifier(self, subject_identifier=None):
+        return self.screening_identifiers.get(subject_identifier)
+
+    def study_maternal_identifier(self, screening_identifier=None):
+        return self.study_maternal_identifiers.get(screening_identifier)
+
+    def previous_bhp_study(self, subject_identifier=None):
+        child_consent = self.child_consents.get(subject_identifier)
+        return getattr(child_consent, 'get_protocol', None)
+
+    def infant_gender(self, subject_identifier=None):
+        child_consent = self.child_consents.get(subject_identifier)
+        return getattr(child_consent, 'gender', None)
+
+    def child_hiv_exposure(self, subject_identifier=None,
+                           study_maternal_identifier=None,
+                           caregiver_subject_identifier=None):
+        if study_maternal_identifier:
+            infant_hiv_exposed = self.child_datasets.get(study_maternal_identifier)
+            if infant_hiv_exposed in ['Exposed', 'exposed']:
+                return 'HEU'
+            elif infant_hiv_exposed in ['Unexposed', 'unexposed']:
+                return 'HUU'
+            return None
+
+        maternal_hiv_status = self.rapid_test_results.get(
+            caregiver_subject_identifier)
+        if maternal_hiv_status is None:
+            maternal_hiv_status = self.antenatal_hiv_status.get(
+                (caregiver_subject_identifier, subject_identifier), 'UNK')
+
+        if maternal_hiv_status == POS:
+            return 'HEU'
+        elif maternal_hiv_status == NEG:
+            return 'HUU'
+        return 'UNK'
+
+    def tb_age_at_enrollment(self, subject_identifier=None):
+        tb_assent = self.tb_assents.get(subject_identifier)
+        if tb_assent:
+            dob, consent_datetime = tb_assent
+            return age(dob, consent_datetime).years
+
+    def get_cohort_details(self, subject_identifier):
+        return (self.enrol_cohorts.get(subject_identifier),
+                self.current_cohorts.get(subject_identifier))
+
+    def participant_context(self, subject_identifier):
+        """Returns the context columns of a participant, keyed by their export
+        column name.
+        """
+        try:
+            return self.contexts[subject_identifier]
+        except KeyError:
+            pass
+        caregiver_sid = self.caregiver_subject_identifier(subject_identifier)
+        screening_identifier = self.screening_identifier(caregiver_sid)
+        study_maternal_identifier = self.study_maternal_identifier(
+            screening_identifier)
+        enrol_cohort, current_cohort = self.get_cohort_details(subject_identifier)
+        context = self.contexts[subject_identifier] = dict(
+            childpid=subject_identifier,
+            matpid=caregiver_sid,
+            old_matpid=study_maternal_identifier,
+            previous_study=self.previous_bhp_study(subject_identifier),
+            child_exposure_status=self.child_hiv_exposure(
+                subject_identifier, study_maternal_identifier, caregiver_sid),
+            tb_enrollment=self.tb_age_at_enrollment(subject_identifier),
+            infant_sex=self.infant_gender(subject_identifier),
+            enrollment_cohort=enrol_cohort,
+            current_cohort=current_cohort)
+        return context
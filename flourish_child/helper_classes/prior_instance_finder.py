@@ -0,0 +1,104 @@
+from .utils import child_utils
+
+
+class PriorInstanceFinder:
+    """Finds the most recent instance of a CRF model on the appointments
+    before `appointment` with one query, using the subject's appointment
+    timeline.
+
+    Appointments before the first timeline appointment (reached through
+    `previous_by_timepoint`) are walked one by one as before.
+    """
+
+    def __init__(self, appointment=None, visit_model_attr='child_visit',
+                 include_current=False):
+        self.appointment = appointment
+        self.visit_model_attr = visit_model_attr
+        self.include_current = include_current
+        timeline = child_utils.appointment_timeline(appointment)
+        self.earlier_appointments = [
+            appt for appt in timeline.appointments
+            if appt.appt_datetime < appointment.appt_datetime]
+
+    @property
+    def appointment_ids(self):
+        appointment_ids = [appt.id for appt in self.earlier_appointments]
+        if self.include_current:
+            appointment_ids.append(self.appointment.id)
+        return appointment_ids
+
+    def find(self, model_cls, **options):
+        """ Returns the latest instance of `model_cls` before the appointment.
+            @param model_cls: CRF or requisition model class
+            @param options: extra filter options e.g. panel__id
+            @return: model instance or None.
+        """
+        return (self.latest_on_timeline(model_cls, **options)
+                or self.walk_before_timeline(model_cls, **options))
+
+    def find_many(self, model_classes, **options):
+        """ Batched `find` for many CRF models, e.g. on the subject dashboard.
+            Each model is queried once on the earlier timeline appointments,
+            the appointments before the timeline are walked once for all the
+            models not found there.
+            @return: dictionary of model class to instance or None.
+        """
+        instances = {model_cls: self.latest_on_timeline(model_cls, **options)
+                     for model_cls in model_classes}
+        missing = [model_cls for model_cls, obj in instances.items() if obj is None]
+        if missing:
+            positions = {appointment.id: position for position, appointment in
+                         enumerate(self.appointments_before_timeline())}
+            for model_cls in missing:
+                instances[model_cls] = self.first_before_timeline(
+                    model_cls, positions, **options)
+        return instances
+
+    def latest_on_timeline(self, model_cls, **options):
+        return model_cls.objects.filter(
+            **{f'{self.visit_model_attr}__appointment__in': self.appointment_ids},
+            **options).order_by(
+                f'-{self.visit_model_attr}__appointment__appt_datetime').first()
+
+    def first_before_timeline(self, model_cls, positions, **options):
+        """ Returns the instance `walk_before_timeline` would find, from one
+            query on the appointments it walks.
+            @param positions: dictionary of appointment id to walk position.
+        """
+        if not positions:
+            return None
+        objs = model_cls.objects.filter(
+            **{f'{self.visit_model_attr}__appointment__in': list(positions)},
+            **options).select_related(self.visit_model_attr)
+        return min(objs, default=None, key=lambda obj: positions[
+            getattr(obj, self.visit_model_attr).appointment_id])
+
+    def timeline_start(self):
+        if self.earlier_appointments:
+            return self.earlier_appointments[0].previous_by_timepoint
+        return self.appointment.previous_by_timepoint
+
+    def appointments_before_timeline(self):
+        """ Returns the appointments `walk_before_timeline` steps through,
+            most recent first.
+        """
+        appointments = []
+        appointment = self.timeline_start()
+        while appointment:
+            appointments.append(appointment)
+            appointment = child_utils.get_previous_appt_instance(appointment)
+            if appointment in self.earlier_appointments:
+                break
+        return appointments
+
+    def walk_before_timeline(self, model_cls, **options):
+        appointment = self.timeline_start()
+        while appointment:
+            try:
+                return model_cls.objects.get(
+                    **{f'{self.visit_model_attr}__appointment': appointment}, **options)
+            except model_cls.DoesNotExist:
+                appointment = child_utils.get_previous_appt_instance(appointment)
+                if appointment in self.earlier_appointments:
+                    break
+        return None
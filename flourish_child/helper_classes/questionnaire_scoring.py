@@ -0,0 +1,51 @@
+from django.apps import apps as django_apps
+
+
+def sum_score(values):
+    """Sums the item values, e.g. '0' to '3' on the DEPRESSION_SCALE.
+    """
+    return sum(int(value) for value in values)
+
+
+class Instrument:
+    """A scored questionnaire: the model, its item fields in scoring order, the
+    field the score is saved in and the scoring function, declared once for
+    the single row save and the bulk rescoring.
+    """
+
+    def __init__(self, name=None, model=None, item_fields=None, score_field=None,
+                 score_function=sum_score):
+        self.name = name
+        self.model = model
+        self.item_fields = list(item_fields)
+        self.score_field = score_field
+        self.score_function = score_function
+
+    @property
+    def model_cls(self):
+        return django_apps.get_model(self.model)
+
+    def score(self, values):
+        return self.score_function(values)
+
+    def score_obj(self, model_obj):
+        return self.score([getattr(model_obj, field) for field in self.item_fields])
+
+
+PHQ9 = Instrument(
+    name='phq9',
+    model='flourish_child.childphqdepressionscreening',
+    item_fields=['activity_interest', 'depressed', 'sleep_disorders',
+                 'fatigued', 'eating_disorders', 'self_doubt',
+                 'easily_distracted', 'restlessness', 'self_harm', ],
+    score_field='depression_score')
+
+GAD7 = Instrument(
+    name='gad7',
+    model='flourish_child.childgadanxietyscreening',
+    item_fields=['feeling_anxious', 'control_worrying', 'worrying',
+                 'trouble_relaxing', 'restlessness', 'easily_annoyed',
+                 'fearful', ],
+    score_field='anxiety_score')
+
+instruments = {instrument.name: instrument for instrument in [PHQ9, GAD7]}
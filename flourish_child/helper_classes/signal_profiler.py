@@ -0,0 +1,155 @@
+import os
+import socket
+import time
+from collections import deque
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+
+
+class HandlerStats:
+    """Rolling window of wall time, query count and query time samples of a
+    signal handler.
+    """
+
+    def __init__(self, window=None):
+        self.calls = 0
+        self.samples = deque(maxlen=window)
+
+    def add(self, wall_time, query_count, query_time):
+        self.calls += 1
+        self.samples.append((wall_time, query_count, query_time))
+
+    def percentile(self, values, percent):
+        values = sorted(values)
+        if not values:
+            return 0
+        index = min(len(values) - 1, round(percent / 100 * (len(values) - 1)))
+        return values[index]
+
+    def summary(self):
+        summary = {'calls': self.calls, 'window': len(self.samples)}
+        for position, name in enumerate(['wall_ms', 'queries', 'query_ms']):
+            values = [sample[position] for sample in self.samples]
+            for percent in (50, 90, 99):
+                value = self.percentile(values, percent)
+                if name != 'queries':
+                    value = round(value * 1000, 2)
+                summary[f'{name}_p{percent}'] = value
+        return summary
+
+
+class SignalProfiler:
+    """Opt-in instrumentation of signal receivers, enabled with
+    `settings.FLOURISH_CHILD_SIGNAL_PROFILING`.
+
+    Each call of an instrumented receiver records its wall time, the number
+    of DB queries it ran and the time spent in them. The statistics are kept
+    per process, and published every `publish_every` calls under a key of
+    their own to the shared `FLOURISH_CHILD_SIGNAL_STATS_CACHE` cache, so the
+    `signal_stats` command can read and merge those of every worker.
+    """
+
+    cache_key = 'flourish_child_signal_stats'
+    publish_every = 50
+    # statistics of a process not published for a day are dropped
+    stats_timeout = 24 * 60 * 60
+
+    def __init__(self, window=1000):
+        self.window = window
+        self.stats = {}
+        self.pending_publish = 0
+
+    @property
+    def enabled(self):
+        return getattr(settings, 'FLOURISH_CHILD_SIGNAL_PROFILING', False)
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'FLOURISH_CHILD_SIGNAL_STATS_CACHE', 'default')]
+
+    @property
+    def process_key(self):
+        return f'{socket.gethostname()}:{os.getpid()}'
+
+    @property
+    def processes_key(self):
+        return f'{self.cache_key}:processes'
+
+    def stats_key(self, process_key):
+        return f'{self.cache_key}:{process_key}'
+
+    def instrument(self, func):
+        """Decorator measuring each call of a signal receiver.
+        """
+        name = f'{func.__module__}.{func.__name__}'
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return func(*args, **kwargs)
+            query_stats = [0, 0.0]
+
+            def count_queries(execute, sql, params, many, context):
+                start = time.perf_counter()
+                try:
+                    return execute(sql, params, many, context)
+                finally:
+                    query_stats[0] += 1
+                    query_stats[1] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            try:
+                with connection.execute_wrapper(count_queries):
+                    return func(*args, **kwargs)
+            finally:
+                self.record(name, time.perf_counter() - start, *query_stats)
+        return wrapper
+
+    def record(self, name, wall_time, query_count, query_time):
+        handler_stats = self.stats.get(name)
+        if handler_stats is None:
+            handler_stats = self.stats[name] = HandlerStats(window=self.window)
+        handler_stats.add(wall_time, query_count, query_time)
+        self.pending_publish += 1
+        if self.pending_publish >= self.publish_every:
+            self.publish()
+
+    def summary(self):
+        return {name: handler_stats.summary()
+                for name, handler_stats in sorted(self.stats.items())}
+
+    def publish(self):
+        """Writes this process's statistics under its own key. The process
+        is added to the list of publishing processes if missing, so an entry
+        lost to a concurrent write is restored on the next publish.
+        """
+        self.pending_publish = 0
+        self.cache.set(self.stats_key(self.process_key), self.summary(),
+                       self.stats_timeout)
+        processes = self.cache.get(self.processes_key) or set()
+        if self.process_key not in processes:
+            processes.add(self.process_key)
+            self.cache.set(self.processes_key, processes, None)
+
+    def published(self):
+        """Returns the last published statistics of every process.
+        """
+        processes = self.cache.get(self.processes_key) or set()
+        published = self.cache.get_many(
+            [self.stats_key(process_key) for process_key in processes])
+        return {process_key: published[self.stats_key(process_key)]
+                for process_key in processes
+                if self.stats_key(process_key) in published}
+
+    def reset(self):
+        self.stats = {}
+        self.pending_publish = 0
+        processes = self.cache.get(self.processes_key) or set()
+        self.cache.delete_many(
+            [self.stats_key(process_key) for process_key in processes]
+            + [self.processes_key])
+
+signal_profiler = SignalProfiler()
@@ -0,0 +1,281 @@
+import csv
+import re
+from functools import lru_cache
+
+import numpy as np
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils.functional import cached_property
+from edc_base.utils import get_utcnow
+
+from ..choices import BRIEF2_SCALE, CBCL_SCALE
+
+
+def field_name(field):
+    return field.name
+
+
+def item_number(field):
+    """Returns the CBCL item number of a field from its help text, e.g.
+    '(56, a.)' is item '56a'.
+    """
+    return re.sub(r'\W', '', field.help_text or '')
+
+
+@lru_cache(maxsize=None)
+def norm_tables(norms_path=None):
+    """Returns the T-score lookup arrays, indexed by raw score, per
+    (instrument, subscale), read once per process from the
+    `FLOURISH_CHILD_SCORE_NORMS` csv (columns instrument, subscale, raw_score,
+    t_score). Raw scores missing from the csv look up as -1.
+    """
+    norms_path = norms_path or getattr(settings, 'FLOURISH_CHILD_SCORE_NORMS', None)
+    if not norms_path:
+        return {}
+    norms = {}
+    with open(norms_path, newline='') as norms_file:
+        for row in csv.DictReader(norms_file):
+            norms.setdefault((row['instrument'], row['subscale']), {})[
+                int(row['raw_score'])] = int(row['t_score'])
+    tables = {}
+    for key, t_scores in norms.items():
+        table = np.full(max(t_scores) + 1, -1, dtype=np.int64)
+        table[list(t_scores)] = list(t_scores.values())
+        tables[key] = table
+    return tables
+
+
+class SubscaleInstrument:
+    """A questionnaire scored into subscales, with its items spread over one
+    or more CRFs of the same visit.
+
+    The item fields are the fields of the CRFs with the instrument's choices.
+    Each subscale is declared by its item keys, and turned once into an array
+    of item columns, so a chunk of visits is scored with one NumPy sum per
+    subscale.
+    """
+
+    score_model = 'flourish_child.childsubscalescore'
+    child_visit_model = 'flourish_child.childvisit'
+
+    def __init__(self, name=None, models=None, choices=None, values=None,
+                 subscales=None, item_key=field_name):
+        self.name = name
+        self.models = list(models)
+        self.choices = choices
+        self.values = values
+        self.subscales = subscales
+        self.item_key = item_key
+
+    @property
+    def score_model_cls(self):
+        return django_apps.get_model(self.score_model)
+
+    @property
+    def child_visit_cls(self):
+        return django_apps.get_model(self.child_visit_model)
+
+    @cached_property
+    def items(self):
+        """ (model label, field name, item key) of every item, in column order.
+        """
+        items = []
+        for model in self.models:
+            for field in django_apps.get_model(model)._meta.get_fields():
+                choices = getattr(field, 'choices', None)
+                if choices and list(choices) == list(self.choices):
+                    items.append((model, field.name, self.item_key(field)))
+        return items
+
+    @cached_property
+    def model_columns(self):
+        """ Item fields and their columns per model.
+        """
+        columns = {model: ([], []) for model in self.models}
+        for column, (model, field, _) in enumerate(self.items):
+            columns[model][0].append(field)
+            columns[model][1].append(column)
+        return columns
+
+    @cached_property
+    def subscale_index(self):
+        """ Item columns of each subscale, all items if declared as None.
+        """
+        columns = {key: column for column, (_, _, key) in enumerate(self.items)}
+        return {subscale: np.array(
+            [columns[key] for key in keys] if keys else list(columns.values()),
+            dtype=np.int64) for subscale, keys in self.subscales.items()}
+
+    def load(self, child_visit_ids):
+        """ Returns the answers of the visits, one row per visit, and the
+            number of the instrument's CRFs captured at each visit.
+        """
+        position = {pk: index for index, pk in enumerate(child_visit_ids)}
+        answers = np.full((len(child_visit_ids), len(self.items)), None, dtype=object)
+        captured = np.zeros(len(child_visit_ids), dtype=np.int64)
+        for model, (fields, columns) in self.model_columns.items():
+            rows = django_apps.get_model(model).objects.filter(
+                child_visit_id__in=child_visit_ids).values_list(
+                    'child_visit_id', *fields)
+            for child_visit_id, *row_answers in rows:
+                answers[position[child_visit_id], columns] = row_answers
+                captured[position[child_visit_id]] += 1
+        return answers, captured
+
+    def encode(self, answers):
+        """ Returns the item values and whether each item was answered.
+        """
+        values = np.zeros(answers.shape, dtype=np.int64)
+        answered = np.zeros(answers.shape, dtype=bool)
+        for choice, value in self.values.items():
+            mask = answers == choice
+            values[mask] = value
+            answered |= mask
+        return values, answered
+
+    def raw_scores(self, values, answered):
+        """ Returns the raw scores and number of items answered per subscale.
+        """
+        return {subscale: (values[:, index].sum(axis=1), answered[:, index].sum(axis=1))
+                for subscale, index in self.subscale_index.items()}
+
+    def t_scores(self, subscale, raw_scores):
+        table = norm_tables().get((self.name, subscale))
+        if table is None:
+            return np.full(raw_scores.shape, -1, dtype=np.int64)
+        return table[np.minimum(raw_scores, len(table) - 1)]
+
+    def score(self, child_visit_ids):
+        """ Scores a chunk of visits.
+            @return: dictionary of (child visit id, subscale) to
+                     (raw score, T-score or None, items answered, complete),
+                     for the visits with at least one CRF captured.
+        """
+        child_visit_ids = list(child_visit_ids)
+        answers, captured = self.load(child_visit_ids)
+        values, answered = self.encode(answers)
+        scored = np.flatnonzero(captured)
+        complete = captured == len(self.models)
+        scores = {}
+        for subscale, (raw_scores, items_answered) in self.raw_scores(
+                values, answered).items():
+            t_scores = self.t_scores(subscale, raw_scores)
+            for row in scored:
+                scores[(child_visit_ids[row], subscale)] = (
+                    int(raw_scores[row]),
+                    int(t_scores[row]) if t_scores[row] >= 0 else None,
+                    int(items_answered[row]),
+                    bool(complete[row]))
+        return scores
+
+    def save_scores(self, child_visit_ids):
+        """ Scores the visits and writes the changed score rows, removing the
+            scores of visits with none of the instrument's CRFs left.
+            @return: number of score rows created, updated and deleted.
+        """
+        child_visit_ids = list(child_visit_ids)
+        scores = self.score(child_visit_ids)
+        score_model_cls = self.score_model_cls
+        score_fields = ['raw_score', 't_score', 'items_answered', 'complete']
+        with transaction.atomic():
+            existing = {
+                (obj.child_visit_id, obj.subscale): obj
+                for obj in score_model_cls.objects.filter(
+                    instrument=self.name, child_visit_id__in=child_visit_ids)}
+            created, updated = [], []
+            for (child_visit_id, subscale), values in scores.items():
+                obj = existing.pop((child_visit_id, subscale), None)
+                if obj is None:
+                    created.append(score_model_cls(
+                        child_visit_id=child_visit_id, instrument=self.name,
+                        subscale=subscale, **dict(zip(score_fields, values))))
+                elif tuple(getattr(obj, field) for field in score_fields) != values:
+                    for field, value in zip(score_fields, values):
+                        setattr(obj, field, value)
+                    obj.modified = get_utcnow()
+                    updated.append(obj)
+            score_model_cls.objects.bulk_create(created, batch_size=1000)
+            score_model_cls.objects.bulk_update(
+                updated, score_fields + ['modified'], batch_size=1000)
+            deleted = len(existing)
+            if existing:
+                score_model_cls.objects.filter(
+                    id__in=[obj.id for obj in existing.values()]).delete()
+        return len(created), len(updated), deleted
+
+    def child_visit_chunks(self, chunk_size=1000):
+        """ Yields the ids of the visits with any of the instrument's CRFs, in
+            chunks paged on the visit id.
+        """
+        query = Q()
+        for model in self.models:
+            model_name = django_apps.get_model(model)._meta.model_name
+            query |= Q(**{f'{model_name}__isnull': False})
+        queryset = self.child_visit_cls.objects.filter(query).order_by('id')
+        last_pk = None
+        while True:
+            chunk = queryset if last_pk is None else queryset.filter(id__gt=last_pk)
+            child_visit_ids = list(chunk.values_list('id', flat=True)[:chunk_size])
+            if not child_visit_ids:
+                return
+            last_pk = child_visit_ids[-1]
+            yield child_visit_ids
+
+
+# CBCL/6-18 syndrome scales by item number.
+CBCL_SYNDROMES = {
+    'anxious_depressed': '14 29 30 31 32 33 35 45 50 52 71 91 112',
+    'withdrawn_depressed': '5 42 65 69 75 102 103 111',
+    'somatic_complaints': '47 49 51 54 56a 56b 56c 56d 56e 56f 56g',
+    'social_problems': '11 12 25 27 34 36 38 48 62 64 79',
+    'thought_problems': '9 18 40 46 58 59 60 66 70 76 83 84 85 92 100',
+    'attention_problems': '1 4 8 10 13 17 41 61 78 80',
+    'rule_breaking': '2 26 28 39 43 63 67 72 73 81 82 90 96 99 101 105 106',
+    'aggressive_behavior': '3 16 19 20 21 22 23 37 57 68 86 87 88 89 94 95 97 104',
+}
+CBCL_SYNDROMES = {scale: items.split() for scale, items in CBCL_SYNDROMES.items()}
+
+CBCL = SubscaleInstrument(
+    name='cbcl',
+    models=['flourish_child.childcbclsection1', 'flourish_child.childcbclsection2',
+            'flourish_child.childcbclsection3', 'flourish_child.childcbclsection4'],
+    choices=CBCL_SCALE,
+    values={'not_true': 0, 'somewhat': 1, 'very_true': 2},
+    item_key=item_number,
+    subscales={
+        **CBCL_SYNDROMES,
+        'internalizing': (CBCL_SYNDROMES['anxious_depressed']
+                          + CBCL_SYNDROMES['withdrawn_depressed']
+                          + CBCL_SYNDROMES['somatic_complaints']),
+        'externalizing': (CBCL_SYNDROMES['rule_breaking']
+                          + CBCL_SYNDROMES['aggressive_behavior']),
+        'total_problems': None,
+    })
+
+BRIEF2_VALUES = {'never': 1, 'sometimes': 2, 'often': 3}
+
+BRIEF2_PARENT = SubscaleInstrument(
+    name='brief2_parent',
+    models=['flourish_child.brief2parent'],
+    choices=BRIEF2_SCALE,
+    values=BRIEF2_VALUES,
+    subscales={'total': None})
+
+BRIEF2_SELF = SubscaleInstrument(
+    name='brief2_self',
+    models=['flourish_child.brief2selfreported'],
+    choices=BRIEF2_SCALE,
+    values=BRIEF2_VALUES,
+    subscales={'total': None})
+
+subscale_instruments = {
+    instrument.name: instrument for instrument in [CBCL, BRIEF2_PARENT, BRIEF2_SELF]}
+
+
+def instrument_for_model(model_label):
+    for instrument in subscale_instruments.values():
+        if model_label in instrument.models:
+            return instrument
+    return None
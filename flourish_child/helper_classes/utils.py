@@ -1,19 +1,19 @@
-import os
-import PIL
-import pyminizip
-import pypdfium2 as pdfium
-from PIL import Image
-
 from datetime import datetime
+from functools import partial
+
 from django.apps import apps as django_apps
 from django.conf import settings
-from django.contrib.auth.models import User, Group
 from django.core.exceptions import ValidationError
+from django.db import transaction
 from django.db.models import Q
-from edc_action_item.site_action_items import site_action_items
 from edc_base.utils import get_utcnow
-from edc_constants.constants import OPEN, NEW
-from edc_data_manager.models import DataActionItem
+
+from .action_item_triggers import action_item_triggers
+from .appointment_timeline import AppointmentTimeline
+from .file_encryptor import encrypt_path, remove_file
+from .image_stamper import add_stamp, stamp_file, stamp_pdf
+from .notification_dispatcher import notifications
+from .identity_cache import IdentityCache
 
 
 class ChildUtils:
@@ -25,6 +25,15 @@ class ChildUtils:
     prior_screening_model = 'flourish_caregiver.screeningpriorbhpparticipants'
     consent_version_model = 'flourish_caregiver.flourishconsentversion'
     child_assent_model = 'flourish_child.childassent'
+    appointment_model = 'flourish_child.appointment'
+
+    def __init__(self):
+        self.identity_cache = IdentityCache(sources={
+            'caregiver_subject_identifier': self.child_dummy_consent_model,
+            'preg_screening': self.preg_screening_model,
+            'prior_screening': self.prior_screening_model,
+            'consent_version': self.consent_version_model,
+            'appointment_timeline': self.appointment_model})
 
     @property
     def child_assent_model_cls(self):
@@ -55,6 +64,11 @@ class ChildUtils:
         return django_apps.get_model(self.consent_version_model)
 
     def caregiver_subject_identifier(self, subject_identifier=None):
+        return self.identity_cache.get_or_set(
+            'caregiver_subject_identifier', subject_identifier,
+            lambda: self._caregiver_subject_identifier(subject_identifier))
+
+    def _caregiver_subject_identifier(self, subject_identifier):
         childconsent_obj = self.child_dummy_consent_model_cls.objects.filter(
             subject_identifier=subject_identifier).last()
 
@@ -72,6 +86,11 @@ class ChildUtils:
     def preg_screening_model_obj(self, subject_identifier=None):
         caregiver_sid = self.caregiver_subject_identifier(
             subject_identifier=subject_identifier)
+        return self.identity_cache.get_or_set(
+            'preg_screening', caregiver_sid,
+            lambda: self._preg_screening_model_obj(caregiver_sid))
+
+    def _preg_screening_model_obj(self, caregiver_sid):
         try:
             preg_screening = self.preg_screening_model_cls.objects.get(
                 subject_identifier=caregiver_sid)
@@ -83,6 +102,11 @@ class ChildUtils:
     def prior_screening_model_obj(self, subject_identifier=None):
         caregiver_sid = self.caregiver_subject_identifier(
             subject_identifier=subject_identifier)
+        return self.identity_cache.get_or_set(
+            'prior_screening', caregiver_sid,
+            lambda: self._prior_screening_model_obj(caregiver_sid))
+
+    def _prior_screening_model_obj(self, caregiver_sid):
         try:
             prior_screening = self.prior_screening_model_cls.objects.get(
                 subject_identifier=caregiver_sid)
@@ -101,9 +125,15 @@ class ChildUtils:
                 'Missing Subject Screening form. Please complete '
                 'it before proceeding.')
 
+        screening_identifier = subject_screening_obj.screening_identifier
+        return self.identity_cache.get_or_set(
+            'consent_version', screening_identifier,
+            lambda: self._consent_version(screening_identifier))
+
+    def _consent_version(self, screening_identifier):
         try:
             consent_version_obj = self.consent_version_cls.objects.get(
-                screening_identifier=subject_screening_obj.screening_identifier)
+                screening_identifier=screening_identifier)
         except self.consent_version_cls.DoesNotExist:
             raise ValidationError(
                 'Missing Consent Version form. Please complete '
@@ -119,123 +149,64 @@ class ChildUtils:
         return list(onschedules)
 
 
+    def appointment_timeline(self, appointment):
+        appointment_model_cls = appointment.__class__
+        return self.identity_cache.get_or_set(
+            'appointment_timeline',
+            (appointment_model_cls._meta.label_lower, appointment.subject_identifier),
+            lambda: AppointmentTimeline.for_subject(
+                appointment_model_cls, appointment.subject_identifier))
+
     def get_previous_appt_instance(self, appointment):
-        schedule_names = self.get_onschedule_names(appointment)
-        try:
-            previous_appt = appointment.__class__.objects.filter(
-                subject_identifier=appointment.subject_identifier,
-                appt_datetime__lt=appointment.appt_datetime,
-                schedule_name__in=schedule_names,
-                visit_code_sequence=0).latest('appt_datetime')
-        except appointment.__class__.DoesNotExist:
-            return appointment.previous_by_timepoint
-        else:
-            return previous_appt
+        previous_appt = self.appointment_timeline(appointment).previous(
+            appointment.appt_datetime)
+        return previous_appt or appointment.previous_by_timepoint
+
+    def previous_instances(self, appointment, model_classes,
+                           visit_model_attr='child_visit'):
+        """ Returns the latest instance of each CRF model before `appointment`,
+            e.g. for the subject dashboard, with one query per model.
+            @return: dictionary of model class to instance or None.
+        """
+        from .prior_instance_finder import PriorInstanceFinder
+        return PriorInstanceFinder(
+            appointment=appointment,
+            visit_model_attr=visit_model_attr).find_many(model_classes)
 
 child_utils = ChildUtils()
 
 
 def notification(subject_identifier, subject, user_created,
                  group_names=('assignable users',), comment=''):
-    if user_created:
-        try:
-            user = User.objects.get(username=user_created)
-        except User.DoesNotExist:
-            pass
-        else:
-            try:
-                user.groups.get(name__in=group_names)
-            except Group.DoesNotExist:
-                groups = Group.objects.filter(name__in=group_names)
-                for group in groups:
-                    user.groups.add(group)
-                user.save()
-            finally:
-                DataActionItem.objects.create(
-                    subject_identifier=subject_identifier,
-                    user_created=user_created,
-                    status=OPEN,
-                    action_priority='high',
-                    assigned=user.username,
-                    subject=subject,
-                    comment=comment)
+    """ Assign a high priority DataActionItem to `user_created` once the current
+        transaction commits, unless the participant already has one with the
+        same subject.
+    """
+    notifications.add(subject_identifier, subject, user_created=user_created,
+                      group_names=group_names, comment=comment)
 
 
 def trigger_action_item(model_cls, action_name, subject_identifier, repeat=False):
-    action_cls = site_action_items.get(
-        model_cls.action_name)
-    action_item_model_cls = action_cls.action_item_model_cls()
-
-    try:
-        model_cls.objects.get(subject_identifier=subject_identifier)
-    except model_cls.DoesNotExist:
-        trigger = True
-    else:
-        trigger = repeat
-    if trigger:
-        try:
-            action_item_obj = action_item_model_cls.objects.get(
-                subject_identifier=subject_identifier,
-                action_type__name=action_name)
-        except action_item_model_cls.DoesNotExist:
-            action_cls = site_action_items.get(action_name)
-            action_cls(subject_identifier=subject_identifier)
-        else:
-            action_item_obj.status = OPEN
-            action_item_obj.save()
-    else:
-        try:
-            action_item = action_item_model_cls.objects.get(
-                Q(status=NEW) | Q(status=OPEN),
-                subject_identifier=subject_identifier,
-                action_type__name=action_name)
-        except action_item_model_cls.DoesNotExist:
-            pass
-        else:
-            action_item.delete()
+    """ Open or create the action item, or delete it if the action's model exists
+        and `repeat` is False, once the current transaction commits.
+    """
+    action_item_triggers.add(model_cls, action_name, subject_identifier, repeat=repeat)
 
 
 def stamp_image(instance):
     filefield = instance.image
     filename = filefield.name  # gets the "normal" file name as it was uploaded
     storage = filefield.storage
-    path = storage.path(filename)
-    if '.pdf' not in path:
-        base_image = Image.open(path)
-        stamped_img = add_image_stamp(base_image=base_image)
-        stamped_img.save(path)
-    else:
-        print_pdf(path)
+    stamp_file(storage.path(filename))
 
 
 def add_image_stamp(base_image=None, position=(25, 25), resize=(500, 500)):
     """
     Superimpose image of a stamp over copy of the base image
-    @param image_path: dir to base image
-    @param dont_save: boolean for not saving the image just converting
+    @param base_image: image to stamp
     @param position: pixels(w,h) to superimpose stamp at
     """
-    stamp = Image.open('media/stamp/true-copy.png')
-    if resize:
-        stamp = stamp.resize(resize, PIL.Image.ANTIALIAS)
-
-    width, height = base_image.size
-    stamp_width, stamp_height = stamp.size
-
-    # Determine orientation of the base image before pasting stamp
-    if width < height:
-        pos_width = round(width / 2) - round(stamp_width / 2)
-        pos_height = height - stamp_height
-        position = (pos_width, pos_height)
-    elif width > height:
-        stamp = stamp.rotate(90)
-        pos_width = width - stamp_width
-        pos_height = round(height / 2) - round(stamp_height / 2)
-        position = (pos_width, pos_height)
-
-    # paste stamp over image
-    base_image.paste(stamp, position, mask=stamp)
-    return base_image
+    return add_stamp(base_image=base_image, position=position, resize=resize)
 
 
 def encrypt_files(instance, subject_identifier):
@@ -244,29 +215,21 @@ def encrypt_files(instance, subject_identifier):
         upload_to = f'{instance.image.field.upload_to}'
         timestamp = datetime.timestamp(get_utcnow())
         zip_filename = f'{subject_identifier}_{timestamp}.zip'
-        with open('filekey.key', 'r') as filekey:
-            key = filekey.read().rstrip()
-        com_lvl = 8
-        pyminizip.compress(f'{instance.image.path}', None,
-                           f'{base_path}/{upload_to}{zip_filename}', key, com_lvl)
-    # remove unencrypted file
-    if os.path.exists(f'{instance.image.path}'):
-        os.remove(f'{instance.image.path}')
-    instance.image = f'{upload_to}{zip_filename}'
-    instance.save()
+        path = instance.image.path
+        zip_path = f'{base_path}/{upload_to}{zip_filename}'
+        encrypt_path(path, zip_path)
+        instance.image = f'{upload_to}{zip_filename}'
+        try:
+            with transaction.atomic():
+                # update the path without firing the post save handlers again
+                instance.__class__.objects.filter(pk=instance.pk).update(
+                    image=instance.image.name)
+                # remove unencrypted file once the row points at the zip
+                transaction.on_commit(partial(remove_file, path))
+        except Exception:
+            remove_file(zip_path)
+            raise
 
 
 def print_pdf(filepath):
-    pdf = pdfium.PdfDocument(filepath)
-    page_indices = [i for i in range(len(pdf))]
-    renderer = pdf.render_to(
-        pdfium.BitmapConv.pil_image,
-        page_indices=page_indices,
-        scale=300 / 72
-    )
-    stamped_pdf_images = []
-    for image, _ in zip(renderer, page_indices):
-        stamped_pdf_images.append(add_image_stamp(base_image=image))
-    first_img = stamped_pdf_images[0]
-    first_img.save(filepath, save_all=True,
-                   append_images=stamped_pdf_images[1:])
+    stamp_pdf(filepath)
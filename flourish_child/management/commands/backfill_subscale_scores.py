@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...helper_classes.subscale_scoring import subscale_instruments
+
+
+class Command(BaseCommand):
+    help = 'Score the CBCL and BRIEF-2 subscales of the questionnaires already captured.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'instruments', nargs='*',
+            help=f'Instruments to score, any of {", ".join(subscale_instruments)}. '
+                 'Defaults to all.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Number of visits read and scored at a time.')
+
+    def handle(self, *args, **options):
+        for name in options['instruments'] or list(subscale_instruments):
+            try:
+                instrument = subscale_instruments[name]
+            except KeyError:
+                raise CommandError(f'Unknown instrument {name}.')
+            start = time.perf_counter()
+            visits, created, updated, deleted = 0, 0, 0, 0
+            for child_visit_ids in instrument.child_visit_chunks(
+                    chunk_size=options['chunk_size']):
+                chunk_created, chunk_updated, chunk_deleted = instrument.save_scores(
+                    child_visit_ids)
+                visits += len(child_visit_ids)
+                created += chunk_created
+                updated += chunk_updated
+                deleted += chunk_deleted
+                self.stdout.write(f'{name}: {visits} visits scored', ending='\r')
+            self.stdout.write('')
+            self.stdout.write(self.style.SUCCESS(
+                f'{name}: scored {visits} visits, {created} scores created, '
+                f'{updated} updated, {deleted} deleted, in '
+                f'{time.perf_counter() - start:.1f}s.'))
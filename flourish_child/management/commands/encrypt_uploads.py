@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...helper_classes.file_encryptor import ENCRYPTED_FILE_FIELDS, FileEncryptor
+
+
+class Command(BaseCommand):
+    help = ('Encrypt the uploaded clinician notes images and TB interview files '
+            'in MEDIA_ROOT that are not encrypted yet.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models', nargs='*',
+            help='Model labels to encrypt, e.g. flourish_child.tbadolinterview. '
+                 'Defaults to every model with encrypted uploads.')
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Number of files encrypted at the same time.')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only count the files waiting to be encrypted.')
+
+    def handle(self, *args, **options):
+        model_labels = options['models'] or list(ENCRYPTED_FILE_FIELDS)
+        for model_label in model_labels:
+            if model_label not in ENCRYPTED_FILE_FIELDS:
+                raise CommandError(f'{model_label} has no encrypted uploads.')
+
+            encryptor = FileEncryptor(
+                model_label=model_label,
+                max_workers=options['workers'],
+                stdout=self.stdout)
+            backlog = list(encryptor.backlog())
+            if options['dry_run']:
+                self.stdout.write(f'{model_label}: {len(backlog)} files to encrypt.')
+                continue
+
+            encrypted, failures = encryptor.encrypt_files(backlog)
+            self.stdout.write('')
+            for object_id, error in failures:
+                self.stderr.write(f'{model_label} {object_id}: {error}')
+            self.stdout.write(self.style.SUCCESS(
+                f'{model_label}: encrypted {encrypted} of {len(backlog)} files.'))
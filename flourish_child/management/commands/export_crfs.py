@@ -0,0 +1,48 @@
+from django.apps import apps as django_apps
+from django.core.management.base import BaseCommand, CommandError
+
+from ...helper_classes.export_job_runner import ExportJobRunner
+from ...models import ExportJob
+
+
+class Command(BaseCommand):
+    help = ('Export CRFs to chunked CSV files under MEDIA_ROOT/exports, '
+            'e.g. for nightly dumps.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models', nargs='*',
+            help='Model labels to export, e.g. flourish_child.childvisit. '
+                 'Defaults to every flourish_child CRF.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=5000,
+            help='Number of objects written per output file.')
+        parser.add_argument(
+            '--resume', metavar='JOB_ID',
+            help='Resume an interrupted export job from its last finished chunk.')
+
+    def handle(self, *args, **options):
+        if options['resume']:
+            try:
+                export_jobs = [ExportJob.objects.get(id=options['resume'])]
+            except ExportJob.DoesNotExist:
+                raise CommandError(f'Export job {options["resume"]} does not exist.')
+        else:
+            export_jobs = [
+                ExportJob.objects.create(
+                    model_label=model_label,
+                    chunk_size=options['chunk_size'],
+                    user_created='export_crfs')
+                for model_label in options['models'] or self.crf_model_labels]
+
+        for export_job in export_jobs:
+            ExportJobRunner(job=export_job, stdout=self.stdout).run()
+            self.stdout.write(self.style.SUCCESS(
+                f'{export_job.model_label}: exported {export_job.rows_done} rows '
+                f'to {export_job.output_dir}'))
+
+    @property
+    def crf_model_labels(self):
+        app_config = django_apps.get_app_config('flourish_child')
+        return [model_cls._meta.label_lower for model_cls in app_config.get_models()
+                if 'child_visit' in [field.name for field in model_cls._meta.fields]]
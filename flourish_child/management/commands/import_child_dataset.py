@@ -0,0 +1,51 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...helper_classes.child_dataset_importer import ChildDatasetImporter
+
+
+class Command(BaseCommand):
+    help = ('Import the infant dataset from a csv or xlsx file, creating new '
+            'study child identifiers and updating the ones that changed.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='csv or xlsx file to import.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Number of rows read and written at a time.')
+        parser.add_argument(
+            '--sheet', help='xlsx worksheet to read, defaults to the active one.')
+        parser.add_argument(
+            '--errors',
+            help='csv file the rows that could not be imported are written to, '
+                 'defaults to <path>.errors.csv.')
+        parser.add_argument(
+            '--no-update', action='store_false', dest='update',
+            help='Skip rows whose study child identifier is already captured.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.isfile(path):
+            raise CommandError(f'File {path} does not exist.')
+        error_path = options['errors'] or f'{os.path.splitext(path)[0]}.errors.csv'
+
+        with open(error_path, 'w', newline='') as error_file:
+            importer = ChildDatasetImporter(
+                chunk_size=options['chunk_size'], error_file=error_file,
+                update=options['update'])
+            try:
+                result = importer.import_file(
+                    path, sheet=options['sheet'],
+                    progress=lambda result: self.stdout.write(
+                        f'{result.rows} rows imported '
+                        f'({result.rows_per_second:.0f} rows/s)', ending='\r'))
+            except (KeyError, ValueError) as e:
+                raise CommandError(e)
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS(f'Imported {path}: {result}.'))
+        if result.errors:
+            self.stdout.write(self.style.WARNING(
+                f'{result.errors} rows were not imported, see {error_path}.'))
+        else:
+            os.remove(error_path)
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from ...helper_classes.outbox import outbox
+
+
+class Command(BaseCommand):
+    help = ('Queue the outbox jobs that were never picked up, were left running by '
+            'a crashed worker or are due for a retry. django-q runs this every '
+            'FLOURISH_CHILD_OUTBOX_REQUEUE_MINUTES through the '
+            '"flourish_child_process_outbox" schedule.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sync', action='store_true',
+            help='Run the jobs in this process instead of queueing them.')
+
+    def handle(self, *args, **options):
+        requeued = outbox.requeue(sync=options['sync'])
+        self.stdout.write(self.style.SUCCESS(f'Requeued {requeued} outbox jobs.'))
+        for row in outbox.job_model_cls.objects.values('job_name', 'status').annotate(
+                jobs=Count('id')).order_by('job_name', 'status'):
+            self.stdout.write(f'{row["job_name"]}: {row["jobs"]} {row["status"]}')
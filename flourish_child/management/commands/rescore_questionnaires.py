@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...helper_classes.bulk_rescorer import BulkRescorer
+from ...helper_classes.questionnaire_scoring import instruments
+
+
+class Command(BaseCommand):
+    help = 'Recalculate the saved scores of the PHQ-9 and GAD-7 questionnaires.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'instruments', nargs='*',
+            help=f'Instruments to rescore, any of {", ".join(instruments)}. '
+                 'Defaults to all.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=5000,
+            help='Number of rows read and scored at a time.')
+
+    def handle(self, *args, **options):
+        for name in options['instruments'] or list(instruments):
+            try:
+                instrument = instruments[name]
+            except KeyError:
+                raise CommandError(f'Unknown instrument {name}.')
+            start = time.perf_counter()
+            total, updated = BulkRescorer(
+                instrument=instrument,
+                chunk_size=options['chunk_size'],
+                stdout=self.stdout).rescore()
+            self.stdout.write('')
+            self.stdout.write(self.style.SUCCESS(
+                f'{name}: rescored {total} rows, {updated} changed, in '
+                f'{time.perf_counter() - start:.1f}s.'))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from ...helper_classes.signal_profiler import signal_profiler
+
+
+class Command(BaseCommand):
+    help = ('Show the wall time, query count and query time percentiles of the '
+            'flourish_child signal handlers, as published by each process.')
+
+    columns = ['calls', 'wall_ms_p50', 'wall_ms_p90', 'wall_ms_p99',
+               'queries_p50', 'queries_p99', 'query_ms_p50', 'query_ms_p99']
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Clear the published statistics.')
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            signal_profiler.reset()
+            self.stdout.write(self.style.SUCCESS('Signal statistics cleared.'))
+            return
+
+        if not signal_profiler.enabled:
+            self.stdout.write(self.style.WARNING(
+                'FLOURISH_CHILD_SIGNAL_PROFILING is off, no new calls are recorded.'))
+
+        published = signal_profiler.published()
+        if not published:
+            self.stdout.write('No signal statistics published yet.')
+        for process, handlers in sorted(published.items()):
+            self.stdout.write(self.style.MIGRATE_HEADING(process))
+            self.stdout.write(
+                f'{"handler":<60}' + ''.join(f'{column:>14}' for column in self.columns))
+            for name, summary in handlers.items():
+                self.stdout.write(
+                    f'{name.rsplit(".", 1)[-1]:<60}'
+                    + ''.join(f'{summary.get(column, ""):>14}' for column in self.columns))
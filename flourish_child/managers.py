@@ -1,8 +1,11 @@
-import pytz
-from django.db import models
-from django.db.models.deletion import ProtectedError
+from itertools import takewhile
+
+from django.db import models, transaction
+from django.db.models import Case, DateTimeField, F, QuerySet, Value, When
+from django.db.models.deletion import PROTECT, ProtectedError
 from edc_appointment.constants import NEW_APPT
 from edc_appointment.managers import AppointmentManager as EdcAppointmentManager
+from edc_visit_schedule.site_visit_schedules import site_visit_schedules
 
 
 class AppointmentManager(EdcAppointmentManager, models.Manager):
@@ -39,31 +42,88 @@ class AppointmentManager(EdcAppointmentManager, models.Manager):
                     options.update(dict(schedule_name=schedule_name))
             options.update(dict(visit_schedule_name=visit_schedule_name))
 
-        appt_options = options.copy()
-        appt_options.update({f'appt_datetime__{op}': dt})
-        future_appts = self.filter(**appt_options).order_by('-timepoint')
-        deleted = self.delete_appointment(appointments=future_appts)
+        with transaction.atomic():
+            appt_options = options.copy()
+            appt_options.update({f'appt_datetime__{op}': dt})
+            future_appts = self.filter(**appt_options).order_by('-timepoint')
+            deleted = self.delete_appointment(appointments=future_appts)
 
-        # Checks if there's any new appointments remaining that have a future
-        # upper window period opening, and removes them too.
-        appt_options = options.copy()
-        appt_options.update({f'appt_status': NEW_APPT})
-        appointments = self.filter(**appt_options).order_by('-timepoint')
-        future_by_upper = []
-        for appt in appointments:
-            visit_definition = appt.visits.get(appt.visit_code)
-            latest_appt_date = (
-                appt.timepoint_datetime + visit_definition.rupper).astimezone(
-                    pytz.timezone('Africa/Gaborone'))
-            if latest_appt_date >= dt:
-                future_by_upper.append(appt)
-        deleted += self.delete_appointment(appointments=future_by_upper, deleted=deleted)
+            # Checks if there's any new appointments remaining that have a future
+            # upper window period opening, and removes them too.
+            appt_options = options.copy()
+            appt_options.update({f'appt_status': NEW_APPT})
+            appointments = self.filter(**appt_options)
+            future_by_upper = appointments.annotate(
+                earliest_timepoint_datetime=self.upper_window_threshold(
+                    appointments, dt)).filter(
+                        timepoint_datetime__gte=F('earliest_timepoint_datetime')).order_by(
+                            '-timepoint')
+            deleted += self.delete_appointment(
+                appointments=future_by_upper, deleted=deleted)
         return deleted
 
+    def upper_window_threshold(self, appointments, dt):
+        """ Returns an expression of the earliest timepoint datetime whose upper
+            window (timepoint_datetime + rupper) is on or after `dt`, per visit of
+            each schedule the appointments are on.
+        """
+        schedules = appointments.order_by().values_list(
+            'visit_schedule_name', 'schedule_name').distinct()
+        thresholds = []
+        for visit_schedule_name, schedule_name in schedules:
+            visit_schedule = site_visit_schedules.get_visit_schedule(visit_schedule_name)
+            schedule = visit_schedule.schedules.get(schedule_name)
+            for visit in schedule.visits.values():
+                thresholds.append(When(
+                    visit_schedule_name=visit_schedule_name,
+                    schedule_name=schedule_name,
+                    visit_code=visit.code,
+                    then=Value(dt - visit.rupper)))
+        return Case(*thresholds, default=Value(None), output_field=DateTimeField())
+
+    def protected_appointment_ids(self, appointment_ids):
+        """ Returns the ids of the appointments referenced by a protected
+            relation, e.g. a visit, with one query per relation.
+        """
+        protected = set()
+        for relation in self.model._meta.related_objects:
+            if relation.on_delete is PROTECT:
+                protected.update(relation.related_model._base_manager.filter(
+                    **{f'{relation.field.name}__in': appointment_ids}).values_list(
+                        relation.field.attname, flat=True))
+        return protected
+
     def delete_appointment(self, appointments=[], deleted=0):
-        for appointment in appointments:
+        """ Deletes the appointments in order up to the first protected one,
+            in one set based delete.
+
+            Appointments protected through a cascaded relation, e.g. the CRFs
+            of a cascaded visit, are not seen by `protected_appointment_ids`,
+            if the set based delete is protected they are deleted one by one.
+        """
+        if isinstance(appointments, QuerySet):
+            appointment_ids = list(appointments.values_list('id', flat=True))
+        else:
+            appointment_ids = [appointment.id for appointment in appointments]
+        protected = self.protected_appointment_ids(appointment_ids)
+        deletable_ids = list(takewhile(lambda idx: idx not in protected, appointment_ids))
+        if deletable_ids:
+            try:
+                with transaction.atomic():
+                    _, deleted_per_model = self.filter(id__in=deletable_ids).delete()
+            except ProtectedError:
+                return self.delete_each_appointment(deletable_ids, deleted=deleted)
+            deleted += deleted_per_model.get(self.model._meta.label, 0)
+        return deleted
+
+    def delete_each_appointment(self, appointment_ids, deleted=0):
+        """ Deletes the appointments one by one in order, up to the first
+            protected one.
+        """
+        appointments = self.in_bulk(appointment_ids)
+        for appointment_id in appointment_ids:
             try:
-                appointment.delete()
+                appointments[appointment_id].delete()
                 deleted += 1
             except ProtectedError:
                 break
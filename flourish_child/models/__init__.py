@@ -50,12 +50,14 @@ from .child_previous_hospitalization import ChildPreHospitalizationInline, \
 from .child_requisition import ChildRequisition
 from .child_requisition_result import ChildRequisitionResult, ChildResultValue
 from .child_socio_demographic import ChildSocioDemographic
+from .child_subscale_score import ChildSubscaleScore
 from .child_tanner_staging import ChildTannerStaging
 from .child_tb_referral import ChildTBReferral
 from .child_tb_referral_outcome import ChildTBReferralOutcome
 from .child_tb_screening import ChildTBScreening
 from .child_visit import ChildVisit
 from .child_working_status import ChildWorkingStatus
+from .export_job import ExportJob
 from .infant_arv_exposure import InfantArvExposure
 from .infant_arv_prophylaxis import ChildArvProphDates, InfantArvProphylaxis
 from .infant_congenital_anomalies import BaseCnsItem, InfantCongenitalAnomalies
@@ -102,6 +104,7 @@ from .onschedule import OnScheduleChildCohortCPool, \
 from .onschedule import OnScheduleChildCohortCQuarterly
 from .onschedule import OnScheduleChildTbAdolSchedule
 from .onschedule import OnScheduleTbAdolFollowupSchedule
+from .outbox_job import OutboxJob
 from .pre_flourish_birth_data import PreFlourishBirthData
 from .signals import child_consent_on_post_save
 from .tb_adol_assent import TbAdolAssent
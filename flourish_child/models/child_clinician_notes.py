@@ -3,8 +3,10 @@ from django.utils.html import mark_safe
 from edc_base.model_mixins import BaseUuidModel
 from edc_base.utils import get_utcnow
 from edc_consent.field_mixins import VerificationFieldsMixin
+from edc_constants.constants import PENDING
 
 from .child_crf_model_mixin import ChildCrfModelMixin
+from ..choices import STAMP_STATUS
 
 
 class ChildClinicianNotes(VerificationFieldsMixin, ChildCrfModelMixin):
@@ -32,6 +34,29 @@ class ClinicianNotesImage(BaseUuidModel):
     datetime_captured = models.DateTimeField(
         default=get_utcnow)
 
+    stamp_status = models.CharField(
+        verbose_name='Stamp status',
+        max_length=10,
+        choices=STAMP_STATUS,
+        default=PENDING,
+        editable=False)
+
+    stamped_datetime = models.DateTimeField(
+        null=True,
+        editable=False)
+
+    stamp_pages = models.IntegerField(
+        null=True,
+        editable=False)
+
+    stamp_seconds = models.FloatField(
+        null=True,
+        editable=False)
+
+    stamp_error = models.TextField(
+        null=True,
+        editable=False)
+
     def clinician_notes_image(self):
         return mark_safe(
             '<a href="%(url)s">'
@@ -1,5 +1,4 @@
 from edc_visit_schedule.model_mixins import SubjectScheduleCrfModelMixin
-from django.apps import apps as django_apps
 from django.core.exceptions import ValidationError
 from django.db import models
 from django.db.models.deletion import PROTECT
@@ -13,6 +12,7 @@ from edc_visit_tracking.model_mixins import CrfModelMixin as BaseCrfModelMixin
 from edc_visit_tracking.model_mixins import PreviousVisitModelMixin
 
 from .child_visit import ChildVisit
+from ..helper_classes.consent_version_service import consent_versions
 from ..visit_sequence import VisitSequence
 
 
@@ -43,16 +43,11 @@ class ChildCrfModelMixin(
         super().save(*args, **kwargs)
 
     def get_consent_version(self):
-        subject_consent_cls = django_apps.get_model(
-            'flourish_child.childdummysubjectconsent')
-        subject_consent_objs = subject_consent_cls.objects.filter(
-            subject_identifier=self.child_visit.subject_identifier).order_by(
-                '-consent_datetime')
-        if subject_consent_objs:
-            return subject_consent_objs.first().version
-        else:
+        version = consent_versions.version(self.child_visit.subject_identifier)
+        if version is None:
             raise ValidationError(
                 'Missing Child Dummy Consent form. Cannot proceed.')
+        return version
 
     class Meta:
         abstract = True
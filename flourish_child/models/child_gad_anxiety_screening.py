@@ -2,6 +2,7 @@ from django.db import models
 
 from .child_crf_model_mixin import ChildCrfModelMixin
 from ..choices import DEPRESSION_SCALE
+from ..helper_classes.questionnaire_scoring import GAD7
 
 
 class ChildGadAnxietyScreening(ChildCrfModelMixin):
@@ -51,13 +52,7 @@ class ChildGadAnxietyScreening(ChildCrfModelMixin):
 
     @property
     def calculate_depression_score(self):
-        score = 0
-        for f in self._meta.get_fields():
-            if f.name in ['feeling_anxious', 'control_worrying', 'worrying',
-                          'trouble_relaxing', 'restlessness', 'easily_annoyed',
-                          'fearful', ]:
-                score += int(getattr(self, f.name))
-        return score
+        return GAD7.score_obj(self)
 
     class Meta(ChildCrfModelMixin.Meta):
         app_label = 'flourish_child'
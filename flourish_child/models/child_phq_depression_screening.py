@@ -3,6 +3,7 @@ from edc_constants.choices import YES_NO
 
 from .child_crf_model_mixin import ChildCrfModelMixin
 from ..choices import DEPRESSION_SCALE, DIFFICULTY_LEVEL
+from ..helper_classes.questionnaire_scoring import PHQ9
 
 
 class ChildPhqDepressionScreening(ChildCrfModelMixin):
@@ -92,13 +93,7 @@ class ChildPhqDepressionScreening(ChildCrfModelMixin):
         super().save(*args, **kwargs)
 
     def calculate_depression_score(self):
-        score = 0
-        for f in self._meta.get_fields():
-            if f.name in ['activity_interest', 'depressed', 'sleep_disorders',
-                          'fatigued', 'eating_disorders', 'self_doubt',
-                          'easily_distracted', 'restlessness', 'self_harm', ]:
-                score += int(getattr(self, f.name))
-        return score
+        return PHQ9.score_obj(self)
 
     class Meta(ChildCrfModelMixin.Meta):
         app_label = 'flourish_child'
@@ -0,0 +1,44 @@
+from django.db import models
+from edc_base.model_mixins import BaseUuidModel
+
+from .child_visit import ChildVisit
+from ..choices import SCORED_INSTRUMENTS
+
+
+class ChildSubscaleScore(BaseUuidModel):
+    """Raw and T-score of a subscale of the CBCL or BRIEF-2 at a visit, kept
+    up to date by the subscale scoring when the questionnaire is saved.
+    """
+
+    child_visit = models.ForeignKey(ChildVisit, on_delete=models.CASCADE)
+
+    instrument = models.CharField(
+        verbose_name='Instrument',
+        choices=SCORED_INSTRUMENTS,
+        max_length=25)
+
+    subscale = models.CharField(
+        verbose_name='Subscale',
+        max_length=50)
+
+    raw_score = models.IntegerField(
+        verbose_name='Raw score')
+
+    t_score = models.IntegerField(
+        verbose_name='T-score',
+        blank=True,
+        null=True,
+        help_text='Blank if there are no norms for the raw score.')
+
+    items_answered = models.IntegerField(
+        verbose_name='Number of items answered')
+
+    complete = models.BooleanField(
+        verbose_name='All sections of the instrument captured',
+        default=False)
+
+    class Meta:
+        app_label = 'flourish_child'
+        verbose_name = 'Child Subscale Score'
+        verbose_name_plural = 'Child Subscale Scores'
+        unique_together = ('child_visit', 'instrument', 'subscale')
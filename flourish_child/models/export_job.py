@@ -0,0 +1,83 @@
+import json
+import os
+
+from django.conf import settings
+from django.db import models
+from edc_base.model_mixins import BaseUuidModel
+from edc_constants.constants import PENDING
+
+from ..choices import EXPORT_JOB_STATUS
+
+
+class ExportJob(BaseUuidModel):
+    """A background export of a model's rows, written in chunks to rotating
+    output files under MEDIA_ROOT and resumable from the last finished chunk.
+    """
+
+    model_label = models.CharField(
+        verbose_name='Model',
+        max_length=100)
+
+    object_ids = models.TextField(
+        verbose_name='Selected object ids (JSON)',
+        null=True,
+        blank=True,
+        help_text='Leave blank to export all rows of the model.')
+
+    status = models.CharField(
+        max_length=15,
+        choices=EXPORT_JOB_STATUS,
+        default=PENDING)
+
+    chunk_size = models.PositiveIntegerField(default=5000)
+
+    total_rows = models.PositiveIntegerField(default=0)
+
+    rows_done = models.PositiveIntegerField(default=0)
+
+    chunks_done = models.PositiveIntegerField(default=0)
+
+    last_pk = models.CharField(
+        max_length=50,
+        null=True,
+        blank=True,
+        help_text='Primary key of the last exported object, used to resume.')
+
+    elapsed_seconds = models.FloatField(default=0)
+
+    started_datetime = models.DateTimeField(null=True, blank=True)
+
+    finished_datetime = models.DateTimeField(null=True, blank=True)
+
+    error = models.TextField(null=True, blank=True)
+
+    @property
+    def rows_per_second(self):
+        if self.elapsed_seconds:
+            return round(self.rows_done / self.elapsed_seconds, 1)
+        return 0
+
+    @property
+    def output_dir(self):
+        return os.path.join(
+            settings.MEDIA_ROOT, 'exports', self.model_label, str(self.id))
+
+    @property
+    def output_files(self):
+        if not os.path.isdir(self.output_dir):
+            return []
+        return sorted(
+            os.path.join(self.output_dir, filename)
+            for filename in os.listdir(self.output_dir)
+            if filename.endswith('.csv'))
+
+    @property
+    def selected_ids(self):
+        return json.loads(self.object_ids) if self.object_ids else None
+
+    def __str__(self):
+        return f'{self.model_label} ({self.status})'
+
+    class Meta:
+        app_label = 'flourish_child'
+        verbose_name = 'Export Job'
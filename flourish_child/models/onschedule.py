@@ -7,6 +7,8 @@ from edc_base.sites import CurrentSiteManager
 from edc_identifier.managers import SubjectIdentifierManager
 from edc_visit_schedule.model_mixins import OnScheduleModelMixin as BaseOnScheduleModelMixin
 
+from ..helper_classes.consent_version_service import consent_versions
+
 
 class OnScheduleModelMixin(BaseOnScheduleModelMixin, BaseUuidModel):
     """A model used by the system. Auto-completed by enrollment model.
@@ -45,17 +47,11 @@ class OnScheduleModelMixin(BaseOnScheduleModelMixin, BaseUuidModel):
 
     @property
     def latest_consent_obj_version(self):
-        child_consent_cls = django_apps.get_model(
-            'flourish_child.childdummysubjectconsent')
-
-        subject_consents = child_consent_cls.objects.filter(
-             subject_identifier=self.subject_identifier,)
-        if subject_consents:
-            latest_consent = subject_consents.latest('consent_datetime')
-            return latest_consent.version
-        else:
+        version = consent_versions.version(self.subject_identifier)
+        if version is None:
             raise forms.ValidationError(
                 'Missing dummy consent obj, cannot proceed.')
+        return version
 
     class Meta:
         unique_together = ('subject_identifier', 'schedule_name')
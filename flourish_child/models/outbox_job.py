@@ -0,0 +1,60 @@
+from django.db import models
+from edc_base.model_mixins import BaseUuidModel
+from edc_constants.constants import PENDING
+
+from ..choices import OUTBOX_STATUS
+
+
+class OutboxJob(BaseUuidModel):
+    """A side effect of a form save, recorded in the same transaction as the
+    form and run by a django-q worker through the outbox.
+    """
+
+    job_name = models.CharField(
+        verbose_name='Job name',
+        max_length=100)
+
+    idempotency_key = models.CharField(
+        verbose_name='Idempotency key',
+        max_length=255,
+        unique=True)
+
+    payload = models.TextField(
+        verbose_name='Payload (JSON)')
+
+    status = models.CharField(
+        verbose_name='Status',
+        max_length=10,
+        choices=OUTBOX_STATUS,
+        default=PENDING)
+
+    attempts = models.IntegerField(
+        verbose_name='Attempts',
+        default=0)
+
+    started_datetime = models.DateTimeField(
+        null=True,
+        blank=True)
+
+    completed_datetime = models.DateTimeField(
+        null=True,
+        blank=True)
+
+    next_attempt_datetime = models.DateTimeField(
+        null=True,
+        blank=True)
+
+    duration = models.FloatField(
+        verbose_name='Duration of the last attempt (seconds)',
+        null=True,
+        blank=True)
+
+    error = models.TextField(
+        null=True,
+        blank=True)
+
+    class Meta:
+        app_label = 'flourish_child'
+        verbose_name = 'Outbox Job'
+        verbose_name_plural = 'Outbox Jobs'
+        indexes = [models.Index(fields=['status', 'next_attempt_datetime'])]
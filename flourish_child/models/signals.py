@@ -3,13 +3,14 @@ from datetime import datetime
 import pytz
 from dateutil.relativedelta import relativedelta
 from django.apps import apps as django_apps
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.forms import model_to_dict
+from django_q.tasks import async_task
 from edc_appointment.constants import COMPLETE_APPT
 from edc_base.utils import age, get_utcnow
 from edc_constants.constants import IND, MALE, NEG, NO, UNKNOWN, YES
-from edc_data_manager.models import DataActionItem
 from edc_visit_schedule.site_visit_schedules import site_visit_schedules
 from edc_visit_tracking.constants import MISSED_VISIT
 
@@ -33,12 +34,26 @@ from .child_dummy_consent import ChildDummySubjectConsent
 from .child_visit import ChildVisit
 from ..action_items import YOUNG_ADULT_LOCATOR_ACTION
 from ..helper_classes import ChildFollowUpBookingHelper, ChildOnScheduleHelper
-from ..helper_classes.utils import (child_utils, notification, stamp_image,
-                                    trigger_action_item)
+from ..helper_classes.file_encryptor import ENCRYPTED_FILE_FIELDS, queue_encryption
+from ..helper_classes.onschedule_registry import onschedule_registry
+from ..helper_classes.outbox import outbox
+from ..helper_classes.notification_dispatcher import notifications
+from ..helper_classes.signal_profiler import signal_profiler
+from ..helper_classes.subscale_scoring import instrument_for_model
+from ..helper_classes.utils import child_utils, notification, trigger_action_item
 from ..models import AcademicPerformance, ChildOffSchedule, ChildSocioDemographic
 from ..models import ChildPreHospitalizationInline
+from ..models.brief_2_parent import Brief2Parent
+from ..models.brief_2_self_reported import Brief2SelfReported
+from ..models.child_cbcl_section1 import ChildCBCLSection1
+from ..models.child_cbcl_section2 import ChildCBCLSection2
+from ..models.child_cbcl_section3 import ChildCBCLSection3
+from ..models.child_cbcl_section4 import ChildCBCLSection4
 from ..models.child_clinical_measurements import ChildClinicalMeasurements
 from ..models.child_continued_consent import ChildContinuedConsent
+from ..models.tb_int_transcription import TbAdolInterviewTranscription
+from ..models.tb_int_translation import TbAdolInterviewTranslation
+from ..models.tb_interview import TbAdolInterview
 from ..models.young_adult_locator import YoungAdultLocator
 
 
@@ -48,6 +63,7 @@ class CaregiverConsentError(Exception):
 
 @receiver(post_save, weak=False, sender=ChildSocioDemographic,
           dispatch_uid='child_socio_demographic_post_save')
+@signal_profiler.instrument
 def child_socio_demographic_post_save(sender, instance, raw, created, **kwargs):
     """
     Update academic perfomance in the same visit without affecting any other forms
@@ -73,6 +89,7 @@ def child_socio_demographic_post_save(sender, instance, raw, created, **kwargs):
 
 @receiver(post_save, weak=False, sender=ChildAssent,
           dispatch_uid='child_assent_on_post_save')
+@signal_profiler.instrument
 def child_assent_on_post_save(sender, instance, raw, created, **kwargs):
     """Put subject on schedule after consenting.
     """
@@ -125,6 +142,7 @@ def child_assent_on_post_save(sender, instance, raw, created, **kwargs):
 
 
 @receiver(post_save, weak=False, sender=ChildAppointment)
+@signal_profiler.instrument
 def child_appointment_on_post_save(sender, instance, raw, created, **kwargs):
     if ('tb_adol_followup_schedule' == instance.schedule_name and
             instance.appt_status == COMPLETE_APPT):
@@ -135,55 +153,66 @@ def child_appointment_on_post_save(sender, instance, raw, created, **kwargs):
 
 @receiver(post_save, weak=False, sender=ChildDummySubjectConsent,
           dispatch_uid='child_consent_on_post_save')
+@signal_profiler.instrument
 def child_consent_on_post_save(sender, instance, raw, created, **kwargs):
-    """Put subject on cohort a schedule after consenting.
+    """Put subject on cohort a schedule after consenting, through the outbox.
     """
     if not raw:
+        outbox.enqueue(
+            'child_consent_schedule',
+            f'child_consent_schedule:{instance.id}:{instance.modified.isoformat()}',
+            child_consent_id=str(instance.id))
 
-        caregiver_child_consent_cls = django_apps.get_model(
-            'flourish_caregiver.caregiverchildconsent')
 
-        caregiver_prev_enrolled_cls = django_apps.get_model(
-            'flourish_caregiver.caregiverpreviouslyenrolled')
+@outbox.handler('child_consent_schedule')
+def child_consent_schedule(child_consent_id):
+    instance = ChildDummySubjectConsent.objects.get(id=child_consent_id)
 
-        maternal_delivery_cls = django_apps.get_model(
-            'flourish_caregiver.maternaldelivery')
+    caregiver_child_consent_cls = django_apps.get_model(
+        'flourish_caregiver.caregiverchildconsent')
 
-        child_prev_enrolled = caregiver_child_consent_cls.objects.filter(
-            subject_identifier=instance.subject_identifier,
-            study_child_identifier__isnull=False).exists()
+    caregiver_prev_enrolled_cls = django_apps.get_model(
+        'flourish_caregiver.caregiverpreviouslyenrolled')
 
-        helper_cls = ChildOnScheduleHelper(
-            subject_identifier=instance.subject_identifier,
-            cohort=instance.cohort)
+    maternal_delivery_cls = django_apps.get_model(
+        'flourish_caregiver.maternaldelivery')
 
-        if child_prev_enrolled:
-            # The criteria is for child from a previous study
-            try:
-                prev_enrolled = caregiver_prev_enrolled_cls.objects.get(
-                    subject_identifier=instance.relative_identifier)
-            except caregiver_prev_enrolled_cls.DoesNotExist:
-                pass
-            else:
-                helper_cls.base_appt_datetime = prev_enrolled.report_datetime
-                helper_cls.put_cohort_onschedule(instance, )
+    child_prev_enrolled = caregiver_child_consent_cls.objects.filter(
+        subject_identifier=instance.subject_identifier,
+        study_child_identifier__isnull=False).exists()
+
+    helper_cls = ChildOnScheduleHelper(
+        subject_identifier=instance.subject_identifier,
+        cohort=instance.cohort)
 
+    if child_prev_enrolled:
+        # The criteria is for child from a previous study
+        try:
+            prev_enrolled = caregiver_prev_enrolled_cls.objects.get(
+                subject_identifier=instance.relative_identifier)
+        except caregiver_prev_enrolled_cls.DoesNotExist:
+            pass
         else:
+            helper_cls.base_appt_datetime = prev_enrolled.report_datetime
+            helper_cls.put_cohort_onschedule(instance, )
 
-            try:
-                maternal_delivery_obj = maternal_delivery_cls.objects.get(
-                    delivery_datetime=instance.consent_datetime,
-                    subject_identifier=instance.relative_identifier)
-            except maternal_delivery_cls.DoesNotExist:
-                pass
-            else:
-                helper_cls.cohort = (instance.cohort + '_birth')
-                helper_cls.base_appt_datetime = maternal_delivery_obj.created
-                helper_cls.put_on_schedule(instance, )
+    else:
+
+        try:
+            maternal_delivery_obj = maternal_delivery_cls.objects.get(
+                delivery_datetime=instance.consent_datetime,
+                subject_identifier=instance.relative_identifier)
+        except maternal_delivery_cls.DoesNotExist:
+            pass
+        else:
+            helper_cls.cohort = (instance.cohort + '_birth')
+            helper_cls.base_appt_datetime = maternal_delivery_obj.created
+            helper_cls.put_on_schedule(instance, )
 
 
 @receiver(post_save, weak=False, sender=TbVisitScreeningAdolescent,
           dispatch_uid='adol_tb_visit_presence_on_post_save')
+@signal_profiler.instrument
 def child_tb_visit_screening_on_post_save(sender, instance, raw, created, **kwargs):
     if (instance.cough_duration == NO or instance.fever_duration == NO or
             instance.night_sweats == NO or instance.weight_loss == NO):
@@ -194,6 +223,7 @@ def child_tb_visit_screening_on_post_save(sender, instance, raw, created, **kwar
 
 @receiver(post_save, weak=False, sender=TbPresenceHouseholdMembersAdol,
           dispatch_uid='adol_tb_presence_on_post_save')
+@signal_profiler.instrument
 def child_tb_presence_on_post_save(sender, instance, raw, created, **kwargs):
     if instance.tb_referral == YES:
         trigger_action_item(TBAdolOffStudy, TB_ADOL_STUDY_ACTION,
@@ -203,6 +233,7 @@ def child_tb_presence_on_post_save(sender, instance, raw, created, **kwargs):
 
 @receiver(post_save, weak=False, sender=HivTestingAdol,
           dispatch_uid='hiv_testing_on_post_save')
+@signal_profiler.instrument
 def child_hiv_testing_on_post_save(sender, instance, raw, created, **kwargs):
     if instance.last_result in [NEG, IND,
                                 UNKNOWN] or instance.referred_for_treatment == NO:
@@ -213,6 +244,7 @@ def child_hiv_testing_on_post_save(sender, instance, raw, created, **kwargs):
 
 @receiver(post_save, weak=False, sender=TbLabResultsAdol,
           dispatch_uid='child_tb_lab_results_on_post_save')
+@signal_profiler.instrument
 def child_tb_lab_results_on_post_save(sender, instance, raw, created, **kwargs):
     if instance.quantiferon_result == NEG:
         trigger_action_item(TBAdolOffStudy, TB_ADOL_STUDY_ACTION,
@@ -222,6 +254,7 @@ def child_tb_lab_results_on_post_save(sender, instance, raw, created, **kwargs):
 
 @receiver(post_save, weak=False, sender=ChildVisit,
           dispatch_uid='child_visit_on_post_save')
+@signal_profiler.instrument
 def child_visit_on_post_save(sender, instance, raw, created, **kwargs):
     """
     Check is the child visit with visit_code 200OD is missed
@@ -244,32 +277,45 @@ def child_visit_on_post_save(sender, instance, raw, created, **kwargs):
 
     if not raw and created and instance.visit_code in ['2000', '2000D', '3000',
                                                        '3000A', '3000B', '3000C']:
+        outbox.enqueue(
+            'child_visit_quarterly_schedule',
+            f'child_visit_quarterly_schedule:{instance.id}',
+            child_visit_id=str(instance.id))
 
-        if 'sec' in instance.schedule_name:
 
-            cohort_list = instance.schedule_name.split('_')
+@outbox.handler('child_visit_quarterly_schedule')
+def child_visit_quarterly_schedule(child_visit_id):
+    """
+    - Put subject on quarterly schedule at enrollment visit.
+    """
+    instance = ChildVisit.objects.get(id=child_visit_id)
 
-            cohort = '_'.join(['cohort', cohort_list[1], 'sec_qt'])
-        elif 'fu' in instance.schedule_name:
+    if 'sec' in instance.schedule_name:
 
-            cohort_list = instance.schedule_name.split('_')
+        cohort_list = instance.schedule_name.split('_')
 
-            cohort = '_'.join(['cohort', cohort_list[1], 'fu_qt'])
-        else:
-            cohort_list = instance.schedule_name.split('_')
+        cohort = '_'.join(['cohort', cohort_list[1], 'sec_qt'])
+    elif 'fu' in instance.schedule_name:
 
-            cohort = '_'.join(['cohort', cohort_list[1], 'quarterly'])
+        cohort_list = instance.schedule_name.split('_')
 
-        helper_cls = ChildOnScheduleHelper(
-            subject_identifier=instance.subject_identifier,
-            base_appt_datetime=instance.report_datetime.replace(
-                microsecond=0),
-            cohort=cohort)
-        helper_cls.put_on_schedule(instance, )
+        cohort = '_'.join(['cohort', cohort_list[1], 'fu_qt'])
+    else:
+        cohort_list = instance.schedule_name.split('_')
+
+        cohort = '_'.join(['cohort', cohort_list[1], 'quarterly'])
+
+    helper_cls = ChildOnScheduleHelper(
+        subject_identifier=instance.subject_identifier,
+        base_appt_datetime=instance.report_datetime.replace(
+            microsecond=0),
+        cohort=cohort)
+    helper_cls.put_on_schedule(instance, )
 
 
 @receiver(post_save, weak=False, sender=TbAdolAssent,
           dispatch_uid='tb_adol_on_post_save')
+@signal_profiler.instrument
 def tb_adol_assent_on_post_save(sender, instance, raw, created, **kwargs):
     if instance.is_eligible:
         helper_cls = ChildOnScheduleHelper(
@@ -282,6 +328,7 @@ def tb_adol_assent_on_post_save(sender, instance, raw, created, **kwargs):
 
 @receiver(post_save, weak=False, sender=TbReferalAdol,
           dispatch_uid='tb_referral_adol_on_post_save')
+@signal_profiler.instrument
 def tb_referral_adol_on_post_save(sender, instance, raw, created, **kwargs):
     if not raw:
         onschedule_model = 'flourish_child.onscheduletbadolfollowupschedule'
@@ -306,53 +353,69 @@ def tb_referral_adol_on_post_save(sender, instance, raw, created, **kwargs):
 
 @receiver(post_save, weak=False, sender=ChildBirth,
           dispatch_uid='child_visit_on_post_save')
+@signal_profiler.instrument
 def child_birth_on_post_save(sender, instance, raw, created, **kwargs):
     """
-    - Put subject on birth schedule.
+    - Put subject on birth schedule, through the outbox.
     """
     if not raw and created:
-        maternal_delivery_cls = django_apps.get_model(
-            'flourish_caregiver.maternaldelivery')
-
-        caregiver_subject_identifier = child_utils.caregiver_subject_identifier(
-            subject_identifier=instance.subject_identifier)
-        base_appt_datetime = None
-        try:
-            maternal_delivery_obj = maternal_delivery_cls.objects.get(
-                subject_identifier=caregiver_subject_identifier,
-                child_subject_identifier=instance.subject_identifier)
-        except maternal_delivery_cls.DoesNotExist:
-            pass
-        else:
-            if maternal_delivery_obj.live_infants_to_register == 1:
-                base_appt_datetime = maternal_delivery_obj.delivery_datetime.replace(
-                    microsecond=0)
-
-                helper_cls = ChildOnScheduleHelper(
-                    subject_identifier=instance.subject_identifier,
-                    base_appt_datetime=base_appt_datetime,
-                    cohort='child_cohort_a_birth')
-                helper_cls.put_on_schedule(instance, )
+        outbox.enqueue(
+            'child_birth_schedule',
+            f'child_birth_schedule:{instance.id}',
+            child_birth_id=str(instance.id))
 
-        caregiver_child_consent_cls = django_apps.get_model(
-            'flourish_caregiver.caregiverchildconsent')
 
-        caregiver_child_consent_objs = caregiver_child_consent_cls.objects.filter(
-            subject_identifier=instance.subject_identifier)
-
-        for caregiver_child_consent_obj in caregiver_child_consent_objs:
-            caregiver_child_consent_obj.first_name = instance.first_name
-            caregiver_child_consent_obj.last_name = instance.last_name
-            caregiver_child_consent_obj.gender = instance.gender
-            caregiver_child_consent_obj.child_dob = instance.dob
-            caregiver_child_consent_obj.save()
+@outbox.handler('child_birth_schedule')
+def child_birth_schedule(child_birth_id):
+    """
+    - Put subject on birth schedule, update the caregiver child consents,
+      notify and book the follow up.
+    """
+    instance = ChildBirth.objects.get(id=child_birth_id)
 
-        notification(
-            subject_identifier=instance.subject_identifier,
-            user_created=instance.user_created,
-            subject="'Add name and DOB to the paper informed consent form'")
+    maternal_delivery_cls = django_apps.get_model(
+        'flourish_caregiver.maternaldelivery')
 
-        # book participant for followup
+    caregiver_subject_identifier = child_utils.caregiver_subject_identifier(
+        subject_identifier=instance.subject_identifier)
+    base_appt_datetime = None
+    try:
+        maternal_delivery_obj = maternal_delivery_cls.objects.get(
+            subject_identifier=caregiver_subject_identifier,
+            child_subject_identifier=instance.subject_identifier)
+    except maternal_delivery_cls.DoesNotExist:
+        pass
+    else:
+        if maternal_delivery_obj.live_infants_to_register == 1:
+            base_appt_datetime = maternal_delivery_obj.delivery_datetime.replace(
+                microsecond=0)
+
+            helper_cls = ChildOnScheduleHelper(
+                subject_identifier=instance.subject_identifier,
+                base_appt_datetime=base_appt_datetime,
+                cohort='child_cohort_a_birth')
+            helper_cls.put_on_schedule(instance, )
+
+    caregiver_child_consent_cls = django_apps.get_model(
+        'flourish_caregiver.caregiverchildconsent')
+
+    caregiver_child_consent_objs = caregiver_child_consent_cls.objects.filter(
+        subject_identifier=instance.subject_identifier)
+
+    for caregiver_child_consent_obj in caregiver_child_consent_objs:
+        caregiver_child_consent_obj.first_name = instance.first_name
+        caregiver_child_consent_obj.last_name = instance.last_name
+        caregiver_child_consent_obj.gender = instance.gender
+        caregiver_child_consent_obj.child_dob = instance.dob
+        caregiver_child_consent_obj.save()
+
+    notification(
+        subject_identifier=instance.subject_identifier,
+        user_created=instance.user_created,
+        subject="'Add name and DOB to the paper informed consent form'")
+
+    # book participant for followup, a year after a single infant delivery
+    if base_appt_datetime:
         booking_helper = ChildFollowUpBookingHelper()
         booking_dt = base_appt_datetime + relativedelta(years=1)
         booking_helper.schedule_fu_booking(
@@ -361,33 +424,76 @@ def child_birth_on_post_save(sender, instance, raw, created, **kwargs):
 
 @receiver(post_save, weak=False, sender=ClinicianNotesImage,
           dispatch_uid='clinician_notes_image_on_post_save')
+@signal_profiler.instrument
 def clinician_notes_image_on_post_save(sender, instance, raw, created, **kwargs):
     if not raw and created:
-        stamp_image(instance)
+        image_id = str(instance.id)
+        transaction.on_commit(lambda: async_task(
+            'flourish_child.helper_classes.image_stamper.stamp_clinician_notes_image',
+            image_id))
+
+
+@receiver(post_save, weak=False, sender=TbAdolInterview,
+          dispatch_uid='tb_adol_interview_files_on_post_save')
+@receiver(post_save, weak=False, sender=TbAdolInterviewTranscription,
+          dispatch_uid='tb_adol_transcription_files_on_post_save')
+@receiver(post_save, weak=False, sender=TbAdolInterviewTranslation,
+          dispatch_uid='tb_adol_translation_files_on_post_save')
+@signal_profiler.instrument
+def tb_adol_interview_files_on_post_save(sender, instance, raw, created, **kwargs):
+    """
+    Queue encryption of uploaded interview recordings and documents.
+    """
+    if not raw:
+        model_label = sender._meta.label_lower
+        file_field, _ = ENCRYPTED_FILE_FIELDS[model_label]
+        filefield = getattr(instance, file_field)
+        if filefield and not filefield.name.endswith('.zip'):
+            queue_encryption(model_label, [instance.id])
+
+
+@receiver([post_save, post_delete], weak=False, sender=ChildCBCLSection1,
+          dispatch_uid='child_cbcl_section1_subscales')
+@receiver([post_save, post_delete], weak=False, sender=ChildCBCLSection2,
+          dispatch_uid='child_cbcl_section2_subscales')
+@receiver([post_save, post_delete], weak=False, sender=ChildCBCLSection3,
+          dispatch_uid='child_cbcl_section3_subscales')
+@receiver([post_save, post_delete], weak=False, sender=ChildCBCLSection4,
+          dispatch_uid='child_cbcl_section4_subscales')
+@receiver([post_save, post_delete], weak=False, sender=Brief2Parent,
+          dispatch_uid='brief2_parent_subscales')
+@receiver([post_save, post_delete], weak=False, sender=Brief2SelfReported,
+          dispatch_uid='brief2_self_reported_subscales')
+@signal_profiler.instrument
+def subscale_scored_on_change(sender, instance, raw=False, **kwargs):
+    """
+    Rescore the CBCL or BRIEF-2 subscales of the visit the questionnaire was
+    saved or deleted on.
+    """
+    if not raw:
+        instrument_for_model(sender._meta.label_lower).save_scores(
+            [instance.child_visit_id])
 
 
 @receiver(post_save, weak=False, sender=AcademicPerformance,
           dispatch_uid='academic_performance_on_post_save')
+@signal_profiler.instrument
 def academic_performance_on_post_save(sender, instance, raw, created, **kwargs):
     if not raw and created:
         overall_performance = getattr(instance, 'overall_performance', None)
         if overall_performance and overall_performance == 'pending':
             child_visit = instance.child_visit
             subject = f'Pending academic results at visit {child_visit.visit_code}'
-            try:
-                DataActionItem.objects.get(
-                    subject_identifier=child_visit.subject_identifier,
-                    subject=subject)
-            except DataActionItem.DoesNotExist:
-                notification(
-                    subject_identifier=child_visit.subject_identifier,
-                    user_created=instance.user_created,
-                    subject=subject,
-                    comment=f'{subject}. Please capture results once available.')
+            notification(
+                subject_identifier=child_visit.subject_identifier,
+                user_created=instance.user_created,
+                subject=subject,
+                comment=f'{subject}. Please capture results once available.')
 
 
 @receiver(post_save, weak=False, sender=ChildPreHospitalizationInline,
           dispatch_uid='child_prev_hospitalisation_on_post_save')
+@signal_profiler.instrument
 def child_prev_hospitalisation_on_post_save(sender, instance, raw, created, **kwargs):
     """
        If child hospitalization has occured within the past year, put action item for
@@ -397,7 +503,7 @@ def child_prev_hospitalisation_on_post_save(sender, instance, raw, created, **kw
     recent_year = get_utcnow() - relativedelta(years=1)
 
     if instance.aprox_date > recent_year.date():
-        DataActionItem.objects.update_or_create(
+        notifications.add(
             subject='Complete INFORM CRF on REDCap',
             subject_identifier=instance.subject_identifier,
             assigned='clinic',
@@ -408,62 +514,70 @@ def child_prev_hospitalisation_on_post_save(sender, instance, raw, created, **kw
 
 @receiver(post_save, weak=False, sender=ChildClinicalMeasurements,
           dispatch_uid='child_clinical_measurements_on_post_save')
+@signal_profiler.instrument
 def child_clinical_measurements_on_post_save(sender, instance, raw, created, **kwargs):
     if not raw:
-        caregiver_child_consent_cls = django_apps.get_model(
-            'flourish_caregiver.caregiverchildconsent')
-        matrix_pool_cls = django_apps.get_model('pre_flourish.matrixpool')
-
-        caregiver_child_consent_obj = caregiver_child_consent_cls.objects.filter(
-            subject_identifier=instance.child_visit.subject_identifier
-        ).latest('version')
-
-        match_helper = MatchHelper()
-        bmi = instance.child_weight_kg / ((instance.child_height / 100) ** 2)
-        bmi_group = match_helper.bmi_group(bmi)
-        _age = match_helper.calculate_age(
-            caregiver_child_consent_obj.child_dob)
-        age_range = match_helper.age_range(_age)
-        gender = 'male' if caregiver_child_consent_obj.gender == MALE else 'female'
-
-        if bmi_group and age_range:
-            heu_matrix_group_count = matrix_pool_cls.objects.filter(
+        outbox.enqueue(
+            'child_clinical_measurements_matrix_pool',
+            f'child_clinical_measurements_matrix_pool:{instance.id}:'
+            f'{instance.modified.isoformat()}',
+            clinical_measurements_id=str(instance.id))
+
+
+@outbox.handler('child_clinical_measurements_matrix_pool')
+def child_clinical_measurements_matrix_pool(clinical_measurements_id):
+    """
+    Add the child to the HEU matrix pool of its BMI, age and gender group, and
+    email the pre flourish users, if only the HUU pool has the group.
+    """
+    instance = ChildClinicalMeasurements.objects.get(id=clinical_measurements_id)
+
+    caregiver_child_consent_cls = django_apps.get_model(
+        'flourish_caregiver.caregiverchildconsent')
+    matrix_pool_cls = django_apps.get_model('pre_flourish.matrixpool')
+
+    caregiver_child_consent_obj = caregiver_child_consent_cls.objects.filter(
+        subject_identifier=instance.child_visit.subject_identifier
+    ).latest('version')
+
+    match_helper = MatchHelper()
+    bmi = instance.child_weight_kg / ((instance.child_height / 100) ** 2)
+    bmi_group = match_helper.bmi_group(bmi)
+    _age = match_helper.calculate_age(
+        caregiver_child_consent_obj.child_dob)
+    age_range = match_helper.age_range(_age)
+    gender = 'male' if caregiver_child_consent_obj.gender == MALE else 'female'
+
+    if bmi_group and age_range:
+        heu_matrix_group_count = matrix_pool_cls.objects.filter(
+            pool='heu', bmi_group=bmi_group, age_group=str(age_range),
+            gender_group=gender
+        ).count()
+        huu_matrix_group = matrix_pool_cls.objects.filter(
+            pool='huu', bmi_group=bmi_group, age_group=str(age_range),
+            gender_group=gender
+        )
+        if heu_matrix_group_count == 0 and huu_matrix_group.count() > 0:
+            match_helper.create_new_matrix_pool(
                 pool='heu', bmi_group=bmi_group, age_group=str(age_range),
-                gender_group=gender
-            ).count()
-            huu_matrix_group = matrix_pool_cls.objects.filter(
-                pool='huu', bmi_group=bmi_group, age_group=str(age_range),
-                gender_group=gender
-            )
-            if heu_matrix_group_count == 0 and huu_matrix_group.count() > 0:
-                match_helper.create_new_matrix_pool(
-                    pool='heu', bmi_group=bmi_group, age_group=str(age_range),
-                    gender_group=gender,
-                    subject_identifier=instance.child_visit.subject_identifier)
-                match_helper.send_email_to_pre_flourish_users(huu_matrix_group)
+                gender_group=gender,
+                subject_identifier=instance.child_visit.subject_identifier)
+            match_helper.send_email_to_pre_flourish_users(huu_matrix_group)
 
 
 @receiver(post_save, weak=False, sender=ChildOffSchedule,
           dispatch_uid='child_off_schedule_on_post_save')
+@signal_profiler.instrument
 def child_take_off_schedule(sender, instance, raw, created, **kwargs):
-    helper_cls = ChildOnScheduleHelper()
-    for visit_schedule in site_visit_schedules.visit_schedules.values():
-        for schedule in visit_schedule.schedules.values():
-            onschedule_model_obj = helper_cls.get_onschedule_model_obj(
-                schedule, query_value=instance.subject_identifier)
-            if (onschedule_model_obj
-                    and onschedule_model_obj.schedule_name == instance.schedule_name):
-                _, schedule = site_visit_schedules.get_by_onschedule_model_schedule_name(
-                    onschedule_model=onschedule_model_obj._meta.label_lower,
-                    name=instance.schedule_name)
-                schedule.take_off_schedule(
-                    subject_identifier=instance.subject_identifier,
-                    offschedule_datetime=instance.offschedule_datetime,
-                    schedule_name=instance.schedule_name)
+    onschedule_registry.take_off_schedule(
+        subject_identifier=instance.subject_identifier,
+        schedule_name=instance.schedule_name,
+        offschedule_datetime=instance.offschedule_datetime)
 
 
 @receiver(post_save, weak=False, sender=ChildContinuedConsent,
           dispatch_uid='child_continued_consent_on_post_save')
+@signal_profiler.instrument
 def child_continued_consent_post_save(sender, instance, raw, created, **kwargs):
     subject_identifier = instance.subject_identifier
 
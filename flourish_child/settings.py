@@ -156,6 +156,7 @@ AUTH_PASSWORD_VALIDATORS = [
 
 COUNTRY = 'botswana'
 HOLIDAY_FILE = os.path.join(BASE_DIR, 'holidays.csv')
+FLOURISH_CHILD_HOLIDAY_RELOAD_SECONDS = 600
 
 # Internationalization
 # https://docs.djangoproject.com/en/3.1/topics/i18n/
@@ -177,6 +178,61 @@ STATIC_URL = '/static/'
 
 DASHBOARD_URL_NAMES = {}
 
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+Q_CLUSTER = {
+    'name': 'flourish_child',
+    'orm': 'default',
+    'workers': 2,
+    'timeout': 60 * 60,
+    'retry': 60 * 60 + 60,
+    'max_attempts': 3,
+}
+
+FLOURISH_CHILD_SIGNAL_PROFILING = False
+
+FLOURISH_CHILD_DEFER_ACTION_ITEMS = True
+
+FLOURISH_CHILD_DEFER_NOTIFICATIONS = True
+
+FLOURISH_CHILD_OUTBOX_SYNC = False
+
+FLOURISH_CHILD_OUTBOX_MAX_ATTEMPTS = 5
+
+# first retry delay of a failed outbox job, doubled on each attempt
+FLOURISH_CHILD_OUTBOX_RETRY_SECONDS = 60
+
+# interval of the django-q schedule requeueing stuck outbox jobs
+FLOURISH_CHILD_OUTBOX_REQUEUE_MINUTES = 15
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'consent_versions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache', 'consent_versions'),
+    },
+    # shared by the web and django-q workers and the signal_stats command
+    'signal_stats': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache', 'signal_stats'),
+    },
+}
+
+FLOURISH_CHILD_SIGNAL_STATS_CACHE = 'signal_stats'
+
+FLOURISH_CHILD_CONSENT_VERSION_CACHE = 'consent_versions'
+
+FLOURISH_CHILD_ENCRYPT_UPLOADS = False
+
+FLOURISH_CHILD_ENCRYPTION_WORKERS = 4
+
+FLOURISH_CHILD_FILE_KEY = 'filekey.key'
+
+# csv of instrument, subscale, raw_score, t_score for the CBCL and BRIEF-2 T-scores
+FLOURISH_CHILD_SCORE_NORMS = None
+
 BASE_FORMAT = ''
 
 if 'test' in sys.argv:
@@ -192,3 +248,19 @@ if 'test' in sys.argv:
     MIGRATION_MODULES = DisableMigrations()
     PASSWORD_HASHERS = ('django.contrib.auth.hashers.MD5PasswordHasher',)
     DEFAULT_FILE_STORAGE = 'inmemorystorage.InMemoryStorage'
+    Q_CLUSTER['sync'] = True
+    # Test transactions are rolled back without delete signals, do not keep
+    # consent timelines across tests.
+    CACHES['consent_versions'] = {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    }
+    CACHES['signal_stats'] = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+    # Holidays are bulk imported per test, reload the calendar on every use.
+    FLOURISH_CHILD_HOLIDAY_RELOAD_SECONDS = 0
+    # TestCase never commits, resolve action items and notifications on the call.
+    FLOURISH_CHILD_DEFER_ACTION_ITEMS = False
+    FLOURISH_CHILD_DEFER_NOTIFICATIONS = False
+    # Run outbox jobs inline, TestCase never commits.
+    FLOURISH_CHILD_OUTBOX_SYNC = True
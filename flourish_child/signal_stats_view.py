@@ -0,0 +1,18 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+
+from .helper_classes.signal_profiler import signal_profiler
+
+
+@staff_member_required
+def get_signal_stats(request):
+    """ Return the signal handler timings of this process and the last published
+        timings of every process as JSON.
+        @param request: request object
+        @return: JSON response object with the handler statistics.
+    """
+    return JsonResponse({
+        'enabled': signal_profiler.enabled,
+        'process': signal_profiler.process_key,
+        'handlers': signal_profiler.summary(),
+        'published': signal_profiler.published()})
@@ -40,28 +40,46 @@ $(document).ready(function () {
 			});
 	    }
 	    
+	    // Vaccine history of the participant, fetched once per form load.
+	    var vaccine_history = null;
+
+	    function getVaccineHistory() {
+	    	if (vaccine_history === null) {
+	    		let params = new URLSearchParams(window.location.search);
+	    		let subject_identifier = params.get('subject_identifier');
+	    		let url = '/flourish_child/vaccine_history/' + encodeURIComponent(subject_identifier) + '/';
+	    		vaccine_history = fetch(url).then(function(response) {
+	    			if (response.status !== 200) {
+	    				throw new Error('Vaccine history request failed: ' + response.status);
+	    			}
+	    			return response.json();
+	    		}).catch(function(err) {
+	    			// Allow the next selection to retry.
+	    			vaccine_history = null;
+	    			throw err;
+	    		});
+	    	}
+	    	return vaccine_history;
+	    }
+
+	    // Start loading the history with the form, failures are retried on selection.
+	    getVaccineHistory().catch(function() {});
+
 	    async function updateDates(selected = '', index=0) {
-	    	let url = '/flourish_child/received_dates/' + selected + '/';
 	    	try {
-	    		let response = await fetch(url);
-	        	if (response.status === 200) {
-	        		let data = await response.json();
-	        		if (Object.keys(data).length > 0) {
-	        			// Update corresponding date fields.
-		        		updateRelatedFields(index, data);
-	        		}
-	        		
-	        		// Toggle error message and loading (remove).
-	        		toggleErrorMessage(error_message, index);
-	        		setLoading(false);
-	        		return;
-	        	}
-
-	        	// Toggle error message and loading (add and display to user).
-	        	toggleErrorMessage('Failed to auto-fill dates for selected vaccine.', index);
-	        	setLoading(false);
+	    		let history = await getVaccineHistory();
+	    		let data = history[selected] || {};
+	    		if (Object.keys(data).length > 0) {
+	    			// Update corresponding date fields.
+	    			updateRelatedFields(index, data);
+	    		}
 
+	    		// Toggle error message and loading (remove).
+	    		toggleErrorMessage(error_message, index);
+	    		setLoading(false);
 	    	} catch (err) {
+	    		// Toggle error message and loading (add and display to user).
+	    		toggleErrorMessage('Failed to auto-fill dates for selected vaccine.', index);
 	    		setLoading(false);
 	    		console.error(err);
 	    	}
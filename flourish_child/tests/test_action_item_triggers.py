@@ -0,0 +1,142 @@
+from django.db import transaction
+from django.db.models import Q
+from django.test import TestCase, override_settings, tag
+from edc_action_item import site_action_items
+from edc_constants.constants import NEW, OPEN
+from model_mommy import mommy
+
+from flourish_prn.action_items import TB_ADOL_STUDY_ACTION
+from flourish_prn.models.tb_adol_off_study import TBAdolOffStudy
+from ..helper_classes.action_item_triggers import action_item_triggers
+from ..helper_classes.utils import trigger_action_item
+from ..models import ChildDataset
+
+
+class Rollback(Exception):
+    pass
+
+
+class ExistingModel:
+    """Stands in for the action's model with a row for the subject, without
+    the action model's own action item handling on save.
+    """
+
+    objects = ChildDataset.objects
+    DoesNotExist = ChildDataset.DoesNotExist
+    action_name = TBAdolOffStudy.action_name
+
+
+def sequential_trigger_action_item(model_cls, action_name, subject_identifier,
+                                   repeat=False):
+    """`trigger_action_item` as done before the calls were batched.
+    """
+    action_cls = site_action_items.get(model_cls.action_name)
+    action_item_model_cls = action_cls.action_item_model_cls()
+
+    try:
+        model_cls.objects.get(subject_identifier=subject_identifier)
+    except model_cls.DoesNotExist:
+        trigger = True
+    else:
+        trigger = repeat
+    if trigger:
+        try:
+            action_item_obj = action_item_model_cls.objects.get(
+                subject_identifier=subject_identifier,
+                action_type__name=action_name)
+        except action_item_model_cls.DoesNotExist:
+            action_cls = site_action_items.get(action_name)
+            action_cls(subject_identifier=subject_identifier)
+        else:
+            action_item_obj.status = OPEN
+            action_item_obj.save()
+    else:
+        try:
+            action_item = action_item_model_cls.objects.get(
+                Q(status=NEW) | Q(status=OPEN),
+                subject_identifier=subject_identifier,
+                action_type__name=action_name)
+        except action_item_model_cls.DoesNotExist:
+            pass
+        else:
+            action_item.delete()
+
+
+@tag('action_item_triggers')
+class TestActionItemTriggers(TestCase):
+
+    subject_identifier = 'B142-040990001-5-10'
+
+    def setUp(self):
+        action_cls = site_action_items.get(TBAdolOffStudy.action_name)
+        self.action_item_model_cls = action_cls.action_item_model_cls()
+        mommy.make_recipe('flourish_child.childdataset',
+                          subject_identifier=self.subject_identifier)
+
+    def action_items(self):
+        return self.action_item_model_cls.objects.filter(
+            subject_identifier=self.subject_identifier,
+            action_type__name=TB_ADOL_STUDY_ACTION)
+
+    def test_single_trigger_creates_action_item(self):
+        trigger_action_item(TBAdolOffStudy, TB_ADOL_STUDY_ACTION,
+                            self.subject_identifier, repeat=True)
+        self.assertEqual(list(self.action_items().values_list('status', flat=True)),
+                         [NEW])
+
+    @override_settings(FLOURISH_CHILD_DEFER_ACTION_ITEMS=True)
+    def test_triggers_coalesced_until_commit(self):
+        for _ in range(3):
+            trigger_action_item(TBAdolOffStudy, TB_ADOL_STUDY_ACTION,
+                                self.subject_identifier, repeat=True)
+        self.assertFalse(self.action_items().exists())
+
+        # TestCase does not commit, run the commit hook directly
+        action_item_triggers.flush()
+
+        # as sequential calls: created by the first, reopened by the next
+        self.assertEqual(list(self.action_items().values_list('status', flat=True)),
+                         [OPEN])
+
+    def test_new_item_deleted_when_model_exists(self):
+        trigger_action_item(TBAdolOffStudy, TB_ADOL_STUDY_ACTION,
+                            self.subject_identifier)
+        self.assertEqual(list(self.action_items().values_list('status', flat=True)),
+                         [NEW])
+
+        trigger_action_item(ExistingModel, TB_ADOL_STUDY_ACTION, self.subject_identifier)
+        self.assertFalse(self.action_items().exists())
+
+    def statuses_after(self, calls, trigger):
+        """ Returns the action item statuses after the trigger calls, rolled
+            back.
+        """
+        try:
+            with transaction.atomic():
+                for model_cls, repeat in calls:
+                    trigger(model_cls, TB_ADOL_STUDY_ACTION, self.subject_identifier,
+                            repeat=repeat)
+                action_item_triggers.flush()
+                statuses = sorted(self.action_items().values_list('status', flat=True))
+                raise Rollback
+        except Rollback:
+            pass
+        return statuses
+
+    @override_settings(FLOURISH_CHILD_DEFER_ACTION_ITEMS=True)
+    def test_mixed_sequences_match_sequential_calls(self):
+        sequences = [
+            # trigger, resolve, trigger
+            [(TBAdolOffStudy, False), (ExistingModel, False), (TBAdolOffStudy, False)],
+            # trigger, reopen, resolve
+            [(TBAdolOffStudy, True), (TBAdolOffStudy, True), (ExistingModel, False)],
+            # resolve nothing, trigger, reopen
+            [(ExistingModel, False), (ExistingModel, True), (TBAdolOffStudy, False)],
+            # trigger, resolve, resolve again
+            [(TBAdolOffStudy, False), (ExistingModel, False), (ExistingModel, False)],
+        ]
+        for calls in sequences:
+            with self.subTest(calls=calls):
+                self.assertEqual(
+                    self.statuses_after(calls, trigger_action_item),
+                    self.statuses_after(calls, sequential_trigger_action_item))
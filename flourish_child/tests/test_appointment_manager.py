@@ -0,0 +1,147 @@
+from unittest import mock
+
+from dateutil.relativedelta import relativedelta
+from django.db import transaction
+from django.db.models import ProtectedError
+from django.test import TestCase, tag
+from edc_base.utils import get_utcnow
+from edc_constants.constants import POS, YES
+from edc_facility.import_holidays import import_holidays
+from edc_visit_tracking.constants import SCHEDULED
+from model_mommy import mommy
+
+from ..models import Appointment
+
+
+class Rollback(Exception):
+    pass
+
+
+def legacy_delete_appointment(appointments=[], deleted=0):
+    """Appointment deletion as done before the set based delete.
+    """
+    for appointment in appointments:
+        try:
+            appointment.delete()
+            deleted += 1
+        except ProtectedError:
+            break
+    return deleted
+
+
+@tag('appointment_manager')
+class TestAppointmentManager(TestCase):
+
+    def setUp(self):
+        import_holidays()
+
+        screening_preg = mommy.make_recipe('flourish_caregiver.screeningpregwomen')
+
+        subject_consent = mommy.make_recipe(
+            'flourish_caregiver.subjectconsent',
+            screening_identifier=screening_preg.screening_identifier,
+            breastfeed_intent=YES,
+            consent_datetime=get_utcnow(),
+            version='2')
+
+        caregiver_child_consent_obj = mommy.make_recipe(
+            'flourish_caregiver.caregiverchildconsent',
+            subject_consent=subject_consent,
+            gender=None,
+            first_name=None,
+            last_name=None,
+            identity=None,
+            confirm_identity=None,
+            study_child_identifier=None,
+            child_dob=None,
+            version='2')
+        self.subject_identifier = caregiver_child_consent_obj.subject_identifier
+
+        mommy.make_recipe(
+            'flourish_caregiver.antenatalenrollment',
+            enrollment_hiv_status=POS,
+            child_subject_identifier=self.subject_identifier,
+            subject_identifier=subject_consent.subject_identifier, )
+
+        mommy.make_recipe(
+            'flourish_caregiver.maternaldelivery',
+            child_subject_identifier=self.subject_identifier,
+            subject_identifier=subject_consent.subject_identifier, )
+
+        mommy.make_recipe(
+            'flourish_child.childbirth',
+            subject_identifier=self.subject_identifier,
+            dob=(get_utcnow() - relativedelta(days=1)).date(), )
+
+    def appointment(self, visit_code):
+        return Appointment.objects.get(
+            subject_identifier=self.subject_identifier, visit_code=visit_code)
+
+    def make_visits(self, *visit_codes):
+        for visit_code in visit_codes:
+            mommy.make_recipe(
+                'flourish_child.childvisit',
+                appointment=self.appointment(visit_code),
+                report_datetime=get_utcnow(),
+                reason=SCHEDULED)
+
+    def appointments_after(self, visit_code):
+        return Appointment.objects.filter(
+            subject_identifier=self.subject_identifier,
+            appt_datetime__gte=self.appointment(visit_code).appt_datetime).order_by(
+                '-timepoint')
+
+    def remaining_visit_codes(self):
+        return sorted(Appointment.objects.filter(
+            subject_identifier=self.subject_identifier).values_list(
+                'visit_code', flat=True))
+
+    def legacy_result(self, visit_code):
+        """ Returns the deleted count and remaining visit codes of the per row
+            delete, rolled back.
+        """
+        try:
+            with transaction.atomic():
+                deleted = legacy_delete_appointment(
+                    appointments=self.appointments_after(visit_code))
+                remaining = self.remaining_visit_codes()
+                raise Rollback
+        except Rollback:
+            pass
+        return deleted, remaining
+
+    def test_deleted_count_matches_per_row_delete(self):
+        legacy_deleted, legacy_remaining = self.legacy_result('2001')
+        self.assertGreater(legacy_deleted, 0)
+
+        deleted = Appointment.objects.delete_appointment(
+            appointments=self.appointments_after('2001'))
+
+        self.assertEqual(deleted, legacy_deleted)
+        self.assertEqual(self.remaining_visit_codes(), legacy_remaining)
+
+    def test_stops_at_first_protected_appointment(self):
+        self.make_visits('2000D', '2001', '2002')
+        legacy_deleted, legacy_remaining = self.legacy_result('2001')
+
+        deleted = Appointment.objects.delete_appointment(
+            appointments=self.appointments_after('2001'))
+
+        self.assertEqual(deleted, legacy_deleted)
+        self.assertEqual(self.remaining_visit_codes(), legacy_remaining)
+        self.assertIn('2002', self.remaining_visit_codes())
+        self.assertNotIn('2003', self.remaining_visit_codes())
+
+    def test_transitively_protected_appointment(self):
+        self.make_visits('2000D', '2001', '2002')
+        legacy_deleted, legacy_remaining = self.legacy_result('2001')
+
+        # a protection the direct relation check does not see, e.g. a CRF of
+        # a visit deleted in cascade, is only raised by the set based delete
+        with mock.patch.object(Appointment.objects, 'protected_appointment_ids',
+                               return_value=set()):
+            deleted = Appointment.objects.delete_appointment(
+                appointments=self.appointments_after('2001'))
+
+        self.assertEqual(deleted, legacy_deleted)
+        self.assertEqual(self.remaining_visit_codes(), legacy_remaining)
@@ -0,0 +1,35 @@
+from dateutil.relativedelta import relativedelta
+from django.test import TestCase, tag
+from edc_base import get_utcnow
+
+from ..helper_classes.appointment_timeline import AppointmentTimeline
+from ..models import Appointment
+
+
+@tag('appointment_timeline')
+class TestAppointmentTimeline(TestCase):
+
+    def setUp(self):
+        self.base_datetime = get_utcnow()
+        self.appointments = [
+            Appointment(subject_identifier='B142-040990001-1',
+                        visit_code=visit_code,
+                        appt_datetime=self.base_datetime + relativedelta(months=months))
+            for visit_code, months in (('2000', 0), ('2001', 3), ('2002', 6))]
+        self.timeline = AppointmentTimeline(appointments=self.appointments)
+
+    def test_previous(self):
+        self.assertIsNone(self.timeline.previous(self.base_datetime))
+        self.assertEqual(
+            self.timeline.previous(self.appointments[2].appt_datetime).visit_code, '2001')
+        self.assertEqual(
+            self.timeline.previous(
+                self.base_datetime + relativedelta(months=4)).visit_code, '2001')
+
+    def test_next(self):
+        self.assertEqual(self.timeline.next(self.base_datetime).visit_code, '2001')
+        self.assertIsNone(self.timeline.next(self.appointments[2].appt_datetime))
+
+    def test_one_query_per_subject(self):
+        with self.assertNumQueries(1):
+            AppointmentTimeline.for_subject(Appointment, 'B142-040990001-1')
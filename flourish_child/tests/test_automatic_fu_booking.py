@@ -1,3 +1,5 @@
+from datetime import datetime, timezone
+
 from dateutil.relativedelta import relativedelta
 from django.test import TestCase, tag
 from edc_base import get_utcnow
@@ -5,9 +7,11 @@ from edc_constants.constants import MALE, YES, NOT_APPLICABLE, NEG, FEMALE
 from edc_facility.import_holidays import import_holidays
 from model_mommy import mommy
 from unittest.case import skip
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from flourish_calendar.models import ParticipantNote
 
-from ..helper_classes import ChildFollowUpBookingHelper
+from ..helper_classes import ChildFollowUpBookingHelper, FollowUpBookingEngine
 from ..models import (ChildDummySubjectConsent, OnScheduleChildCohortAEnrollment,
                       OnScheduleChildCohortCSec, OnScheduleChildCohortABirth)
 
@@ -160,6 +164,31 @@ class TestFuBooking(TestCase):
             subject_identifier=preg_caregiver_child_consent_obj.subject_identifier,
             title='Follow Up Schedule', ).count(), 1)
 
+    def test_fu_booking_engine_batch(self):
+        """ Assert a batch of bookings loads the calendar once.
+        """
+        subject_identifiers = [f'B142-040990{idx:03d}-1' for idx in range(3)]
+        # a working week inside the booking horizon (before the cutoff date)
+        booking_dt = datetime(2024, 6, 3, 9, 0, tzinfo=timezone.utc)
+        while self.booking_helper().check_date(booking_dt):
+            booking_dt = booking_dt + relativedelta(days=1)
+
+        with CaptureQueriesContext(connection) as queries:
+            FollowUpBookingEngine().book(
+                [(subject_identifier, booking_dt)
+                 for subject_identifier in subject_identifiers])
+        selects = [query['sql'] for query in queries.captured_queries
+                   if query['sql'].startswith('SELECT')]
+        # the holidays, the notes in the horizon and the consents are each read once
+        for table in ['edc_facility_holiday', 'flourish_calendar_participantnote',
+                      'flourish_caregiver_caregiverchildconsent']:
+            self.assertEqual(
+                len([sql for sql in selects if f'FROM "{table}"' in sql]), 1, table)
+
+        self.assertEqual(ParticipantNote.objects.filter(
+            subject_identifier__in=subject_identifiers,
+            title='Follow Up Schedule', date=booking_dt.date()).count(), 3)
+
     @skip("Test performed with max part as 1, now changed to 3. Expected to fail.")
     def test_fu_booking_rescheduling(self):
         """ NB: Test was performed with max participant's to be booked in a day
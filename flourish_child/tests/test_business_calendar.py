@@ -0,0 +1,76 @@
+from datetime import date, datetime
+
+from django.apps import apps as django_apps
+from django.db import connection
+from django.test import TestCase, tag
+from django.test.utils import CaptureQueriesContext
+
+from ..helper_classes.business_calendar import business_calendar
+
+
+@tag('business_calendar')
+class TestBusinessCalendar(TestCase):
+
+    def setUp(self):
+        holiday_cls = django_apps.get_model('edc_facility.holiday')
+        holiday_cls.objects.all().delete()
+        # Monday 2021-04-05 (Easter Monday)
+        holiday_cls.objects.create(
+            local_date=date(2021, 4, 5), name='Easter Monday', country='botswana')
+
+    def test_is_working_day(self):
+        self.assertTrue(business_calendar.is_working_day(date(2021, 4, 6)))
+        self.assertFalse(business_calendar.is_working_day(date(2021, 4, 5)))
+        self.assertFalse(business_calendar.is_working_day(datetime(2021, 4, 3, 9, 0)))
+
+    def test_roll_forward(self):
+        self.assertEqual(
+            business_calendar.roll_forward(datetime(2021, 4, 3, 9, 0)),
+            datetime(2021, 4, 6, 9, 0))
+        self.assertEqual(
+            business_calendar.roll_forward(date(2021, 4, 6)), date(2021, 4, 6))
+
+    def test_next_working_days(self):
+        self.assertEqual(
+            business_calendar.next_working_days(date(2021, 4, 2), 3),
+            [date(2021, 4, 6), date(2021, 4, 7), date(2021, 4, 8)])
+        self.assertEqual(
+            business_calendar.next_working_day(date(2021, 4, 3)), date(2021, 4, 6))
+
+    def test_working_days_between(self):
+        self.assertEqual(
+            business_calendar.working_days_between(date(2021, 4, 1), date(2021, 4, 8)), 4)
+
+    def test_bulk(self):
+        days = [date(2021, 4, 3), date(2021, 4, 5), date(2021, 4, 6)]
+        self.assertEqual(
+            list(business_calendar.are_working_days(days)), [False, False, True])
+        self.assertEqual(
+            [day.astype(date) for day in business_calendar.roll_forward_many(days)],
+            [date(2021, 4, 6)] * 3)
+        self.assertEqual(
+            list(business_calendar.working_days_between_many(
+                [date(2021, 4, 1)] * 2, [date(2021, 4, 6), date(2021, 4, 9)])), [2, 5])
+
+    def test_roll_backward(self):
+        self.assertEqual(
+            business_calendar.roll_backward(datetime(2021, 4, 5, 9, 0)),
+            datetime(2021, 4, 2, 9, 0))
+
+    def test_pinned_loads_once(self):
+        # the test settings reload the calendar on every call outside a block
+        with CaptureQueriesContext(connection) as queries:
+            with business_calendar.pinned():
+                for day in range(1, 30):
+                    business_calendar.is_working_day(date(2021, 4, day))
+                    business_calendar.next_working_day(date(2021, 4, day))
+        self.assertEqual(len(queries.captured_queries), 1)
+
+    def test_reloads_on_holiday_change(self):
+        holiday_cls = django_apps.get_model('edc_facility.holiday')
+        with self.settings(FLOURISH_CHILD_HOLIDAY_RELOAD_SECONDS=600):
+            business_calendar.invalidate()
+            self.assertTrue(business_calendar.is_working_day(date(2021, 4, 6)))
+            holiday_cls.objects.create(
+                local_date=date(2021, 4, 6), name='Holiday', country='botswana')
+            self.assertFalse(business_calendar.is_working_day(date(2021, 4, 6)))
@@ -0,0 +1,82 @@
+import csv
+import io
+import os
+import tempfile
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase, tag
+
+from ..helper_classes.child_dataset_importer import ChildDatasetImporter
+from ..models import ChildDataset
+
+HEADER = ['study_child_identifier', 'study_maternal_identifier', 'infant_enrolldate',
+          'infant_sex', 'infant_hiv_exposed', 'infant_hiv_status',
+          'infant_vitalstatus_final', 'infant_offstudy_reason', 'age_gt17_5',
+          'infant_offstudy_complete', 'age_today', 'first_name']
+
+
+@tag('child_dataset_importer')
+class TestChildDatasetImporter(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_csv(self, rows):
+        path = os.path.join(self.directory.name, 'dataset.csv')
+        with open(path, 'w', newline='') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(HEADER)
+            writer.writerows(rows)
+        return path
+
+    def row(self, identifier, enrolldate='2012-03-01', age='7.5', first_name='MOSA'):
+        return [identifier, 'B123-040990001-5', enrolldate, 'Female', 'HEU',
+                'Negative', 'Alive', 'None', '0', '2', age, first_name]
+
+    def test_import(self):
+        error_file = io.StringIO()
+        importer = ChildDatasetImporter(chunk_size=2, error_file=error_file)
+        result = importer.import_file(self.write_csv([
+            self.row('B123-040990001-5-10'),
+            self.row('B123-040990002-5-10', enrolldate='01/03/2012'),
+            self.row('B123-040990003-5-10', enrolldate='not a date'),
+            self.row('B123-040990001-5-10'),
+            self.row('B123-040990004-5-10', age='abc')]))
+
+        self.assertEqual(result.rows, 5)
+        self.assertEqual(result.created, 2)
+        self.assertEqual(result.errors, 3)
+        dataset = ChildDataset.objects.get(study_child_identifier='B123-040990002-5-10')
+        self.assertEqual(dataset.infant_enrolldate, date(2012, 3, 1))
+        self.assertEqual(dataset.age_today, Decimal('7.50'))
+        self.assertEqual(dataset.first_name, 'MOSA')
+
+        errors = list(csv.reader(io.StringIO(error_file.getvalue())))
+        self.assertEqual([error[0] for error in errors[1:]], ['4', '5', '6'])
+        self.assertIn('infant_enrolldate', errors[1][2])
+        self.assertIn('repeated', errors[2][2])
+
+    def test_update_changed_rows(self):
+        importer = ChildDatasetImporter()
+        importer.import_file(self.write_csv([
+            self.row('B123-040990001-5-10'), self.row('B123-040990002-5-10')]))
+
+        result = ChildDatasetImporter().import_file(self.write_csv([
+            self.row('B123-040990001-5-10', age='8'),
+            self.row('B123-040990002-5-10'),
+            self.row('B123-040990003-5-10')]))
+
+        self.assertEqual((result.created, result.updated, result.unchanged), (1, 1, 1))
+        self.assertEqual(ChildDataset.objects.get(
+            study_child_identifier='B123-040990001-5-10').age_today, Decimal('8.00'))
+
+    def test_missing_required_column(self):
+        path = os.path.join(self.directory.name, 'dataset.csv')
+        with open(path, 'w') as csv_file:
+            csv_file.write('study_child_identifier,infant_sex\n')
+        with self.assertRaises(ValueError):
+            ChildDatasetImporter().import_file(path)
@@ -0,0 +1,58 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+from dateutil.tz import gettz
+from django.core.cache import caches
+from django.test import TestCase, tag
+from django.test.utils import override_settings
+
+from ..helper_classes.consent_version_service import ConsentVersionService
+
+
+@tag('consent_versions')
+@override_settings(FLOURISH_CHILD_CONSENT_VERSION_CACHE='default')
+class TestConsentVersionService(TestCase):
+
+    def setUp(self):
+        caches['default'].clear()
+        self.service = ConsentVersionService()
+        self.timeline = [
+            (datetime(2021, 1, 1, tzinfo=gettz('UTC')), '1'),
+            (datetime(2022, 6, 1, tzinfo=gettz('UTC')), '2'),
+            (datetime(2023, 6, 1, tzinfo=gettz('UTC')), '3')]
+
+    def test_resolve_as_of(self):
+        self.assertEqual(self.service.resolve(self.timeline), '3')
+        self.assertEqual(self.service.resolve(
+            self.timeline, as_of=datetime(2022, 7, 1, tzinfo=gettz('UTC'))), '2')
+        self.assertEqual(self.service.resolve(
+            self.timeline, as_of=datetime(2022, 6, 1, tzinfo=gettz('UTC'))), '2')
+        self.assertIsNone(self.service.resolve(
+            self.timeline, as_of=datetime(2020, 1, 1, tzinfo=gettz('UTC'))))
+        self.assertIsNone(self.service.resolve([]))
+
+    def test_bulk_versions_batched_queries(self):
+        subject_identifiers = [f'B142-040990{idx:03d}-1' for idx in range(1200)]
+        with self.assertNumQueries(3):
+            versions = self.service.versions(subject_identifiers)
+        self.assertEqual(len(versions), 1200)
+        with self.assertNumQueries(0):
+            self.service.versions(subject_identifiers)
+
+    def test_uncommitted_change_not_cached(self):
+        subject_identifier = 'B142-040990001-1'
+        cache = caches['default']
+        self.service.timeline(subject_identifier)
+        self.assertIsNotNone(cache.get(self.service.timeline_key(subject_identifier)))
+
+        # the test runs in a transaction that never commits
+        self.service.child_consent_changed(
+            sender=None, instance=SimpleNamespace(subject_identifier=subject_identifier))
+        self.assertIsNone(cache.get(self.service.timeline_key(subject_identifier)))
+        self.service.timeline(subject_identifier)
+        self.assertIsNone(cache.get(self.service.timeline_key(subject_identifier)))
+
+        # run the commit hook directly
+        self.service.changes.flush()
+        self.service.timeline(subject_identifier)
+        self.assertIsNotNone(cache.get(self.service.timeline_key(subject_identifier)))
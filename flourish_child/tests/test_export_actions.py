@@ -0,0 +1,183 @@
+import csv
+import datetime
+import io
+from unittest import mock
+
+import xlwt
+from dateutil.relativedelta import relativedelta
+from django.test import TestCase, tag
+from edc_base.utils import get_utcnow
+from edc_constants.constants import NOT_APPLICABLE, YES
+from edc_facility.import_holidays import import_holidays
+from edc_visit_tracking.constants import SCHEDULED
+from model_mommy import mommy
+from openpyxl import load_workbook
+
+from ..admin.exportaction_mixin import ExportActionMixin
+from ..helper_classes.m2m_export_encoder import M2MExportEncoder
+from ..models import Appointment, InfantFeeding, SolidFoods
+
+
+class InfantFeedingExport(ExportActionMixin):
+
+    model = InfantFeeding
+
+
+def cell_text(value):
+    """ Returns a cell value as the text the CSV export writes.
+    """
+    if value is None:
+        return ''
+    if isinstance(value, datetime.date):
+        return value.strftime('%Y/%m/%d')
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+@tag('export_actions')
+class TestExportActions(TestCase):
+
+    def setUp(self):
+        import_holidays()
+
+        mommy.make_recipe(
+            'flourish_child.childdataset',
+            infant_hiv_exposed='Exposed',
+            infant_enrolldate=get_utcnow(),
+            study_maternal_identifier='12345',
+            dob=get_utcnow() - relativedelta(years=2),
+            study_child_identifier='1234')
+
+        maternal_dataset_obj = mommy.make_recipe(
+            'flourish_caregiver.maternaldataset',
+            delivdt=get_utcnow() - relativedelta(years=2),
+            mom_enrolldate=get_utcnow(),
+            mom_hivstatus='HIV-infected',
+            study_maternal_identifier='12345',
+            protocol='Tshilo Dikotla')
+
+        mommy.make_recipe(
+            'flourish_caregiver.screeningpriorbhpparticipants',
+            screening_identifier=maternal_dataset_obj.screening_identifier,)
+
+        subject_consent = mommy.make_recipe(
+            'flourish_caregiver.subjectconsent',
+            screening_identifier=maternal_dataset_obj.screening_identifier,
+            breastfeed_intent=NOT_APPLICABLE,
+            consent_datetime=get_utcnow(),
+            hiv_testing=YES,
+            version='1')
+
+        caregiver_child_consent_obj = mommy.make_recipe(
+            'flourish_caregiver.caregiverchildconsent',
+            subject_consent=subject_consent,
+            study_child_identifier='1234',
+            identity='126513789',
+            confirm_identity='126513789',
+            child_dob=(get_utcnow() - relativedelta(years=2)).date(),
+            version='1')
+
+        mommy.make_recipe(
+            'flourish_caregiver.caregiverpreviouslyenrolled',
+            subject_identifier=subject_consent.subject_identifier)
+
+        child_visit = mommy.make_recipe(
+            'flourish_child.childvisit',
+            appointment=Appointment.objects.get(
+                subject_identifier=caregiver_child_consent_obj.subject_identifier,
+                visit_code='2000'),
+            report_datetime=get_utcnow(),
+            reason=SCHEDULED)
+
+        solid_foods = [
+            SolidFoods.objects.create(short_name=f'export_food_{index}',
+                                      name=f'Export food {index}')
+            for index in range(3)]
+
+        infant_feeding = mommy.make_recipe(
+            'flourish_child.infantfeeding',
+            child_visit=child_visit,
+            dt_weaned=datetime.date(2023, 5, 24))
+        infant_feeding.solid_foods.add(solid_foods[0], solid_foods[2])
+        infant_feeding.solid_foods_past_week.add(solid_foods[1])
+
+        self.queryset = InfantFeeding.objects.all()
+        self.export_admin = InfantFeedingExport()
+
+    def xls_rows(self):
+        """ Returns the cells written by the xls export, as rows.
+        """
+        cells = {}
+        write = xlwt.Worksheet.write
+
+        def record_write(ws, row, col, label='', style=xlwt.Style.default_style):
+            cells[(row, col)] = label
+            return write(ws, row, col, label, style)
+
+        with mock.patch.object(xlwt.Worksheet, 'write', record_write):
+            self.export_admin.export_as_csv(None, self.queryset)
+
+        rows = []
+        for (row, col), label in sorted(cells.items()):
+            if row == len(rows):
+                rows.append([])
+            rows[row].append(label)
+        return rows
+
+    def test_streaming_csv_matches_xls(self):
+        xls_rows = self.xls_rows()
+
+        response = self.export_admin.export_as_streaming_csv(None, self.queryset)
+        content = b''.join(
+            value if isinstance(value, bytes) else value.encode()
+            for value in response.streaming_content).decode()
+        csv_rows = list(csv.reader(io.StringIO(content)))
+
+        self.assertEqual(csv_rows[0], xls_rows[0])
+        self.assertEqual(
+            csv_rows[1:], [[cell_text(value) for value in row] for row in xls_rows[1:]])
+
+    def test_xlsx_matches_xls(self):
+        xls_rows = self.xls_rows()
+
+        response = self.export_admin.export_as_xlsx(None, self.queryset)
+        workbook = load_workbook(io.BytesIO(b''.join(response.streaming_content)))
+        xlsx_rows = [list(row) for row in workbook.active.iter_rows(values_only=True)]
+
+        self.assertEqual(xlsx_rows[0], xls_rows[0])
+        self.assertEqual(
+            [[cell_text(value) for value in row] for row in xlsx_rows[1:]],
+            [[cell_text(value) for value in row] for row in xls_rows[1:]])
+
+    def test_m2m_columns_one_hot(self):
+        header, row = self.xls_rows()
+        choices = list(SolidFoods.objects.order_by(
+            'created').values_list('short_name', flat=True))
+
+        # both m2m fields expand into one column per list model entry
+        positions = [position for position, column in enumerate(header)
+                     if column == 'export_food_0']
+        self.assertEqual(len(positions), 2)
+        solid_foods, past_week = (
+            dict(zip(choices, row[position - choices.index('export_food_0'):]))
+            for position in positions)
+        self.assertEqual(
+            [solid_foods[f'export_food_{index}'] for index in range(3)], [1, 0, 1])
+        self.assertEqual(
+            [past_week[f'export_food_{index}'] for index in range(3)], [0, 1, 0])
+
+    def test_m2m_encoding_does_not_query_per_row(self):
+        m2m_fields = [InfantFeeding._meta.get_field('solid_foods'),
+                      InfantFeeding._meta.get_field('solid_foods_past_week')]
+        m2m_encoder = M2MExportEncoder()
+        m2m_encoder.m2m_list_data(SolidFoods)
+
+        with self.assertNumQueries(len(m2m_fields)):
+            m2m_encoder.prefetch(self.queryset)
+
+        objs = list(self.queryset)
+        with self.assertNumQueries(0):
+            for obj in objs:
+                for m2m_field in m2m_fields:
+                    m2m_encoder.encode(obj, m2m_field=m2m_field)
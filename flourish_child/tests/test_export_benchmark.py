@@ -0,0 +1,93 @@
+import datetime
+import os
+import time
+from unittest import skipUnless
+
+from django.test import TestCase, tag
+from django.utils import timezone
+from edc_base import get_utcnow
+from edc_lab.models import Panel
+
+from ..admin.model_admin_mixins import ExportRequisitionCsvMixin
+from ..models import ChildRequisition
+
+
+def legacy_requisition_row(obj, field_names):
+    """Row building as done before the export columns were precomputed.
+    """
+    obj_dict = obj.__dict__
+    result_dict_obj = {**obj_dict}
+    for key, value in obj_dict.items():
+        if isinstance(value, datetime.datetime):
+            value = timezone.make_naive(value)
+            result_dict_obj[key] = value.date()
+            result_dict_obj[key + '_time'] = value.time()
+    return [result_dict_obj.get(field) for field in field_names] + [obj.panel.name]
+
+
+class RequisitionRowsMixin:
+
+    rows = None
+
+    def setUp(self):
+        panel = Panel(name='hematology')
+        self.requisitions = []
+        for _ in range(self.rows):
+            requisition = ChildRequisition(
+                requisition_datetime=get_utcnow(),
+                drawn_datetime=get_utcnow(),
+                received_datetime=get_utcnow(),
+                processed_datetime=get_utcnow(),
+                packed_datetime=get_utcnow(),
+                shipped_datetime=get_utcnow(),
+                report_datetime=get_utcnow(),
+                clinic_verified_datetime=get_utcnow(),
+                is_drawn='Yes')
+            requisition.panel = panel
+            self.requisitions.append(requisition)
+        self.export_mixin = ExportRequisitionCsvMixin()
+        self.attnames, self.datetime_positions = (
+            self.export_mixin.requisition_export_columns(ChildRequisition))
+        self.field_names = self.attnames + [
+            f'{self.attnames[position]}_time' for position in self.datetime_positions]
+
+    def legacy_rows(self):
+        return [legacy_requisition_row(obj, self.field_names)
+                for obj in self.requisitions]
+
+    def export_rows(self):
+        return [self.export_mixin.requisition_row(
+            obj, attnames=self.attnames, datetime_positions=self.datetime_positions)
+            for obj in self.requisitions]
+
+
+@tag('export_benchmark')
+class TestRequisitionExportRows(RequisitionRowsMixin, TestCase):
+
+    rows = 50
+
+    def test_rows_match_legacy(self):
+        self.assertEqual(self.export_rows(), self.legacy_rows())
+
+
+@tag('export_benchmark')
+@skipUnless(os.environ.get('FLOURISH_CHILD_BENCHMARKS'),
+            'Set FLOURISH_CHILD_BENCHMARKS=1 to run the export benchmarks.')
+class TestRequisitionExportBenchmark(RequisitionRowsMixin, TestCase):
+
+    rows = 10000
+
+    def test_faster_than_legacy(self):
+        start = time.perf_counter()
+        legacy_rows = self.legacy_rows()
+        legacy_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        rows = self.export_rows()
+        seconds = time.perf_counter() - start
+
+        self.assertEqual(rows, legacy_rows)
+        self.assertLess(
+            seconds, legacy_seconds,
+            f'{self.rows} requisition rows: legacy {legacy_seconds:.3f}s, '
+            f'precomputed columns {seconds:.3f}s')
@@ -0,0 +1,44 @@
+from django.test import TestCase, tag
+
+from ..helper_classes.export_column_plan import ExportColumnPlan
+from ..helper_classes.model_exporter import ModelExportMixin
+from ..models import ChildDataset, ChildPreviousHospitalization
+
+
+@tag('export_plan')
+class TestExportColumnPlan(TestCase):
+
+    def setUp(self):
+        self.exclude_fields = ModelExportMixin().exclude_fields
+
+    def test_plan_cached_per_model(self):
+        plan = ExportColumnPlan.for_model(ChildDataset, self.exclude_fields)
+        self.assertIs(
+            plan, ExportColumnPlan.for_model(ChildDataset, self.exclude_fields))
+
+    def test_header_renames(self):
+        plan = ExportColumnPlan.for_model(ChildDataset, self.exclude_fields)
+        header = plan.header(lambda model_cls: [])
+        self.assertIn('childpid', header)
+        self.assertIn('old_matpid', header)
+        self.assertIn('old_childpid', header)
+        self.assertNotIn('subject_identifier', header)
+        self.assertNotIn('first_name', header)
+
+    def test_one_extractor_per_field(self):
+        plan = ExportColumnPlan.for_model(ChildDataset, self.exclude_fields)
+        self.assertEqual(len(plan.fields), len(plan.extractors))
+        self.assertEqual(len(plan.fields), len(plan.header_columns))
+
+    def test_inline_relations(self):
+        plan = ExportColumnPlan.for_model(
+            ChildPreviousHospitalization, self.exclude_fields)
+        self.assertTrue(plan.inline_relations)
+        self.assertEqual(set(plan.inline_plans.keys()), set(plan.inline_relations))
+
+    def test_inline_prefetch_per_relation(self):
+        plan = ExportColumnPlan.for_model(
+            ChildPreviousHospitalization, self.exclude_fields)
+        self.assertEqual(
+            [prefetch.prefetch_through for prefetch in plan.inline_prefetches],
+            [relation.get_accessor_name() for relation in plan.inline_relations])
@@ -0,0 +1,99 @@
+from dateutil.relativedelta import relativedelta
+from django.apps import apps as django_apps
+from django.test import TestCase, tag
+from edc_base import get_utcnow
+from edc_constants.constants import MALE, YES
+from edc_facility.import_holidays import import_holidays
+from model_mommy import mommy
+
+from ..helper_classes import ParticipantContextResolver
+
+
+@tag('export_context')
+class TestParticipantContextResolver(TestCase):
+
+    def setUp(self):
+        import_holidays()
+        self.study_maternal_identifier = '1234'
+        self.options = {
+            'consent_datetime': get_utcnow(),
+            'version': '1'}
+
+        maternal_dataset_obj = mommy.make_recipe(
+            'flourish_caregiver.maternaldataset',
+            delivdt=get_utcnow() - relativedelta(years=12, months=5),
+            mom_enrolldate=get_utcnow(),
+            mom_hivstatus='HIV-infected',
+            study_maternal_identifier=self.study_maternal_identifier,
+            protocol='Tshilo Dikotla')
+
+        mommy.make_recipe(
+            'flourish_child.childdataset',
+            dob=get_utcnow() - relativedelta(years=12, months=5),
+            infant_hiv_exposed='Exposed',
+            infant_enrolldate=get_utcnow(),
+            study_maternal_identifier=self.study_maternal_identifier,
+            study_child_identifier='1234')
+
+        mommy.make_recipe(
+            'flourish_caregiver.screeningpriorbhpparticipants',
+            screening_identifier=maternal_dataset_obj.screening_identifier, )
+
+        self.subject_consent = mommy.make_recipe(
+            'flourish_caregiver.subjectconsent',
+            screening_identifier=maternal_dataset_obj.screening_identifier,
+            breastfeed_intent=YES,
+            **self.options)
+
+        self.caregiver_child_consent = mommy.make_recipe(
+            'flourish_caregiver.caregiverchildconsent',
+            subject_consent=self.subject_consent,
+            gender=MALE,
+            study_child_identifier='1234',
+            child_dob=maternal_dataset_obj.delivdt, )
+
+        mommy.make_recipe(
+            'flourish_child.childassent',
+            subject_identifier=self.caregiver_child_consent.subject_identifier,
+            first_name=self.caregiver_child_consent.first_name,
+            last_name=self.caregiver_child_consent.last_name,
+            dob=self.caregiver_child_consent.child_dob,
+            identity=self.caregiver_child_consent.identity,
+            confirm_identity=self.caregiver_child_consent.identity,
+            remain_in_study=YES,
+            version=self.caregiver_child_consent.version)
+
+        self.subject_identifier = self.caregiver_child_consent.subject_identifier
+
+    def test_context_matches_single_row_lookups(self):
+        resolver = ParticipantContextResolver(
+            subject_identifiers=[self.subject_identifier])
+        context = resolver.participant_context(self.subject_identifier)
+
+        self.assertEqual(context.get('matpid'),
+                         self.subject_consent.subject_identifier)
+        self.assertEqual(context.get('old_matpid'),
+                         self.study_maternal_identifier)
+        self.assertEqual(context.get('child_exposure_status'), 'HEU')
+        self.assertEqual(context.get('previous_study'),
+                         self.caregiver_child_consent.get_protocol)
+        self.assertEqual(context.get('infant_sex'), MALE)
+
+        cohort_cls = django_apps.get_model('flourish_caregiver.cohort')
+        cohorts = cohort_cls.objects.filter(
+            subject_identifier=self.subject_identifier).order_by('-assign_datetime')
+        enrol_cohort = cohorts.filter(enrollment_cohort=True).first()
+        current_cohort = cohorts.filter(current_cohort=True).first()
+        self.assertEqual(
+            resolver.get_cohort_details(self.subject_identifier),
+            (getattr(enrol_cohort, 'name', None), getattr(current_cohort, 'name', None)))
+
+    def test_query_count_independent_of_subjects(self):
+        with self.assertNumQueries(9):
+            ParticipantContextResolver(
+                subject_identifiers=[self.subject_identifier, 'B142-040990001-1'])
+
+    def test_no_subjects_no_queries(self):
+        with self.assertNumQueries(0):
+            resolver = ParticipantContextResolver(subject_identifiers=[])
+        self.assertIsNone(resolver.caregiver_subject_identifier('B142-040990001-1'))
@@ -0,0 +1,127 @@
+import csv
+import json
+import os
+import tempfile
+
+from django.test import TestCase, override_settings, tag
+from model_mommy import mommy
+
+from ..constants import DONE, FAILED
+from ..helper_classes.export_job_runner import ExportJobRunner
+from ..models import ChildDataset, ExportJob
+
+
+class FailingExportJobRunner(ExportJobRunner):
+    """Fails writing the chunk numbered `fail_chunk`, like a worker that
+    crashed part way through the export.
+    """
+
+    fail_chunk = 2
+
+    def write_chunk(self, exporter, pks):
+        if self.job.chunks_done + 1 == self.fail_chunk:
+            raise OSError('worker stopped')
+        super().write_chunk(exporter, pks)
+
+
+@tag('export_job_runner')
+class TestExportJobRunner(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(MEDIA_ROOT=directory.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        for index in range(5):
+            mommy.make_recipe(
+                'flourish_child.childdataset',
+                subject_identifier=f'B142-040990{index:03d}-1-10',
+                study_child_identifier=f'B123-040990{index:03d}-5-10')
+        self.pks = [str(pk) for pk in ChildDataset.objects.order_by(
+            'pk').values_list('pk', flat=True)]
+
+    def export_job(self, **options):
+        return ExportJob.objects.create(
+            model_label='flourish_child.childdataset', chunk_size=2, **options)
+
+    def exported_identifiers(self, job):
+        """Returns the study child identifiers of each part file.
+        """
+        parts = []
+        for filename in job.output_files:
+            with open(filename, newline='') as export_file:
+                rows = list(csv.DictReader(export_file))
+            parts.append([row['old_childpid'] for row in rows])
+        return parts
+
+    def study_child_identifiers(self, pks):
+        identifiers = dict(ChildDataset.objects.values_list(
+            'pk', 'study_child_identifier'))
+        return [identifiers[pk] for pk in ChildDataset.objects.filter(
+            pk__in=pks).order_by('pk').values_list('pk', flat=True)]
+
+    def test_part_files_written(self):
+        job = ExportJobRunner(job=self.export_job()).run()
+
+        self.assertEqual(job.status, DONE)
+        self.assertEqual((job.total_rows, job.rows_done, job.chunks_done), (5, 5, 3))
+        self.assertEqual(job.last_pk, self.pks[-1])
+        self.assertEqual(
+            [os.path.basename(filename) for filename in job.output_files],
+            ['childdataset-part-00001.csv', 'childdataset-part-00002.csv',
+             'childdataset-part-00003.csv'])
+        self.assertEqual(
+            self.exported_identifiers(job),
+            [self.study_child_identifiers(self.pks[:2]),
+             self.study_child_identifiers(self.pks[2:4]),
+             self.study_child_identifiers(self.pks[4:])])
+
+    def test_resume_from_last_pk(self):
+        job = self.export_job()
+        with self.assertRaises(OSError):
+            FailingExportJobRunner(job=job).run()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, FAILED)
+        self.assertEqual((job.rows_done, job.chunks_done), (2, 1))
+        self.assertEqual(job.last_pk, self.pks[1])
+        self.assertEqual(len(job.output_files), 1)
+
+        job = ExportJobRunner(job=job).run()
+
+        self.assertEqual(job.status, DONE)
+        self.assertEqual((job.rows_done, job.chunks_done), (5, 3))
+        # the first part file is not written again
+        self.assertEqual(
+            self.exported_identifiers(job),
+            [self.study_child_identifiers(self.pks[:2]),
+             self.study_child_identifiers(self.pks[2:4]),
+             self.study_child_identifiers(self.pks[4:])])
+
+    def test_selected_ids_paged_by_position(self):
+        selected = [self.pks[0], self.pks[2], self.pks[3], self.pks[4]]
+        job = self.export_job(object_ids=json.dumps(selected))
+        ChildDataset.objects.filter(pk=self.pks[3]).delete()
+
+        runner = ExportJobRunner(job=job)
+        self.assertEqual(runner.count(), 4)
+        self.assertEqual(
+            [([str(pk) for pk in pks], last_pk) for pks, last_pk in runner.chunks()],
+            [([self.pks[0], self.pks[2]], self.pks[2]),
+             ([self.pks[4]], self.pks[4])])
+
+        # resumes after the position of the last exported id
+        job.last_pk = self.pks[2]
+        self.assertEqual(
+            [last_pk for _, last_pk in ExportJobRunner(job=job).chunks()],
+            [self.pks[4]])
+
+        job.last_pk = None
+        job = ExportJobRunner(job=job).run()
+        self.assertEqual((job.rows_done, job.chunks_done), (3, 2))
+        self.assertEqual(
+            self.exported_identifiers(job),
+            [self.study_child_identifiers([self.pks[0], self.pks[2]]),
+             self.study_child_identifiers([self.pks[4]])])
@@ -0,0 +1,110 @@
+import os
+import tempfile
+import uuid
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings, tag
+
+from ..helper_classes.file_encryptor import (
+    FileEncryptor, encryption_key, remove_file)
+from ..helper_classes.utils import encrypt_files
+from ..models import ClinicianNotesImage
+
+
+@tag('file_encryptor')
+class TestFileEncryptor(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.media_root = directory.name
+        os.makedirs(os.path.join(self.media_root, 'child_notes'))
+        key_path = os.path.join(self.media_root, 'filekey.key')
+        with open(key_path, 'w') as filekey:
+            filekey.write('secret\n')
+
+        settings = override_settings(
+            DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage',
+            MEDIA_ROOT=self.media_root,
+            FLOURISH_CHILD_FILE_KEY=key_path)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        encryption_key.cache_clear()
+        self.addCleanup(encryption_key.cache_clear)
+
+        self.encryptor = FileEncryptor(
+            model_label='flourish_child.cliniciannotesimage', max_workers=2)
+
+    def clinician_notes_image(self, name, content=b'notes'):
+        if content is not None:
+            with open(os.path.join(self.media_root, 'child_notes', name), 'wb') as f:
+                f.write(content)
+        # encryption only reads the image row, its notes are not needed
+        image_obj = ClinicianNotesImage.objects.create(
+            clinician_notes_id=uuid.uuid4(), image=f'child_notes/{name}')
+        self.addCleanup(ClinicianNotesImage.objects.filter(id=image_obj.id).delete)
+        return image_obj
+
+    def remove_files_on_commit(self):
+        # the test transaction never commits, run the file removals it queued
+        for hook in connection.run_on_commit:
+            if getattr(hook[1], 'func', None) is remove_file:
+                hook[1]()
+
+    def test_plaintext_removed_after_row_repointed(self):
+        image_obj = self.clinician_notes_image('notes.png')
+        path = os.path.join(self.media_root, 'child_notes', 'notes.png')
+
+        encrypted, failures = self.encryptor.encrypt_files(
+            [(image_obj.id, image_obj.image.name, 'B142-040990001-5-10')])
+
+        self.assertEqual((encrypted, failures), (1, []))
+        image_obj.refresh_from_db()
+        self.assertTrue(image_obj.image.name.startswith(
+            'child_notes/B142-040990001-5-10_notes_'))
+        self.assertTrue(image_obj.image.name.endswith('.zip'))
+        self.assertTrue(os.path.exists(image_obj.image.path))
+        # kept until the update commits
+        self.assertTrue(os.path.exists(path))
+
+        self.remove_files_on_commit()
+        self.assertFalse(os.path.exists(path))
+
+    def test_encrypt_files_removes_plaintext_on_commit(self):
+        image_obj = self.clinician_notes_image('notes.png')
+        path = image_obj.image.path
+
+        encrypt_files(image_obj, 'B142-040990001-5-10')
+
+        image_obj.refresh_from_db()
+        self.assertTrue(image_obj.image.name.endswith('.zip'))
+        self.assertTrue(os.path.exists(image_obj.image.path))
+        # kept until the update commits
+        self.assertTrue(os.path.exists(path))
+
+        self.remove_files_on_commit()
+        self.assertFalse(os.path.exists(path))
+
+    def test_missing_file_left_in_backlog(self):
+        image_obj = self.clinician_notes_image('missing.png', content=None)
+
+        encrypted, failures = self.encryptor.encrypt_files(
+            [(image_obj.id, image_obj.image.name, 'B142-040990001-5-10')])
+
+        self.assertEqual(encrypted, 0)
+        self.assertEqual([object_id for object_id, _ in failures], [image_obj.id])
+        image_obj.refresh_from_db()
+        self.assertEqual(image_obj.image.name, 'child_notes/missing.png')
+        self.assertEqual(os.listdir(os.path.join(self.media_root, 'child_notes')), [])
+
+    def test_command_dry_run(self):
+        out = StringIO()
+        call_command('encrypt_uploads', 'flourish_child.tbadolinterview',
+                     '--dry-run', stdout=out)
+        self.assertIn('flourish_child.tbadolinterview: 0 files to encrypt.',
+                      out.getvalue())
+
+        with self.assertRaises(CommandError):
+            call_command('encrypt_uploads', 'flourish_child.childvisit')
@@ -0,0 +1,44 @@
+from django.test import TestCase, tag
+
+from ..helper_classes.identity_cache import IdentityCache
+from ..helper_classes.utils import child_utils
+
+
+@tag('identity_cache')
+class TestIdentityCache(TestCase):
+
+    def setUp(self):
+        self.identity_cache = IdentityCache(sources={'caregiver': None})
+        self.loads = []
+
+    def loader(self):
+        self.loads.append(1)
+        return 'B142-040990001-0'
+
+    def test_not_cached_outside_scope(self):
+        self.identity_cache.get_or_set('caregiver', 'B142-040990001-1', self.loader)
+        self.identity_cache.get_or_set('caregiver', 'B142-040990001-1', self.loader)
+        self.assertEqual(len(self.loads), 2)
+
+    def test_cached_within_scope(self):
+        with self.identity_cache.scope():
+            for _ in range(3):
+                self.identity_cache.get_or_set(
+                    'caregiver', 'B142-040990001-1', self.loader)
+        self.assertEqual(len(self.loads), 1)
+        self.assertEqual(self.identity_cache.stats(),
+                         {'caregiver': {'hits': 2, 'misses': 1}})
+
+    def test_invalidate(self):
+        with self.identity_cache.scope():
+            self.identity_cache.get_or_set('caregiver', 'B142-040990001-1', self.loader)
+            self.identity_cache.invalidate('caregiver')
+            self.identity_cache.get_or_set('caregiver', 'B142-040990001-1', self.loader)
+        self.assertEqual(len(self.loads), 2)
+
+    def test_repeated_lookup_no_queries(self):
+        with child_utils.identity_cache.scope():
+            child_utils.caregiver_subject_identifier('B142-040990001-1')
+            with self.assertNumQueries(0):
+                self.assertIsNone(
+                    child_utils.caregiver_subject_identifier('B142-040990001-1'))
@@ -0,0 +1,137 @@
+import os
+import tempfile
+import uuid
+from unittest import mock
+
+import pypdfium2 as pdfium
+from PIL import Image
+from django.test import TestCase, override_settings, tag
+from edc_constants.constants import PENDING
+
+from ..constants import DONE, FAILED
+from ..helper_classes import image_stamper
+from ..models import ClinicianNotesImage
+
+WHITE = (255, 255, 255)
+
+
+@tag('image_stamper')
+class TestImageStamper(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.media_root = directory.name
+        os.makedirs(os.path.join(self.media_root, 'child_notes'))
+
+        stamp = Image.new('RGBA', (50, 50), (255, 0, 0, 255))
+        patcher = mock.patch.object(
+            image_stamper, 'stamp_variants', return_value=(stamp, stamp.rotate(90)))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def media_path(self, name):
+        return os.path.join(self.media_root, name)
+
+    def write_pdf(self, path, pages):
+        images = [Image.new('RGB', (200, 300), WHITE) for _ in range(pages)]
+        images[0].save(path, format='PDF', save_all=True, append_images=images[1:])
+
+    def test_stamp_pdf_page_by_page(self):
+        path = self.media_path('notes.pdf')
+        self.write_pdf(path, pages=3)
+
+        self.assertEqual(image_stamper.stamp_pdf(path, scale=1), 3)
+
+        self.assertFalse(os.path.exists(f'{path}.stamping'))
+        pdf = pdfium.PdfDocument(path)
+        try:
+            self.assertEqual(len(pdf), 3)
+            for page_index in range(3):
+                page = pdf.get_page(page_index)
+                image = page.render_topil(scale=1).convert('RGB')
+                page.close()
+                # stamped at the bottom centre of the portrait page
+                self.assertNotEqual(image.getpixel((100, 290)), WHITE)
+                self.assertEqual(image.getpixel((10, 10)), WHITE)
+        finally:
+            pdf.close()
+
+    def test_failed_stamping_removes_temporary_file(self):
+        path = self.media_path('notes.pdf')
+        self.write_pdf(path, pages=3)
+        with open(path, 'rb') as pdf_file:
+            original = pdf_file.read()
+
+        add_stamp = image_stamper.add_stamp
+        stamped = []
+
+        def fail_on_second_page(base_image):
+            if stamped:
+                raise MemoryError
+            stamped.append(base_image)
+            return add_stamp(base_image=base_image)
+
+        with mock.patch.object(image_stamper, 'add_stamp', side_effect=fail_on_second_page):
+            with self.assertRaises(MemoryError):
+                image_stamper.stamp_pdf(path, scale=1)
+
+        self.assertFalse(os.path.exists(f'{path}.stamping'))
+        with open(path, 'rb') as pdf_file:
+            self.assertEqual(pdf_file.read(), original)
+
+    def test_stamp_landscape_image(self):
+        path = self.media_path('notes.png')
+        Image.new('RGB', (300, 200), WHITE).save(path)
+
+        self.assertEqual(image_stamper.stamp_file(path), 1)
+
+        with Image.open(path) as image:
+            # stamped at the right centre of the landscape image
+            self.assertNotEqual(image.convert('RGB').getpixel((290, 100)), WHITE)
+
+    def clinician_notes_image(self, name):
+        # the stamping task only reads the image row, its notes are not needed
+        image_obj = ClinicianNotesImage.objects.create(
+            clinician_notes_id=uuid.uuid4(), image=f'child_notes/{name}')
+        self.addCleanup(ClinicianNotesImage.objects.filter(id=image_obj.id).delete)
+        self.assertEqual(image_obj.stamp_status, PENDING)
+        return image_obj
+
+    def test_stamping_done(self):
+        Image.new('RGB', (200, 300), WHITE).save(
+            self.media_path('child_notes/notes.png'))
+        image_obj = self.clinician_notes_image('notes.png')
+
+        with override_settings(
+                DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage',
+                MEDIA_ROOT=self.media_root):
+            image_stamper.stamp_clinician_notes_image(image_obj.id)
+
+        image_obj.refresh_from_db()
+        self.assertEqual(image_obj.stamp_status, DONE)
+        self.assertEqual(image_obj.stamp_pages, 1)
+        self.assertIsNotNone(image_obj.stamped_datetime)
+        self.assertIsNotNone(image_obj.stamp_seconds)
+        self.assertIsNone(image_obj.stamp_error)
+
+        # a stamped image is not stamped again
+        with mock.patch.object(image_stamper, 'stamp_file') as stamp_file:
+            image_stamper.stamp_clinician_notes_image(image_obj.id)
+        stamp_file.assert_not_called()
+
+    def test_stamping_failed(self):
+        with open(self.media_path('child_notes/notes.png'), 'w') as not_an_image:
+            not_an_image.write('not an image')
+        image_obj = self.clinician_notes_image('notes.png')
+
+        with override_settings(
+                DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage',
+                MEDIA_ROOT=self.media_root):
+            with self.assertRaises(Exception):
+                image_stamper.stamp_clinician_notes_image(image_obj.id)
+
+        image_obj.refresh_from_db()
+        self.assertEqual(image_obj.stamp_status, FAILED)
+        self.assertTrue(image_obj.stamp_error)
+        self.assertIsNone(image_obj.stamped_datetime)
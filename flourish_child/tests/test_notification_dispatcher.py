@@ -0,0 +1,88 @@
+from unittest import mock
+
+from django.contrib.auth.models import Group, User
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.test import TestCase, override_settings, tag
+from edc_data_manager.models import DataActionItem
+
+from ..helper_classes.notification_dispatcher import notifications
+from ..helper_classes.utils import notification
+
+
+@tag('notification_dispatcher')
+class TestNotificationDispatcher(TestCase):
+
+    def setUp(self):
+        Group.objects.create(name='assignable users')
+        User.objects.create(username='clinician')
+
+    def test_notification(self):
+        notification(subject_identifier='B142-040990001-5-10',
+                     subject='Pending academic results',
+                     user_created='clinician')
+        notification(subject_identifier='B142-040990001-5-10',
+                     subject='Pending academic results',
+                     user_created='clinician')
+
+        self.assertEqual(DataActionItem.objects.filter(
+            subject_identifier='B142-040990001-5-10',
+            assigned='clinician').count(), 1)
+        self.assertTrue(User.objects.get(username='clinician').groups.filter(
+            name='assignable users').exists())
+
+    def test_unknown_user_dropped(self):
+        notification(subject_identifier='B142-040990001-5-10',
+                     subject='Pending academic results',
+                     user_created='unknown')
+        self.assertFalse(DataActionItem.objects.exists())
+
+    @override_settings(FLOURISH_CHILD_DEFER_NOTIFICATIONS=True)
+    def test_dispatch_batches_lookups(self):
+        notifications.dispatch([
+            dict(subject_identifier=f'B142-040990{index:03}-5-10',
+                 subject='Pending academic results', user_created='clinician')
+            for index in range(5)])
+        notifications.clear_assignees()
+
+        receiver = mock.Mock()
+        post_save.connect(receiver, sender=DataActionItem, weak=False)
+        self.addCleanup(post_save.disconnect, receiver, sender=DataActionItem)
+
+        with mock.patch.object(User.objects, 'get', wraps=User.objects.get) as get:
+            created = notifications.dispatch([
+                dict(subject_identifier=f'B142-040990{index:03}-5-10',
+                     subject='Pending academic results', user_created='clinician')
+                for index in range(100)])
+
+        self.assertEqual(len(created), 95)
+        self.assertEqual(DataActionItem.objects.count(), 100)
+        # the assignee is looked up once for the batch
+        self.assertEqual(get.call_count, 1)
+        # each item is saved, not bulk created
+        self.assertEqual(receiver.call_count, 95)
+        self.assertTrue(all(call[1]['created'] for call in receiver.call_args_list))
+
+    @override_settings(FLOURISH_CHILD_DEFER_NOTIFICATIONS=True)
+    def test_deferred_until_commit_and_dropped_with_savepoint(self):
+        notification(subject_identifier='B142-040990001-5-10',
+                     subject='Pending academic results', user_created='clinician')
+        try:
+            with transaction.atomic():
+                notification(subject_identifier='B142-040990002-5-10',
+                             subject='Pending academic results',
+                             user_created='clinician')
+                raise ValueError
+        except ValueError:
+            pass
+        with transaction.atomic():
+            notification(subject_identifier='B142-040990003-5-10',
+                         subject='Pending academic results', user_created='clinician')
+        self.assertFalse(DataActionItem.objects.exists())
+
+        # TestCase does not commit, run the commit hooks still queued directly
+        notifications.flush()
+
+        self.assertEqual(
+            sorted(DataActionItem.objects.values_list('subject_identifier', flat=True)),
+            ['B142-040990001-5-10', 'B142-040990003-5-10'])
@@ -0,0 +1,35 @@
+from django.db import connection
+from django.test import TestCase, tag
+from django.test.utils import CaptureQueriesContext
+from edc_base import get_utcnow
+from edc_visit_schedule.site_visit_schedules import site_visit_schedules
+
+from ..helper_classes.onschedule_registry import OnScheduleRegistry
+
+
+@tag('onschedule_registry')
+class TestOnScheduleRegistry(TestCase):
+
+    def setUp(self):
+        self.registry = OnScheduleRegistry()
+        self.registry.populate()
+
+    def test_every_schedule_registered(self):
+        for visit_schedule in site_visit_schedules.visit_schedules.values():
+            for schedule in visit_schedule.schedules.values():
+                self.assertIn(
+                    (schedule.onschedule_model_cls, schedule),
+                    self.registry.get(schedule.name))
+
+    def test_one_query_per_take_off(self):
+        schedule_name = 'tb_adol_schedule'
+        with CaptureQueriesContext(connection) as queries:
+            taken_off = self.registry.bulk_take_off_schedule(
+                ['B142-040990001-1', 'B142-040990002-1'], schedule_name, get_utcnow())
+        selects = [query for query in queries.captured_queries
+                   if query['sql'].startswith('SELECT')]
+        self.assertEqual(len(selects), len(self.registry.get(schedule_name)))
+        self.assertEqual(taken_off, [])
+
+    def test_unknown_schedule_name(self):
+        self.assertEqual(self.registry.get('no_such_schedule'), [])
@@ -0,0 +1,82 @@
+from django.test import TestCase, override_settings, tag
+from django_q.models import Schedule
+from edc_constants.constants import PENDING
+
+from ..constants import DONE, FAILED
+from ..helper_classes.outbox import outbox
+from ..models import OutboxJob
+
+calls = []
+
+
+@outbox.handler('test_record_call')
+def record_call(value):
+    calls.append(value)
+
+
+@outbox.handler('test_fail')
+def fail(value):
+    raise ValueError(value)
+
+
+@tag('outbox')
+class TestOutbox(TestCase):
+
+    def setUp(self):
+        calls.clear()
+
+    def test_sync_job_runs_once(self):
+        outbox.enqueue('test_record_call', 'record:1', value=1)
+        self.assertIsNone(outbox.enqueue('test_record_call', 'record:1', value=1))
+
+        self.assertEqual(calls, [1])
+        job = OutboxJob.objects.get(idempotency_key='record:1')
+        self.assertEqual(job.status, DONE)
+        self.assertEqual(job.attempts, 1)
+        self.assertIsNotNone(job.duration)
+
+        # a finished job is not run again
+        outbox.run(job.id)
+        self.assertEqual(calls, [1])
+
+    @override_settings(FLOURISH_CHILD_OUTBOX_SYNC=False)
+    def test_job_deferred_until_run(self):
+        job = outbox.enqueue('test_record_call', 'record:2', value=2)
+        self.assertEqual(calls, [])
+        self.assertEqual(job.status, PENDING)
+
+        outbox.run(job.id)
+        self.assertEqual(calls, [2])
+
+    @override_settings(FLOURISH_CHILD_OUTBOX_SYNC=False,
+                       FLOURISH_CHILD_OUTBOX_MAX_ATTEMPTS=2)
+    def test_failed_job_retried_until_max_attempts(self):
+        job = outbox.enqueue('test_fail', 'fail:1', value='boom')
+
+        outbox.run(job.id)
+        job.refresh_from_db()
+        self.assertEqual(job.status, FAILED)
+        self.assertEqual(job.error, 'boom')
+        self.assertIsNotNone(job.next_attempt_datetime)
+
+        outbox.run(job.id)
+        job.refresh_from_db()
+        self.assertEqual(job.attempts, 2)
+        self.assertIsNone(job.next_attempt_datetime)
+
+        outbox.run(job.id)
+        job.refresh_from_db()
+        self.assertEqual(job.attempts, 2)
+
+    @override_settings(FLOURISH_CHILD_OUTBOX_REQUEUE_MINUTES=5)
+    def test_requeue_scheduled_once(self):
+        Schedule.objects.filter(name=outbox.requeue_schedule_name).delete()
+
+        outbox.schedule_requeue()
+        outbox.schedule_requeue()
+
+        schedule = Schedule.objects.get(name=outbox.requeue_schedule_name)
+        self.assertEqual(schedule.func, outbox.requeue_task)
+        self.assertEqual(
+            (schedule.schedule_type, schedule.minutes, schedule.repeats),
+            (Schedule.MINUTES, 5, -1))
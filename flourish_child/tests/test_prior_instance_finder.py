@@ -0,0 +1,129 @@
+from unittest import mock
+
+from dateutil.relativedelta import relativedelta
+from django.test import TestCase, tag
+from django.utils.datetime_safe import datetime
+from edc_base.utils import get_utcnow
+from edc_constants.constants import NO, POS, YES
+from edc_facility.import_holidays import import_holidays
+from edc_visit_tracking.constants import SCHEDULED
+from model_mommy import mommy
+
+from ..helper_classes.appointment_timeline import AppointmentTimeline
+from ..helper_classes.prior_instance_finder import PriorInstanceFinder
+from ..helper_classes.utils import child_utils
+from ..models import Appointment, InfantFeeding, InfantHIVTesting
+
+
+@tag('prior_instance_finder')
+class TestPriorInstanceFinder(TestCase):
+
+    def setUp(self):
+        import_holidays()
+
+        screening_preg = mommy.make_recipe('flourish_caregiver.screeningpregwomen')
+
+        subject_consent = mommy.make_recipe(
+            'flourish_caregiver.subjectconsent',
+            screening_identifier=screening_preg.screening_identifier,
+            breastfeed_intent=YES,
+            consent_datetime=get_utcnow(),
+            version='2')
+
+        caregiver_child_consent_obj = mommy.make_recipe(
+            'flourish_caregiver.caregiverchildconsent',
+            subject_consent=subject_consent,
+            gender=None,
+            first_name=None,
+            last_name=None,
+            identity=None,
+            confirm_identity=None,
+            study_child_identifier=None,
+            child_dob=None,
+            version='2')
+        self.subject_identifier = caregiver_child_consent_obj.subject_identifier
+
+        mommy.make_recipe(
+            'flourish_caregiver.antenatalenrollment',
+            enrollment_hiv_status=POS,
+            child_subject_identifier=self.subject_identifier,
+            subject_identifier=subject_consent.subject_identifier, )
+
+        mommy.make_recipe(
+            'flourish_caregiver.maternaldelivery',
+            child_subject_identifier=self.subject_identifier,
+            subject_identifier=subject_consent.subject_identifier, )
+
+        mommy.make_recipe(
+            'flourish_child.childbirth',
+            subject_identifier=self.subject_identifier,
+            dob=(get_utcnow() - relativedelta(days=1)).date(), )
+
+        child_visits = {
+            visit_code: mommy.make_recipe(
+                'flourish_child.childvisit',
+                appointment=self.appointment(visit_code),
+                report_datetime=get_utcnow(),
+                reason=SCHEDULED)
+            for visit_code in ('2000D', '2001', '2002')}
+
+        self.infant_hiv_testing = mommy.make_recipe(
+            'flourish_child.infanthivtesting',
+            child_visit=child_visits['2001'],
+            received_date=datetime(2023, 6, 5),
+            child_tested_for_hiv=NO)
+
+        self.infant_feedings = {
+            visit_code: mommy.make_recipe(
+                'flourish_child.infantfeeding',
+                child_visit=child_visits[visit_code],
+                continuing_to_bf=NO,
+                dt_weaned=datetime(2023, 5, 24))
+            for visit_code in ('2001', '2002')}
+
+    def appointment(self, visit_code):
+        return Appointment.objects.get(
+            subject_identifier=self.subject_identifier, visit_code=visit_code)
+
+    def test_find_latest_earlier_instance(self):
+        finder = PriorInstanceFinder(appointment=self.appointment('2003'))
+
+        with self.assertNumQueries(1):
+            self.assertEqual(finder.find(InfantFeeding), self.infant_feedings['2002'])
+        self.assertEqual(finder.find(InfantHIVTesting), self.infant_hiv_testing)
+        self.assertIsNone(
+            PriorInstanceFinder(appointment=self.appointment('2001')).find(InfantFeeding))
+
+    def test_find_include_current(self):
+        finder = PriorInstanceFinder(
+            appointment=self.appointment('2002'), include_current=True)
+        self.assertEqual(finder.find(InfantFeeding), self.infant_feedings['2002'])
+
+    def test_walk_before_timeline(self):
+        # none of the earlier appointments on the timeline, walked back by
+        # previous_by_timepoint instead
+        with mock.patch.object(child_utils, 'appointment_timeline',
+                               return_value=AppointmentTimeline()):
+            finder = PriorInstanceFinder(appointment=self.appointment('2003'))
+            self.assertEqual(finder.earlier_appointments, [])
+
+            self.assertEqual(finder.find(InfantFeeding), self.infant_feedings['2002'])
+            self.assertEqual(finder.find(InfantHIVTesting), self.infant_hiv_testing)
+            self.assertEqual(
+                finder.find_many([InfantFeeding, InfantHIVTesting]),
+                {InfantFeeding: self.infant_feedings['2002'],
+                 InfantHIVTesting: self.infant_hiv_testing})
+
+    def test_find_many_one_query_per_model(self):
+        finder = PriorInstanceFinder(appointment=self.appointment('2003'))
+
+        with self.assertNumQueries(2):
+            instances = finder.find_many([InfantFeeding, InfantHIVTesting])
+
+        self.assertEqual(
+            instances, {model_cls: finder.find(model_cls)
+                        for model_cls in (InfantFeeding, InfantHIVTesting)})
+        self.assertEqual(
+            child_utils.previous_instances(
+                self.appointment('2003'), [InfantFeeding, InfantHIVTesting]),
+            instances)
@@ -0,0 +1,33 @@
+import random
+
+from django.test import TestCase, tag
+
+from ..helper_classes.bulk_rescorer import BulkRescorer
+from ..helper_classes.questionnaire_scoring import GAD7, PHQ9
+
+
+@tag('questionnaire_scoring')
+class TestQuestionnaireScoring(TestCase):
+
+    def rows(self, instrument, count=1000):
+        rows = []
+        for pk in range(count):
+            items = [str(random.randint(0, 3)) for _ in instrument.item_fields]
+            current = random.choice([None, instrument.score(items), 0])
+            rows.append((pk, current, *items))
+        return rows
+
+    def test_bulk_scores_match_single_row_scores(self):
+        for instrument in [PHQ9, GAD7]:
+            rows = self.rows(instrument)
+            changed = dict(BulkRescorer(instrument=instrument).rescore_rows(rows))
+            for pk, current, *items in rows:
+                score = instrument.score(items)
+                if score == current:
+                    self.assertNotIn(pk, changed)
+                else:
+                    self.assertEqual(changed[pk], score)
+
+    def test_score_obj(self):
+        model_obj = GAD7.model_cls(**{field: '2' for field in GAD7.item_fields})
+        self.assertEqual(model_obj.calculate_depression_score, 14)
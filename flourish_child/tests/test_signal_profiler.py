@@ -0,0 +1,62 @@
+from django.test import TestCase, tag
+from django.test.utils import override_settings
+
+from ..helper_classes.signal_profiler import HandlerStats, SignalProfiler
+from ..models import ExportJob
+
+
+class WorkerProfiler(SignalProfiler):
+
+    @property
+    def process_key(self):
+        return 'worker:1'
+
+
+@tag('signal_profiler')
+class TestSignalProfiler(TestCase):
+
+    def setUp(self):
+        self.profiler = SignalProfiler(window=10)
+
+        @self.profiler.instrument
+        def handler(sender, instance, **kwargs):
+            return ExportJob.objects.count()
+
+        self.handler = handler
+
+    def test_disabled_records_nothing(self):
+        self.handler(sender=None, instance=None)
+        self.assertEqual(self.profiler.summary(), {})
+
+    @override_settings(FLOURISH_CHILD_SIGNAL_PROFILING=True)
+    def test_records_queries_per_call(self):
+        self.handler(sender=None, instance=None)
+        self.handler(sender=None, instance=None)
+        summary = list(self.profiler.summary().values())[0]
+        self.assertEqual(summary.get('calls'), 2)
+        self.assertEqual(summary.get('queries_p50'), 1)
+
+    @override_settings(FLOURISH_CHILD_SIGNAL_PROFILING=True)
+    def test_published_per_process(self):
+        self.addCleanup(self.profiler.reset)
+        other = WorkerProfiler(window=10)
+        self.handler(sender=None, instance=None)
+        self.profiler.publish()
+        other.record('other_handler', 0.01, 2, 0.005)
+        other.publish()
+
+        published = self.profiler.published()
+        self.assertEqual(set(published), {self.profiler.process_key, 'worker:1'})
+        self.assertEqual(published['worker:1']['other_handler']['queries_p50'], 2)
+
+        self.profiler.reset()
+        self.assertEqual(self.profiler.published(), {})
+
+    def test_rolling_window(self):
+        handler_stats = HandlerStats(window=10)
+        for value in range(100):
+            handler_stats.add(value / 1000, value, 0)
+        summary = handler_stats.summary()
+        self.assertEqual(summary.get('calls'), 100)
+        self.assertEqual(summary.get('window'), 10)
+        self.assertEqual(summary.get('queries_p50'), 94)
@@ -0,0 +1,68 @@
+import os
+import tempfile
+
+import numpy as np
+from django.apps import apps as django_apps
+from django.test import TestCase, override_settings, tag
+
+from ..choices import CBCL_SCALE
+from ..helper_classes.subscale_scoring import BRIEF2_PARENT, CBCL, norm_tables
+
+
+@tag('subscale_scoring')
+class TestSubscaleScoring(TestCase):
+
+    def tearDown(self):
+        norm_tables.cache_clear()
+
+    @property
+    def cbcl_item_count(self):
+        return sum(
+            1 for model in CBCL.models
+            for field in django_apps.get_model(model)._meta.fields
+            if field.choices and list(field.choices) == list(CBCL_SCALE))
+
+    def test_cbcl_items(self):
+        item_keys = [key for _, _, key in CBCL.items]
+        self.assertEqual(len(item_keys), self.cbcl_item_count)
+        self.assertEqual(len(set(item_keys)), len(item_keys))
+        self.assertEqual(len(CBCL.subscale_index['anxious_depressed']), 13)
+        self.assertEqual(len(CBCL.subscale_index['internalizing']), 32)
+        self.assertEqual(
+            len(CBCL.subscale_index['total_problems']), self.cbcl_item_count)
+
+    def test_raw_scores(self):
+        answers = np.full((3, len(CBCL.items)), 'not_true', dtype=object)
+        answers[1, :] = 'very_true'
+        answers[2, :] = None
+        answers[2, CBCL.subscale_index['aggressive_behavior']] = 'somewhat'
+
+        raw_scores = CBCL.raw_scores(*CBCL.encode(answers))
+
+        items = self.cbcl_item_count
+        total, answered = raw_scores['total_problems']
+        self.assertEqual(list(total), [0, 2 * items, 18])
+        self.assertEqual(list(answered), [items, items, 18])
+        externalizing, _ = raw_scores['externalizing']
+        self.assertEqual(list(externalizing), [0, 70, 18])
+
+    def test_brief2_raw_scores(self):
+        answers = np.array(
+            [['often'] * len(BRIEF2_PARENT.items),
+             ['never'] * len(BRIEF2_PARENT.items)], dtype=object)
+        total, _ = BRIEF2_PARENT.raw_scores(*BRIEF2_PARENT.encode(answers))['total']
+        self.assertEqual(list(total), [36, 12])
+
+    def test_t_scores_lookup(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as norms:
+            norms.write('instrument,subscale,raw_score,t_score\n')
+            norms.write('brief2_parent,total,12,40\n')
+            norms.write('brief2_parent,total,36,90\n')
+        self.addCleanup(os.remove, norms.name)
+
+        with override_settings(FLOURISH_CHILD_SCORE_NORMS=norms.name):
+            norm_tables.cache_clear()
+            t_scores = BRIEF2_PARENT.t_scores('total', np.array([12, 20, 36, 40]))
+            self.assertEqual(list(t_scores), [40, -1, 90, 90])
+            self.assertEqual(
+                list(CBCL.t_scores('total_problems', np.array([10]))), [-1])
@@ -0,0 +1,44 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import RequestFactory, TestCase, tag
+from django.test.utils import CaptureQueriesContext
+
+from ..autocomple_view import get_received_dates, get_vaccine_history
+
+
+@tag('vaccine_history')
+class TestVaccineHistory(TestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.user = User.objects.create_user(username='clinician', password='password')
+
+    def get(self, **headers):
+        request = self.factory.get('/vaccine_history/B142-040990001-5-10/', **headers)
+        request.user = self.user
+        return get_vaccine_history(request, subject_identifier='B142-040990001-5-10')
+
+    def test_history_etag(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {})
+        self.assertIn('ETag', response)
+
+        response = self.get(HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_history_stale_etag(self):
+        response = self.get(HTTP_IF_NONE_MATCH='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_received_dates_query_one_vaccine(self):
+        request = self.factory.get(
+            '/received_dates/bcg/',
+            HTTP_REFERER='http://testserver/?subject_identifier=B142-040990001-5-10')
+
+        with CaptureQueriesContext(connection) as context:
+            response = get_received_dates(request, vaccine='bcg')
+
+        self.assertEqual(response.json(), {})
+        self.assertEqual(len(context.captured_queries), 1)
+        self.assertIn("'bcg'", context.captured_queries[0]['sql'])
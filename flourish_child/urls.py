@@ -2,7 +2,8 @@ from django.urls.conf import path
 from django.views.generic.base import RedirectView
 
 from flourish_child.admin_site import flourish_child_admin
-from .autocomple_view import get_received_dates
+from .autocomple_view import get_received_dates, get_vaccine_history
+from .signal_stats_view import get_signal_stats
 
 app_name = 'flourish_child'
 
@@ -10,4 +11,7 @@ urlpatterns = [
     path('admin/', flourish_child_admin.urls),
     path('', RedirectView.as_view(url='admin/'), name='home_url'),
     path('received_dates/<slug:vaccine>/', get_received_dates, name='received-dates'),
+    path('vaccine_history/<str:subject_identifier>/', get_vaccine_history,
+         name='vaccine-history'),
+    path('signal_stats/', get_signal_stats, name='signal-stats'),
 ]